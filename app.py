@@ -1,18 +1,27 @@
-from flask import Flask, request, jsonify, render_template, session
-import requests
+import httpx
 import os
 import logging
 import traceback
 import re
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
-from openai import OpenAI
+from openai import AsyncOpenAI
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from starlette.templating import Jinja2Templates
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__, static_folder="static", template_folder="templates")
-app.secret_key = os.getenv("SECRET_KEY", "your-secret-key-here")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
+templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 
 # OpenRouter API配置
 OPENROUTER_API_KEY = ""  # 替换为您的OpenRouter API密钥
@@ -28,6 +37,9 @@ MCP_TIME_URL = "http://127.0.0.1:8000/time/time"
 # MCP 文件系统服务配置
 MCP_FILESYSTEM_URL = "http://127.0.0.1:8000/filesystem"
 
+# 到MCPO的连接池大小：所有聊天请求共享这些keep-alive连接
+MCP_MAX_CONNECTIONS = 100
+
 # 以下配置已不再需要，保留为注释以备参考
 # 或方案2：使用根路径
 # MCP_TIME_URL = "http://127.0.0.1:8000/"
@@ -39,24 +51,74 @@ MCP_FILESYSTEM_URL = "http://127.0.0.1:8000/filesystem"
 from filesystem_operations import read_file as fs_read_file, write_file as fs_write_file
 from filesystem_operations import list_directory, search_files, get_file_info
 
-@app.route("/")
-def index():
+# 共享的异步客户端：每个worker进程一个，在应用关闭时释放
+_http_client = None
+_model_client = None
+
+def get_http_client():
+    """访问MCPO的异步HTTP客户端，复用连接"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MCP_MAX_CONNECTIONS,
+                max_keepalive_connections=MCP_MAX_CONNECTIONS
+            )
+        )
+    return _http_client
+
+def get_model_client():
+    """连接OpenRouter的异步OpenAI客户端"""
+    global _model_client
+    if _model_client is None:
+        _model_client = AsyncOpenAI(
+            base_url=OPENROUTER_API_URL,
+            api_key=OPENROUTER_API_KEY,
+        )
+    return _model_client
+
+@asynccontextmanager
+async def lifespan(app):
+    global _http_client, _model_client
+    yield
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _model_client is not None:
+        await _model_client.close()
+        _model_client = None
+
+async def read_json(request):
+    """把请求体解析为JSON对象；格式错误或不是对象时返回None"""
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def invalid_json():
+    return JSONResponse({"error": "请求体必须是JSON对象"}, status_code=400)
+
+async def index(request):
+    session = request.session
     # 如果没有会话ID，创建一个
     if 'session_id' not in session:
         session['session_id'] = str(uuid.uuid4())
         session['messages'] = []
     
-    return render_template("chat.html")
+    return templates.TemplateResponse(request, "chat.html")
 
-@app.route("/api/chat", methods=["POST"])
-def chat():
-    data = request.json
+async def chat(request):
+    data = await read_json(request)
+    if data is None:
+        return invalid_json()
     user_message = data.get("message", "").strip()
     
     if not user_message:
-        return jsonify({"error": "消息不能为空"}), 400
+        return JSONResponse({"error": "消息不能为空"}, status_code=400)
     
     try:
+        session = request.session
         # 保存用户消息
         messages = session.get('messages', [])
         messages.append({"role": "user", "content": user_message, "timestamp": datetime.now().isoformat()})
@@ -80,7 +142,7 @@ def chat():
                 logger.info("尝试列出桌面目录内容")
                 # 直接使用桌面路径，跳过查询允许目录
                 desktop_path = "C:\\Users\\Jason\\Desktop"
-                file_list = list_directory(desktop_path)
+                file_list = await list_directory(desktop_path)
                 
                 logger.info(f"list_directory返回结果类型: {type(file_list)}")
                 if isinstance(file_list, dict) and "error" in file_list:
@@ -104,7 +166,7 @@ def chat():
                     
                     # 调用大模型处理文件系统信息
                     logger.info(f"发送文件系统提示词到大模型")
-                    response_text = query_guiji_model(filesystem_prompt)
+                    response_text = await query_guiji_model(filesystem_prompt)
             except Exception as e:
                 logger.error(f"处理文件系统查询时出错: {str(e)}")
                 logger.error(traceback.format_exc())
@@ -114,7 +176,7 @@ def chat():
         elif any(keyword in user_message.lower() for keyword in ["时间", "几点", "日期", "today", "time", "date", "clock", "现在"]):
             # 时间相关查询
             logger.info("检测到时间相关查询")
-            time_info = fetch_time()
+            time_info = await fetch_time()
             
             if "error" in time_info:
                 response_text = f"获取时间信息失败: {time_info['error']}"
@@ -144,7 +206,7 @@ def chat():
                 
                 # 调用大模型处理时间信息
                 logger.info(f"发送时间提示词到大模型: {time_prompt}")
-                response_text = query_guiji_model(time_prompt)
+                response_text = await query_guiji_model(time_prompt)
         # 检查消息中是否包含URL
         elif (urls := extract_urls(user_message)):
             # 有URL，需要处理
@@ -152,7 +214,7 @@ def chat():
             
             # 获取第一个URL的内容
             url = urls[0]
-            web_content = fetch_webpage(url)
+            web_content = await fetch_webpage(url)
             
             # 检查是否成功获取网页内容
             if isinstance(web_content, dict) and "error" in web_content:
@@ -184,16 +246,16 @@ def chat():
                 prompt = f"以下是从URL '{url}' 获取的网页内容。请分析并回答用户的问题。\n\n{content_text}\n\n用户的问题是: {user_message}"
                 
                 # 调用模型获取回答
-                response_text = query_guiji_model(prompt)
+                response_text = await query_guiji_model(prompt)
         else:
             # 没有URL，直接进行常规对话
-            response_text = query_guiji_model(user_message)
+            response_text = await query_guiji_model(user_message)
         
         # 保存AI回复
         messages.append({"role": "assistant", "content": response_text, "timestamp": datetime.now().isoformat()})
         session['messages'] = messages
         
-        return jsonify({
+        return JSONResponse({
             "response": response_text,
             "messages": messages[-10:]  # 返回最近10条消息用于显示
         })
@@ -202,71 +264,73 @@ def chat():
         error_msg = f"处理请求时出错: {str(e)}"
         logger.error(error_msg)
         logger.error(traceback.format_exc())
-        return jsonify({"error": error_msg}), 500
-
-@app.route("/api/history", methods=["GET"])
-def get_history():
-    messages = session.get('messages', [])
-    return jsonify({"messages": messages})
-
-@app.route("/api/clear", methods=["POST"])
-def clear_history():
-    session['messages'] = []
-    return jsonify({"status": "success"})
-
-@app.route("/api/time", methods=["GET"])
-def get_time():
-    time_info = fetch_time()
-    return jsonify(time_info)
-
-@app.route("/api/files/list", methods=["POST"])
-def api_list_directory():
-    data = request.json
+        return JSONResponse({"error": error_msg}, status_code=500)
+
+async def get_history(request):
+    messages = request.session.get('messages', [])
+    return JSONResponse({"messages": messages})
+
+async def clear_history(request):
+    request.session['messages'] = []
+    return JSONResponse({"status": "success"})
+
+async def get_time(request):
+    time_info = await fetch_time()
+    return JSONResponse(time_info)
+
+async def api_list_directory(request):
+    data = await read_json(request)
+    if data is None:
+        return invalid_json()
     path = data.get("path", "C:\\Users\\Jason\\Desktop")  # 默认为桌面路径
-    result = list_directory(path)
-    return jsonify(result)
+    result = await list_directory(path)
+    return JSONResponse(result)
 
-@app.route("/api/files/read", methods=["POST"])
-def api_read_file():
-    data = request.json
+# 以下文件操作仍是同步请求，放到线程池中执行，不阻塞事件循环
+async def api_read_file(request):
+    data = await read_json(request)
+    if data is None:
+        return invalid_json()
     path = data.get("path")
     if not path:
-        return jsonify({"error": "文件路径不能为空"}), 400
-    result = fs_read_file(path)
-    return jsonify(result)
+        return JSONResponse({"error": "文件路径不能为空"}, status_code=400)
+    result = await run_in_threadpool(fs_read_file, path)
+    return JSONResponse(result)
 
-@app.route("/api/files/write", methods=["POST"])
-def api_write_file():
-    data = request.json
+async def api_write_file(request):
+    data = await read_json(request)
+    if data is None:
+        return invalid_json()
     path = data.get("path")
     content = data.get("content", "")
     if not path:
-        return jsonify({"error": "文件路径不能为空"}), 400
-    result = fs_write_file(path, content)
-    return jsonify(result)
+        return JSONResponse({"error": "文件路径不能为空"}, status_code=400)
+    result = await run_in_threadpool(fs_write_file, path, content)
+    return JSONResponse(result)
 
-@app.route("/api/files/search", methods=["POST"])
-def api_search_files():
-    data = request.json
+async def api_search_files(request):
+    data = await read_json(request)
+    if data is None:
+        return invalid_json()
     path = data.get("path", ".")
     pattern = data.get("pattern", "*")
     exclude_patterns = data.get("excludePatterns")
-    result = search_files(path, pattern, exclude_patterns)
-    return jsonify(result)
+    result = await run_in_threadpool(search_files, path, pattern, exclude_patterns)
+    return JSONResponse(result)
 
-@app.route("/api/files/info", methods=["POST"])
-def api_get_file_info():
-    data = request.json
+async def api_get_file_info(request):
+    data = await read_json(request)
+    if data is None:
+        return invalid_json()
     path = data.get("path")
     if not path:
-        return jsonify({"error": "文件路径不能为空"}), 400
-    result = get_file_info(path)
-    return jsonify(result)
+        return JSONResponse({"error": "文件路径不能为空"}, status_code=400)
+    result = await run_in_threadpool(get_file_info, path)
+    return JSONResponse(result)
 
-@app.route("/filesystem")
-def filesystem():
+async def filesystem(request):
     """文件系统管理页面"""
-    return render_template("filesystem.html")
+    return templates.TemplateResponse(request, "filesystem.html")
 
 def extract_urls(text):
     """从文本中提取所有URL"""
@@ -292,7 +356,7 @@ def extract_urls(text):
     
     return cleaned_urls
 
-def fetch_webpage(url, max_length=10000, start_index=0, raw=False):
+async def fetch_webpage(url, max_length=10000, start_index=0, raw=False):
     """使用MCP Fetch获取网页内容"""
     try:
         logger.info(f"发送请求到MCP Fetch: {url}")
@@ -315,7 +379,7 @@ def fetch_webpage(url, max_length=10000, start_index=0, raw=False):
         fetch_url = "http://127.0.0.1:8000/fetch/fetch"
         logger.info(f"请求URL: {fetch_url}")
         
-        response = requests.post(
+        response = await get_http_client().post(
             fetch_url,
             json=request_body,
             timeout=30
@@ -345,22 +409,19 @@ def fetch_webpage(url, max_length=10000, start_index=0, raw=False):
         logger.error(traceback.format_exc())
         return {"error": str(e)}
 
-def query_guiji_model(prompt):
+async def query_guiji_model(prompt):
     """调用OpenRouter API获取回答"""
     try:
         logger.info(f"提示词长度: {len(prompt)}")
         
-        # 创建OpenAI客户端以连接OpenRouter
-        client = OpenAI(
-            base_url=OPENROUTER_API_URL,
-            api_key=OPENROUTER_API_KEY,
-        )
+        # 复用连接OpenRouter的OpenAI客户端
+        client = get_model_client()
         
         # 调用OpenRouter API
         logger.info("发送请求到OpenRouter API")
         
         
-        completion = client.chat.completions.create(
+        completion = await client.chat.completions.create(
             model=OPENROUTER_MODEL,
             messages=[
                 {"role": "user", "content": prompt}
@@ -381,7 +442,7 @@ def query_guiji_model(prompt):
         logger.error(traceback.format_exc())
         return f"抱歉，调用模型时出错: {str(e)}"
 
-def fetch_time():
+async def fetch_time():
     """使用MCP Time获取时间信息"""
     try:
         logger.info("发送请求到MCP Time服务")
@@ -404,7 +465,7 @@ def fetch_time():
         for endpoint in time_endpoints:
             try:
                 logger.info(f"尝试时间端点: {endpoint}")
-                response = requests.post(
+                response = await get_http_client().post(
                     endpoint,
                     json=request_body,
                     timeout=10
@@ -434,7 +495,7 @@ def fetch_time():
         logger.error(traceback.format_exc())
         return {"error": str(e)}
 
-def list_directory(path):
+async def list_directory(path):
     """列出指定目录的内容"""
     try:
         logger.info(f"列出目录: {path}")
@@ -453,7 +514,7 @@ def list_directory(path):
         for endpoint in endpoints:
             try:
                 logger.info(f"尝试端点: {endpoint}")
-                response = requests.post(
+                response = await get_http_client().post(
                     endpoint,
                     json=request_body,
                     timeout=10
@@ -471,7 +532,32 @@ def list_directory(path):
         logger.error(f"列目录异常: {str(e)}")
         return {"error": str(e)}
 
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/history", get_history, methods=["GET"]),
+        Route("/api/clear", clear_history, methods=["POST"]),
+        Route("/api/time", get_time, methods=["GET"]),
+        Route("/api/files/list", api_list_directory, methods=["POST"]),
+        Route("/api/files/read", api_read_file, methods=["POST"]),
+        Route("/api/files/write", api_write_file, methods=["POST"]),
+        Route("/api/files/search", api_search_files, methods=["POST"]),
+        Route("/api/files/info", api_get_file_info, methods=["POST"]),
+        Route("/filesystem", filesystem),
+        Mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static"),
+    ],
+    middleware=[Middleware(SessionMiddleware, secret_key=SECRET_KEY)],
+    lifespan=lifespan,
+)
+
 if __name__ == "__main__":
+    import uvicorn
     logger.info("启动Web应用...")
     logger.info("请确保已启动MCPO服务，使用命令: mcpo --config mcp.json --port 8000")
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    logger.info("高并发部署可使用多个worker: uvicorn app:app --port 5000 --workers 4")
+    if os.getenv("APP_RELOAD"):
+        # 开发时自动重载：uvicorn需要以导入字符串的形式加载应用
+        uvicorn.run("app:app", app_dir=BASE_DIR, port=5000, reload=True)
+    else:
+        uvicorn.run(app, port=5000)
\ No newline at end of file
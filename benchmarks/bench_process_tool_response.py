@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of tool response encoding.
+
+Compares the original path (process_tool_response, then FastAPI's
+jsonable_encoder and the standard-library JSONResponse) with
+encode_tool_response, which passes text that is already JSON straight through.
+
+    python benchmarks/bench_process_tool_response.py
+"""
+
+import base64
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from mcp import types
+
+from mcpo.main import encode_tool_response, process_tool_response
+from mcpo.utils.fastjson import orjson
+
+
+def make_result(*contents) -> types.CallToolResult:
+    return types.CallToolResult(content=list(contents))
+
+
+def text(value: str) -> types.TextContent:
+    return types.TextContent(type="text", text=value)
+
+
+def payloads():
+    records = [
+        {"id": i, "name": f"file-{i}.txt", "size": i * 1024, "tags": ["a", "b"]}
+        for i in range(20_000)
+    ]
+    yield "small json", make_result(text(json.dumps({"ok": True, "n": 1})))
+    yield "large json (~1.5MB)", make_result(text(json.dumps(records)))
+    yield "large markdown (~1MB)", make_result(text("# Title\n\nlorem ipsum " * 50_000))
+    yield "image (~750KB)", make_result(
+        types.ImageContent(
+            type="image",
+            mimeType="image/png",
+            data=base64.b64encode(b"\x89PNG" + b"\0" * 550_000).decode(),
+        )
+    )
+
+
+def old_path(result):
+    return JSONResponse(jsonable_encoder(process_tool_response(result))).body
+
+
+def new_path(result):
+    return encode_tool_response(result)
+
+
+def main(repeat: int = 5):
+    print(f"orjson: {'yes' if orjson else 'no'}")
+    print(f"{'payload':<24}{'old (ms)':>12}{'new (ms)':>12}{'speedup':>10}")
+    for name, result in payloads():
+        assert json.loads(old_path(result)) == json.loads(new_path(result)), name
+        number = max(1, 200 // max(1, len(new_path(result)) // 100_000))
+        old = min(timeit.repeat(lambda: old_path(result), number=number, repeat=repeat))
+        new = min(timeit.repeat(lambda: new_path(result), number=number, repeat=repeat))
+        old_ms, new_ms = old / number * 1000, new / number * 1000
+        print(f"{name:<24}{old_ms:>12.3f}{new_ms:>12.3f}{old_ms / new_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Load test of the mcpo proxy against the local stub MCP server.
+
+Starts mcpo.main.run in a child process, in single-command mode (one stub
+server) and/or --config mode (several stub servers mounted side by side), then
+runs a concurrency sweep over HTTP and reports latency percentiles, throughput
+and the resident memory of mcpo plus its MCP servers. Everything runs on
+localhost, so it needs no network access.
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --mode config --servers 4 --tool image \\
+        --payload-size 262144 --concurrency 1,8,32 --requests 400
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from mcpo.utils.process import tree_rss
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_server.py")
+TOOLS = {"text": "text", "json": "json_text", "image": "image"}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def stub_command(options) -> list:
+    return [
+        sys.executable,
+        STUB,
+        "--latency",
+        str(options.latency),
+        "--payload-size",
+        str(options.payload_size),
+    ]
+
+
+def serve(port: int, run_kwargs: dict):
+    from mcpo.main import run
+
+    # Keep mcpo's and the servers' logs out of the report
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    asyncio.run(run("127.0.0.1", port, **run_kwargs))
+
+
+def start_proxy(mode: str, options, config_dir: str):
+    port = free_port()
+    run_kwargs = {"pool_size": options.pool_size}
+    if mode == "single":
+        run_kwargs["server_command"] = stub_command(options)
+        prefixes = [""]
+    else:
+        command = stub_command(options)
+        servers = {
+            f"s{i}": {"command": command[0], "args": command[1:]}
+            for i in range(options.servers)
+        }
+        config_path = os.path.join(config_dir, "bench-config.json")
+        with open(config_path, "w") as f:
+            json.dump({"mcpServers": servers}, f)
+        run_kwargs["config"] = config_path
+        prefixes = [f"/{name}" for name in servers]
+
+    process = multiprocessing.Process(
+        target=serve, args=(port, run_kwargs), daemon=True
+    )
+    process.start()
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/docs", timeout=1).status_code == 200:
+                return process, base_url, prefixes
+        except httpx.TransportError:
+            pass
+        if not process.is_alive():
+            break
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"mcpo did not start in {mode} mode")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank percentile
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, rank - 1)]
+
+
+async def sweep_step(base_url, prefixes, tool, concurrency, total, body):
+    latencies = []
+    errors = 0
+    next_request = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+
+        async def worker():
+            nonlocal errors
+            for i in next_request:
+                path = f"{prefixes[i % len(prefixes)]}/{tool}"
+                start_time = time.perf_counter()
+                response = await client.post(path, json=body)
+                latencies.append(time.perf_counter() - start_time)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "throughput": total / elapsed,
+    }
+
+
+def run_mode(mode: str, options) -> list:
+    tool = TOOLS[options.tool]
+    with tempfile.TemporaryDirectory() as config_dir:
+        process, base_url, prefixes = start_proxy(mode, options, config_dir)
+        try:
+            # Warm up every server so spawn and first-call costs aren't measured
+            asyncio.run(sweep_step(base_url, prefixes, tool, 1, len(prefixes) * 2, {}))
+            results = []
+            for concurrency in options.concurrency:
+                result = asyncio.run(
+                    sweep_step(
+                        base_url, prefixes, tool, concurrency, options.requests, {}
+                    )
+                )
+                rss = tree_rss(process.pid)
+                result["rss_mb"] = rss / 1024 / 1024 if rss is not None else None
+                result["mode"] = mode
+                results.append(result)
+                print_row(result)
+            return results
+        finally:
+            process.terminate()
+            process.join(10)
+
+
+def print_header():
+    print(
+        f"{'mode':<8}{'conc':>6}{'reqs':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'req/s':>9}{'rss MB':>9}"
+    )
+
+
+def print_row(result):
+    rss = f"{result['rss_mb']:.1f}" if result["rss_mb"] is not None else "n/a"
+    print(
+        f"{result['mode']:<8}{result['concurrency']:>6}{result['requests']:>7}"
+        f"{result['errors']:>5}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+        f"{result['p99_ms']:>9.2f}{result['throughput']:>9.1f}{rss:>9}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--mode", choices=("single", "config", "both"), default="both")
+    parser.add_argument("--servers", type=int, default=3, help="Servers in config mode")
+    parser.add_argument("--pool-size", type=int, default=1)
+    parser.add_argument("--tool", choices=tuple(TOOLS), default="json")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--payload-size", type=int, default=4096)
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(c) for c in value.split(",")],
+        default=[1, 4, 16, 64],
+    )
+    parser.add_argument("--requests", type=int, default=500, help="Requests per step")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    options = parser.parse_args()
+
+    print(
+        f"tool={options.tool} payload={options.payload_size}B "
+        f"latency={options.latency}s pool={options.pool_size}"
+    )
+    print_header()
+    modes = ("single", "config") if options.mode == "both" else (options.mode,)
+    results = [result for mode in modes for result in run_mode(mode, options)]
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump({"options": vars(options), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
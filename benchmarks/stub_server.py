@@ -0,0 +1,66 @@
+"""
+Stub MCP server for benchmarking mcpo without network access.
+
+Each tool sleeps for the configured latency and returns a payload of about the
+requested size: plain text, JSON text or a PNG image. Defaults can be set on
+the command line and overridden per call.
+
+    python benchmarks/stub_server.py --latency 0.01 --payload-size 4096
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+
+from mcp.server.fastmcp import FastMCP
+from mcp.types import ImageContent
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--latency", type=float, default=0.0, help="Seconds per call")
+parser.add_argument("--payload-size", type=int, default=1024, help="Bytes per reply")
+options = parser.parse_args()
+
+mcp = FastMCP("bench-stub")
+
+
+def _resolve(latency, size):
+    return (
+        options.latency if latency is None else latency,
+        options.payload_size if size is None else size,
+    )
+
+
+@mcp.tool()
+async def text(latency: float = None, size: int = None) -> str:
+    """Return plain text of about `size` bytes."""
+    latency, size = _resolve(latency, size)
+    await asyncio.sleep(latency)
+    return ("lorem ipsum " * (size // 12 + 1))[:size]
+
+
+@mcp.tool()
+async def json_text(latency: float = None, size: int = None) -> str:
+    """Return a JSON document of about `size` bytes as text."""
+    latency, size = _resolve(latency, size)
+    await asyncio.sleep(latency)
+    record = {"id": 0, "name": "file-0000.txt", "size": 1024, "tags": ["a", "b"]}
+    count = max(1, size // len(json.dumps(record)))
+    return json.dumps(
+        [{**record, "id": i, "name": f"file-{i:04}.txt"} for i in range(count)]
+    )
+
+
+@mcp.tool()
+async def image(latency: float = None, size: int = None) -> ImageContent:
+    """Return a PNG image whose base64 data is about `size` bytes."""
+    latency, size = _resolve(latency, size)
+    await asyncio.sleep(latency)
+    raw = b"\x89PNG\r\n\x1a\n" + b"\0" * max(0, size * 3 // 4 - 8)
+    return ImageContent(
+        type="image", mimeType="image/png", data=base64.b64encode(raw).decode()
+    )
+
+
+if __name__ == "__main__":
+    mcp.run()
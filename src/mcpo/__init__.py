@@ -26,6 +26,34 @@ def main(
         Optional[str],
         typer.Option("--api-key", "-k", help="API key for authentication"),
     ] = None,
+    api_keys: Annotated[
+        Optional[str],
+        typer.Option("--api-keys", help="JSON file of API keys with their rate limits"),
+    ] = None,
+    jwt_secret: Annotated[
+        Optional[str],
+        typer.Option("--jwt-secret", help="Accept JWTs signed with this secret"),
+    ] = None,
+    jwt_public_key: Annotated[
+        Optional[str],
+        typer.Option(
+            "--jwt-public-key", help="Accept JWTs signed for this PEM public key"
+        ),
+    ] = None,
+    jwt_algorithm: Annotated[
+        Optional[str],
+        typer.Option(
+            "--jwt-algorithm", help="JWT algorithm (default HS256, or RS256 with a key)"
+        ),
+    ] = None,
+    jwt_audience: Annotated[
+        Optional[str],
+        typer.Option("--jwt-audience", help="Required JWT audience"),
+    ] = None,
+    jwt_issuer: Annotated[
+        Optional[str],
+        typer.Option("--jwt-issuer", help="Required JWT issuer"),
+    ] = None,
     env: Annotated[
         Optional[List[str]], typer.Option("--env", "-e", help="Environment variables")
     ] = None,
@@ -50,6 +78,131 @@ def main(
     path_prefix: Annotated[
         Optional[str], typer.Option("--path-prefix", help="URL prefix")
     ] = None,
+    server_type: Annotated[
+        Optional[str],
+        typer.Option(
+            "--server-type",
+            help="stdio, sse or streamable-http; for the HTTP types pass the "
+            "server's URL after '--'",
+        ),
+    ] = "stdio",
+    header: Annotated[
+        Optional[List[str]],
+        typer.Option("--header", help="HTTP headers for a remote server"),
+    ] = None,
+    pool_size: Annotated[
+        Optional[int],
+        typer.Option("--pool-size", help="MCP server processes per server"),
+    ] = 1,
+    startup_timeout: Annotated[
+        Optional[float],
+        typer.Option("--startup-timeout", help="Per-server startup timeout (s)"),
+    ] = 60.0,
+    schema_cache: Annotated[
+        Optional[str],
+        typer.Option("--schema-cache", help="Directory for cached tool schemas"),
+    ] = None,
+    lazy_spawn: Annotated[
+        Optional[bool],
+        typer.Option(
+            "--lazy-spawn", help="With a cached schema, spawn servers on first call"
+        ),
+    ] = False,
+    max_concurrency: Annotated[
+        Optional[int],
+        typer.Option("--max-concurrency", help="Max in-flight calls per server"),
+    ] = None,
+    max_queue: Annotated[
+        Optional[int],
+        typer.Option("--max-queue", help="Max calls waiting for a free slot"),
+    ] = 0,
+    single_flight: Annotated[
+        Optional[bool],
+        typer.Option("--single-flight", help="Coalesce identical in-flight tool calls"),
+    ] = False,
+    max_jobs: Annotated[
+        Optional[int],
+        typer.Option("--max-jobs", help="Max background jobs kept per server"),
+    ] = 1000,
+    job_ttl: Annotated[
+        Optional[float],
+        typer.Option("--job-ttl", help="Seconds to keep finished job results"),
+    ] = 600,
+    batch_concurrency: Annotated[
+        Optional[int],
+        typer.Option("--batch-concurrency", help="Max parallel calls per /batch"),
+    ] = 8,
+    max_calls_per_process: Annotated[
+        Optional[int],
+        typer.Option(
+            "--max-calls-per-process",
+            help="Restart an MCP server process after this many calls",
+        ),
+    ] = None,
+    max_rss_mb: Annotated[
+        Optional[int],
+        typer.Option(
+            "--max-rss-mb",
+            help="Restart an MCP server process once it uses more memory (MB)",
+        ),
+    ] = None,
+    hot_reload: Annotated[
+        Optional[bool],
+        typer.Option(
+            "--hot-reload", help="Watch the config file and apply changes live"
+        ),
+    ] = False,
+    compress_min_size: Annotated[
+        Optional[int],
+        typer.Option(
+            "--compress-min-size", help="Compress responses from this size (bytes)"
+        ),
+    ] = 1024,
+    no_compress: Annotated[
+        Optional[bool],
+        typer.Option("--no-compress", help="Never compress responses"),
+    ] = False,
+    blob_store: Annotated[
+        Optional[str],
+        typer.Option(
+            "--blob-store",
+            help='Serve large images and resources as URLs: "memory" or a spill directory',
+        ),
+    ] = None,
+    blob_memory_mb: Annotated[
+        Optional[int],
+        typer.Option("--blob-memory-mb", help="Memory for stored blobs (MB)"),
+    ] = 64,
+    blob_disk_mb: Annotated[
+        Optional[int],
+        typer.Option("--blob-disk-mb", help="Disk space for spilled blobs (MB)"),
+    ] = 1024,
+    workers: Annotated[
+        Optional[int],
+        typer.Option("--workers", help="Worker processes serving the port"),
+    ] = 1,
+    eager_workers: Annotated[
+        Optional[bool],
+        typer.Option(
+            "--eager-workers",
+            help="Start every worker's MCP servers up front, not on first call",
+        ),
+    ] = False,
+    trace: Annotated[
+        Optional[bool],
+        typer.Option("--trace", help="Enable OpenTelemetry tracing"),
+    ] = False,
+    trace_exporter: Annotated[
+        Optional[str],
+        typer.Option(
+            "--trace-exporter",
+            help="Span exporter: otlp, console, file or memory (implies --trace)",
+        ),
+    ] = None,
+    trace_file: Annotated[
+        Optional[str],
+        typer.Option("--trace-file", help="JSON lines file for the file exporter"),
+    ] = None,
 ):
     server_command = None
     if not config:
@@ -77,9 +230,14 @@ def main(
     env_dict = {}
     if env:
         for var in env:
-            key, value = env.split("=", 1)
+            key, value = var.split("=", 1)
             env_dict[key] = value
 
+    headers = {}
+    for line in header or []:
+        key, value = line.split(":", 1)
+        headers[key.strip()] = value.strip()
+
     # Set environment variables
     for key, value in env_dict.items():
         os.environ[key] = value
@@ -101,6 +259,12 @@ def main(
             host,
             port,
             api_key=api_key,
+            api_keys=api_keys,
+            jwt_secret=jwt_secret,
+            jwt_public_key=jwt_public_key,
+            jwt_algorithm=jwt_algorithm,
+            jwt_audience=jwt_audience,
+            jwt_issuer=jwt_issuer,
             cors_allow_origins=cors_allow_origins,
             config=config,
             name=name,
@@ -110,6 +274,32 @@ def main(
             ssl_certfile=ssl_certfile,
             ssl_keyfile=ssl_keyfile,
             path_prefix=path_prefix,
+            server_type=server_type,
+            headers=headers,
+            pool_size=pool_size,
+            startup_timeout=startup_timeout,
+            schema_cache=schema_cache,
+            lazy_spawn=lazy_spawn,
+            env=env_dict,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            single_flight=single_flight,
+            max_jobs=max_jobs,
+            job_ttl=job_ttl,
+            batch_concurrency=batch_concurrency,
+            max_calls_per_process=max_calls_per_process,
+            max_rss_mb=max_rss_mb,
+            hot_reload=hot_reload,
+            compress_min_size=compress_min_size,
+            no_compress=no_compress,
+            blob_store=blob_store,
+            blob_memory_mb=blob_memory_mb,
+            blob_disk_mb=blob_disk_mb,
+            workers=workers,
+            eager_workers=eager_workers,
+            trace=trace,
+            trace_exporter=trace_exporter,
+            trace_file=trace_file,
         )
     )
 
@@ -1,19 +1,105 @@
+import asyncio
+import hashlib
 import json
+import logging
 import os
-from contextlib import AsyncExitStack, asynccontextmanager
-from typing import Dict, Any, Optional
+import signal
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
 
 import uvicorn
-from fastapi import FastAPI, Body, Depends
+from fastapi import (
+    APIRouter,
+    FastAPI,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from mcp import ClientSession, StdioServerParameters, types
-from mcp.client.stdio import stdio_client
+from fastapi.responses import PlainTextResponse
+from mcp import StdioServerParameters, types
 from mcp.types import CallToolResult
 
-from mcpo.utils.auth import get_verify_api_key
+from mcpo.utils.auth import (
+    JWTVerifier,
+    call_authorizer,
+    get_verify_api_key,
+    get_verify_api_keys,
+)
+from mcpo.utils.batch import BatchCall, run_batch
+from mcpo.utils.blobs import (
+    BLOB_PATH,
+    BlobStore,
+    blob_response,
+    encode_binary,
+    encode_resource,
+)
+from mcpo.utils.compression import (
+    DEFAULT_MIN_SIZE,
+    CompressionMiddleware,
+    compression_policy,
+)
+from mcpo.utils.fastjson import FastJSONResponse, RawJSONResponse, encode_text
+from mcpo.utils.instrumentation import (
+    instrument_call,
+    instrument_encode,
+    instrument_handler,
+)
+from mcpo.utils.jobs import JobStore
+from mcpo.utils.json_schema import compile_tool_model
+from mcpo.utils.limits import ConcurrencyLimiter, acquire_all
+from mcpo.utils.metrics import REGISTRY
+from mcpo.utils.openapi import (
+    install_openapi_routes,
+    merged_openapi_artifact,
+    reset_openapi,
+)
+from mcpo.utils.pool import SessionPool
+from mcpo.utils.ratelimit import (
+    MemoryStore,
+    RateLimiter,
+    ReleaseSlotsMiddleware,
+    detach_slots,
+)
+from mcpo.utils.reload import ConfigReloader, load_servers
+from mcpo.utils.result_cache import ResultCache, canonical_key
+from mcpo.utils.schema_cache import SchemaCache
+from mcpo.utils.singleflight import SingleFlight
+from mcpo.utils.startup import SubAppLifespan, start_all
+from mcpo.utils.streaming import (
+    sse_tool_response,
+    stream_mode,
+    stream_tool_response,
+)
+from mcpo.utils.tracing import (
+    TracingMiddleware,
+    configure_tracing,
+    shutdown_tracing,
+)
+from mcpo.utils.transports import HttpServerParameters, transport_type
+from mcpo.utils.workers import REFRESH_SIGNAL, WorkerSupervisor, notify_workers
 from pydantic import create_model
+from sse_starlette.sse import EventSourceResponse
 from starlette.routing import Mount
 
+logger = logging.getLogger(__name__)
+
+JOB_DESCRIPTION = (
+    "Starts the tool call in the background and returns a job id right away. "
+    "Poll `GET /jobs/{id}`, fetch `GET /jobs/{id}/result` or cancel with "
+    "`DELETE /jobs/{id}`."
+)
+
+STREAM_DESCRIPTION = (
+    "Streams `progress` events while the tool runs, then a final `result` or "
+    "`error` event. The server's `log` events are included while no other call "
+    "is running on the same server process."
+)
+
 
 def get_python_type(param_type: str):
     if param_type == "string":
@@ -33,6 +119,34 @@ def get_python_type(param_type: str):
     # Expand as needed. PRs welcome!
 
 
+def build_form_model(endpoint_name: str, schema: dict):
+    """The tool's request model, or None for tools without parameters."""
+    try:
+        return compile_tool_model(endpoint_name, schema)
+    except Exception as e:
+        logger.warning(
+            f"Could not compile the schema of {endpoint_name!r}, "
+            f"falling back to loose validation: {e!r}"
+        )
+
+    model_fields = {}
+    required_fields = schema.get("required", [])
+    properties = schema.get("properties", {})
+
+    for param_name, param_schema in properties.items():
+        param_type = param_schema.get("type", "string")
+        param_desc = param_schema.get("description", "")
+        python_type = get_python_type(param_type)
+        default_value = ... if param_name in required_fields else None
+        model_fields[param_name] = (
+            python_type,
+            Body(default_value, description=param_desc),
+        )
+    if not model_fields:
+        return None
+    return create_model(f"{endpoint_name}_form_model", **model_fields)
+
+
 def process_tool_response(result: CallToolResult) -> list:
     """Universal response processor for all tool endpoints"""
     response = []
@@ -49,18 +163,97 @@ def process_tool_response(result: CallToolResult) -> list:
             image_data = f"data:{content.mimeType};base64,{content.data}"
             response.append(image_data)
         elif isinstance(content, types.EmbeddedResource):
-            # TODO: Handle embedded resources
-            response.append("Embedded resource not supported yet.")
+            resource = content.resource
+            if isinstance(resource, types.TextResourceContents):
+                response.append(resource.text)
+            else:
+                mime_type = resource.mimeType or "application/octet-stream"
+                response.append(f"data:{mime_type};base64,{resource.blob}")
     return response
 
 
-async def create_dynamic_endpoints(app: FastAPI, api_dependency=None):
-    session = app.state.session
-    if not session:
-        raise ValueError("Session is not initialized in the app state.")
+def encode_tool_response(
+    result: CallToolResult, blobs: Optional[BlobStore] = None
+) -> bytes:
+    """
+    Encodes the same JSON as process_tool_response, but text that is already
+    valid JSON is passed through as raw bytes instead of being decoded and
+    encoded again. With a blob store, large images and embedded resources are
+    returned as URLs of their raw bytes instead of inline.
+    """
+    parts = []
+    for content in result.content:
+        if isinstance(content, types.TextContent):
+            parts.append(encode_text(content.text))
+        elif isinstance(content, types.ImageContent):
+            parts.append(encode_binary(content.data, content.mimeType, blobs))
+        elif isinstance(content, types.EmbeddedResource):
+            parts.append(encode_resource(content.resource, blobs))
+    return b"[" + b",".join(parts) + b"]"
 
-    result = await session.initialize()
-    server_info = getattr(result, "serverInfo", None)
+
+def make_tool_caller(
+    session: SessionPool, endpoint_name: str, limiters=(), labels=None
+):
+    limiters = tuple(limiter for limiter in limiters if limiter is not None)
+    session_call = session.call_tool
+    if labels:
+        session_call = instrument_call(session_call, labels)
+
+    async def call_tool(args: dict, on_event=None) -> CallToolResult:
+        if not limiters:
+            return await session_call(endpoint_name, arguments=args, on_event=on_event)
+        async with acquire_all(*limiters):
+            return await session_call(endpoint_name, arguments=args, on_event=on_event)
+
+    return call_tool
+
+
+def make_tool_runner(
+    call_tool,
+    result_cache: Optional[ResultCache] = None,
+    single_flight: Optional[SingleFlight] = None,
+    encode=encode_tool_response,
+    compress_min_size: Optional[int] = DEFAULT_MIN_SIZE,
+    blobs: Optional[BlobStore] = None,
+):
+    async def call(args: dict):
+        result = await call_tool(args)
+        body = encode(result)
+        return body, len(body), not result.isError
+
+    async def execute(args: dict) -> Tuple[bytes, Dict[str, str]]:
+        headers = {}
+        if result_cache is not None:
+            body, cache_status, age = await result_cache.get_or_call(
+                canonical_key(args), lambda: call(args)
+            )
+            headers["X-Cache"] = cache_status
+            headers["Age"] = str(int(age))
+        elif single_flight is not None:
+            (body, _, _), shared = await single_flight.do(
+                canonical_key(args), lambda: call(args)
+            )
+            if shared:
+                headers["X-Coalesced"] = "true"
+        else:
+            body, _, _ = await call(args)
+        return body, headers
+
+    async def run_tool(args: dict, request: Request):
+        request.state.compress_min_size = compress_min_size
+        mode = stream_mode(request)
+        if mode:
+            # Streamed responses bypass the result cache and coalescing
+            return stream_tool_response(await call_tool(args), mode, blobs)
+
+        body, headers = await execute(args)
+        return RawJSONResponse(body, headers=headers)
+
+    return run_tool, execute
+
+
+def apply_server_info(app: FastAPI, server_info):
     if server_info:
         app.title = server_info.name or app.title
         app.description = (
@@ -68,63 +261,341 @@ async def create_dynamic_endpoints(app: FastAPI, api_dependency=None):
         )
         app.version = server_info.version or app.version
 
-    tools_result = await session.list_tools()
-    tools = tools_result.tools
+
+def register_job_endpoints(app: FastAPI, jobs: JobStore, api_dependency=None):
+    dependencies = [Depends(api_dependency)] if api_dependency else []
+
+    @app.get(
+        "/jobs/{job_id}",
+        name="get_job",
+        summary="Job Status",
+        dependencies=dependencies,
+    )
+    async def get_job(job_id: str):
+        return jobs.get(job_id).to_dict()
+
+    @app.get("/jobs/{job_id}/result", summary="Job Result", dependencies=dependencies)
+    async def get_job_result(job_id: str):
+        job = jobs.get(job_id)
+        if not job.done:
+            return FastJSONResponse(job.to_dict(), status_code=status.HTTP_202_ACCEPTED)
+        if job.status == "cancelled":
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE, detail="Job cancelled"
+            )
+        if job.result is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=job.error
+            )
+        return RawJSONResponse(job.result)
+
+    @app.delete("/jobs/{job_id}", summary="Cancel Job", dependencies=dependencies)
+    async def cancel_job(job_id: str):
+        return (await jobs.cancel(job_id)).to_dict()
+
+
+def register_tool_endpoints(
+    app: FastAPI, tools: list, api_dependency=None
+) -> Dict[str, List[str]]:
+    """
+    Registers the routes of every tool, or updates them for a new tool list:
+    only new and changed tools are rebuilt, and the app's routes are swapped in
+    one assignment. Returns the names of the added, changed and removed tools.
+    """
+    session = app.state.session
+
+    # name -> (tool schema, routes, executor) of the previous registration
+    registered = getattr(app.state, "tool_registry", {})
+    registry = {}
+    changes = {"added": [], "changed": [], "removed": []}
+    router = APIRouter(
+        default_response_class=app.router.default_response_class,
+        dependency_overrides_provider=app,
+    )
+
+    server_name = getattr(app.state, "server_name", app.title)
+    session.name = server_name
+    limits = getattr(app.state, "limits", None) or {}
+    if not hasattr(app.state, "server_limiter"):
+        app.state.server_limiter = ConcurrencyLimiter.from_config(
+            limits, server=server_name
+        )
+        app.state.tool_limiters = {}
+        app.state.result_caches = {}
+    server_limiter = app.state.server_limiter
+    tool_limiters = app.state.tool_limiters
+    result_caches = app.state.result_caches
+    cache_config = getattr(app.state, "cache_config", None) or {}
+    single_flight = getattr(app.state, "single_flight", False)
+    compression = getattr(app.state, "compression", None)
+    compress_min_size = getattr(app.state, "compress_min_size", DEFAULT_MIN_SIZE)
+    blobs = getattr(app.state, "blob_store", None)
+    encode_result = (
+        partial(encode_tool_response, blobs=blobs) if blobs else encode_tool_response
+    )
+
+    if not hasattr(app.state, "jobs"):
+        job_dir = getattr(app.state, "job_dir", None)
+        app.state.jobs = JobStore(
+            max_jobs=getattr(app.state, "max_jobs", 1000),
+            ttl=getattr(app.state, "job_ttl", 600),
+            # Workers share a directory with one subdirectory per server
+            directory=(
+                os.path.join(
+                    job_dir,
+                    hashlib.sha256(
+                        getattr(app.state, "server_name", "").encode()
+                    ).hexdigest()[:16],
+                )
+                if job_dir
+                else None
+            ),
+        )
+        register_job_endpoints(app, app.state.jobs, api_dependency=api_dependency)
+    jobs = app.state.jobs
+
+    def coalesce(endpoint_name: str) -> bool:
+        # True for every tool of the server, or a list of tool names
+        if isinstance(single_flight, list):
+            return endpoint_name in single_flight
+        return bool(single_flight)
 
     for tool in tools:
         endpoint_name = tool.name
         endpoint_description = tool.description
         schema = tool.inputSchema
 
-        model_fields = {}
-        required_fields = schema.get("required", [])
-        properties = schema.get("properties", {})
+        signature = tool.model_dump(mode="json")
+        previous = registered.get(endpoint_name)
+        if previous and previous[0] == signature:
+            registry[endpoint_name] = previous
+            continue
+        changes["changed" if previous else "added"].append(endpoint_name)
+        first_route = len(router.routes)
+
+        FormModel = build_form_model(endpoint_name, schema)
+
+        if endpoint_name not in tool_limiters:
+            tool_limiters[endpoint_name] = ConcurrencyLimiter.from_config(
+                limits.get("tools", {}).get(endpoint_name, {}),
+                server=server_name,
+                tool=endpoint_name,
+            )
+        labels = {"server": server_name, "tool": endpoint_name}
+        encode = instrument_encode(encode_result, labels)
+        call_tool = make_tool_caller(
+            session,
+            endpoint_name,
+            (tool_limiters[endpoint_name], server_limiter),
+            labels=labels,
+        )
+        # Results of a changed tool may no longer be what it returns
+        result_caches[endpoint_name] = ResultCache.from_config(
+            cache_config.get(endpoint_name)
+        )
+        run_tool, execute = make_tool_runner(
+            call_tool,
+            result_caches[endpoint_name],
+            SingleFlight() if coalesce(endpoint_name) else None,
+            encode=encode,
+            compress_min_size=compression_policy(
+                compression, endpoint_name, compress_min_size
+            ),
+            blobs=blobs,
+        )
+
+        async def stream_tool(
+            args: dict, request: Request, call_tool=call_tool, encode=encode
+        ):
+            return sse_tool_response(call_tool, args, encode)
 
-        for param_name, param_schema in properties.items():
-            param_type = param_schema.get("type", "string")
-            param_desc = param_schema.get("description", "")
-            python_type = get_python_type(param_type)
-            default_value = ... if param_name in required_fields else None
-            model_fields[param_name] = (
-                python_type,
-                Body(default_value, description=param_desc),
+        async def submit_job(
+            args: dict,
+            request: Request,
+            call_tool=call_tool,
+            encode=encode,
+            name=endpoint_name,
+            labels=labels,
+        ):
+            # The job holds the caller's concurrency slots until it finishes
+            release_slots = detach_slots(request)
+
+            async def run():
+                try:
+                    result = await call_tool(args)
+                    return encode(result), result.isError
+                finally:
+                    await release_slots()
+
+            try:
+                # Timed while the job runs rather than while it is submitted
+                job = jobs.submit(name, instrument_handler(run, labels))
+            except Exception:
+                await release_slots()
+                raise
+            return FastJSONResponse(
+                job.to_dict(),
+                status_code=status.HTTP_202_ACCEPTED,
+                headers={"Location": str(request.url_for("get_job", job_id=job.id))},
             )
 
-        if model_fields:
-            FormModel = create_model(f"{endpoint_name}_form_model", **model_fields)
+        run_tool = instrument_handler(run_tool, labels)
+        stream_tool = instrument_handler(stream_tool, labels)
+        execute = instrument_handler(execute, labels)
+
+        if FormModel:
 
             def make_endpoint_func(
-                endpoint_name: str, FormModel, session: ClientSession
+                endpoint_name: str, FormModel, handle
             ):  # Parameterized endpoint
-                async def tool(form_data: FormModel):
-                    args = form_data.model_dump(exclude_none=True)
-                    result = await session.call_tool(endpoint_name, arguments=args)
-                    return process_tool_response(result)
+                async def tool(form_data: FormModel, request: Request):
+                    args = form_data.model_dump(exclude_none=True, by_alias=True)
+                    return await handle(args, request)
 
                 return tool
 
-            tool_handler = make_endpoint_func(endpoint_name, FormModel, session)
+            tool_handler = make_endpoint_func(endpoint_name, FormModel, run_tool)
+            stream_handler = make_endpoint_func(endpoint_name, FormModel, stream_tool)
+            job_handler = make_endpoint_func(endpoint_name, FormModel, submit_job)
+            executor = (FormModel, execute)
         else:
 
             def make_endpoint_func_no_args(
-                endpoint_name: str, session: ClientSession
+                endpoint_name: str, handle
             ):  # Parameterless endpoint
-                async def tool():  # No parameters
-                    result = await session.call_tool(
-                        endpoint_name, arguments={}
-                    )  # Empty dict
-                    return process_tool_response(result)  # Same processor
+                async def tool(request: Request):  # No parameters
+                    return await handle({}, request)  # Empty dict
 
                 return tool
 
-            tool_handler = make_endpoint_func_no_args(endpoint_name, session)
+            tool_handler = make_endpoint_func_no_args(endpoint_name, run_tool)
+            stream_handler = make_endpoint_func_no_args(endpoint_name, stream_tool)
+            job_handler = make_endpoint_func_no_args(endpoint_name, submit_job)
+            executor = (None, execute)
 
-        app.post(
+        dependencies = [Depends(api_dependency)] if api_dependency else []
+        summary = endpoint_name.replace("_", " ").title()
+        router.post(
             f"/{endpoint_name}",
-            summary=endpoint_name.replace("_", " ").title(),
+            summary=summary,
             description=endpoint_description,
-            dependencies=[Depends(api_dependency)] if api_dependency else [],
+            dependencies=dependencies,
         )(tool_handler)
+        router.post(
+            f"/{endpoint_name}/stream",
+            summary=f"{summary} (Server-Sent Events)",
+            description=f"{endpoint_description or ''}\n\n{STREAM_DESCRIPTION}",
+            dependencies=dependencies,
+            response_class=EventSourceResponse,
+        )(stream_handler)
+        router.post(
+            f"/{endpoint_name}/jobs",
+            summary=f"{summary} (Background Job)",
+            description=f"{endpoint_description or ''}\n\n{JOB_DESCRIPTION}",
+            dependencies=dependencies,
+            status_code=status.HTTP_202_ACCEPTED,
+        )(job_handler)
+        registry[endpoint_name] = (signature, router.routes[first_route:], executor)
+
+    changes["removed"] = [name for name in registered if name not in registry]
+    for name in changes["removed"]:
+        tool_limiters.pop(name, None)
+        result_caches.pop(name, None)
+    if registered and not any(changes.values()):
+        return changes
+
+    stale = {id(route) for _, routes, _ in registered.values() for route in routes}
+    app.router.routes = [r for r in app.router.routes if id(r) not in stale] + [
+        route for _, routes, _ in registry.values() for route in routes
+    ]
+    app.state.tool_registry = registry
+    app.state.tool_executors = {
+        name: executor for name, (_, _, executor) in registry.items()
+    }
+    reset_openapi(app)
+    return changes
+
+
+async def create_dynamic_endpoints(app: FastAPI, api_dependency=None):
+    session = app.state.session
+    if not session:
+        raise ValueError("Session is not initialized in the app state.")
+
+    result = await session.initialize()
+    server_info = getattr(result, "serverInfo", None)
+    apply_server_info(app, server_info)
+
+    tools_result = await session.list_tools()
+    tools = tools_result.tools
+    register_tool_endpoints(app, tools, api_dependency=api_dependency)
+    return server_info, tools
+
+
+async def refresh_tools(app: FastAPI, api_dependency=None) -> Dict[str, List[str]]:
+    """Re-reads the server's tool list and rebuilds the routes that changed."""
+    session = app.state.session
+    tools = (await session.list_tools()).tools
+    changes = register_tool_endpoints(app, tools, api_dependency=api_dependency)
+    if any(changes.values()):
+        logger.info(
+            f"Tool list of {app.title!r} changed: "
+            + ", ".join(f"{kind} {names}" for kind, names in changes.items() if names)
+        )
+        schema_cache = getattr(app.state, "schema_cache", None)
+        if schema_cache:
+            result = await session.initialize()
+            schema_cache.save(app.state.schema_cache_key, result.serverInfo, tools)
+    return changes
+
+
+def schedule_tool_refresh(app: FastAPI, api_dependency=None):
+    """
+    Refreshes the tools in the background on tools/list_changed. Notifications
+    that arrive while a refresh runs (e.g. one from every pool member) lead to
+    a single follow-up refresh.
+    """
+    task = getattr(app.state, "tool_refresh_task", None)
+    if task is not None and not task.done():
+        app.state.tool_refresh_pending = True
+        return
+
+    async def refresh():
+        while True:
+            app.state.tool_refresh_pending = False
+            try:
+                await refresh_tools(app, api_dependency=api_dependency)
+            except Exception as e:
+                logger.warning(f"Could not refresh tools of {app.title!r}: {e!r}")
+            if not app.state.tool_refresh_pending:
+                return
+
+    app.state.tool_refresh_task = asyncio.create_task(refresh())
+
+
+async def refresh_schema_cache(app: FastAPI, api_dependency=None):
+    """Check cached tool schemas against the live server once it is running."""
+    session = app.state.session
+    try:
+        if getattr(app.state, "lazy_spawn", False):
+            await session.started.wait()
+        else:
+            await session.ensure_started()
+        await refresh_tools(app, api_dependency=api_dependency)
+    except Exception as e:
+        logger.warning(f"Could not verify schema cache for {app.title!r}: {e!r}")
+
+
+def find_server_app(main_app: FastAPI, server_name: Optional[str]) -> Optional[FastAPI]:
+    if not server_name and hasattr(main_app.state, "tool_executors"):
+        return main_app  # Single server mode
+    for route in main_app.routes:
+        if (
+            isinstance(route, Mount)
+            and isinstance(route.app, FastAPI)
+            and getattr(route.app.state, "server_name", None) == server_name
+        ):
+            return route.app
+    return None
 
 
 @asynccontextmanager
@@ -132,30 +603,93 @@ async def lifespan(app: FastAPI):
     command = getattr(app.state, "command", None)
     args = getattr(app.state, "args", [])
     env = getattr(app.state, "env", {})
+    url = getattr(app.state, "url", None)
+    pool_size = getattr(app.state, "pool_size", 1)
 
     api_dependency = getattr(app.state, "api_dependency", None)
 
-    if not command:
-        async with AsyncExitStack() as stack:
-            for route in app.routes:
-                if isinstance(route, Mount) and isinstance(route.app, FastAPI):
-                    await stack.enter_async_context(
-                        route.app.router.lifespan_context(route.app),  # noqa
-                    )
+    if not command and not url:
+        runners = [
+            SubAppLifespan(
+                getattr(route.app.state, "server_name", route.path),
+                route.app,
+                timeout=getattr(route.app.state, "startup_timeout", None),
+            )
+            for route in app.routes
+            if isinstance(route, Mount) and isinstance(route.app, FastAPI)
+        ]
+        started = await start_all(runners)
+        merged_openapi_artifact(app)
+        reloader = getattr(app.state, "reloader", None)
+        if reloader:
+            reloader.start(runners)
+        try:
             yield
+        finally:
+            if reloader:
+                await reloader.close()
+            else:
+                await asyncio.gather(*(runner.stop() for runner in started))
 
     else:
-        server_params = StdioServerParameters(
-            command=command,
-            args=args,
-            env={**env},
-        )
+        if url:
+            server_params = HttpServerParameters(
+                transport=app.state.transport,
+                url=url,
+                headers=getattr(app.state, "headers", {}),
+            )
+            # Headers may carry credentials; like env, they are only hashed
+            cache_args = (url, [server_params.transport], server_params.headers)
+        else:
+            server_params = StdioServerParameters(
+                command=command,
+                args=args,
+                env={**env},
+            )
+            cache_args = (command, args, getattr(app.state, "server_env", {}))
+
+        schema_cache = getattr(app.state, "schema_cache", None)
+        cache_key = SchemaCache.key(*cache_args) if schema_cache else None
+        cached = schema_cache.load(cache_key) if schema_cache else None
 
-        async with stdio_client(server_params) as (reader, writer):
-            async with ClientSession(reader, writer) as session:
-                app.state.session = session
-                await create_dynamic_endpoints(app, api_dependency=api_dependency)
-                yield
+        max_rss_mb = getattr(app.state, "max_rss_mb", None)
+        session = SessionPool(
+            server_params,
+            size=pool_size,
+            name=getattr(app.state, "server_name", app.title),
+            max_calls=getattr(app.state, "max_calls_per_process", None),
+            max_rss=max_rss_mb * 1024 * 1024 if max_rss_mb else None,
+        )
+        session.on_tools_changed = lambda: schedule_tool_refresh(app, api_dependency)
+        app.state.session = session
+        app.state.schema_cache_key = cache_key
+        refresh_task = None
+        try:
+            if cached:
+                # Serve routes from the cached schemas right away; the server
+                # itself is spawned in the background or on the first call.
+                server_info, tools = cached
+                apply_server_info(app, server_info)
+                register_tool_endpoints(app, tools, api_dependency=api_dependency)
+                refresh_task = asyncio.create_task(
+                    refresh_schema_cache(app, api_dependency)
+                )
+            else:
+                await session.start()
+                server_info, tools = await create_dynamic_endpoints(
+                    app, api_dependency=api_dependency
+                )
+                if schema_cache:
+                    schema_cache.save(cache_key, server_info, tools)
+            yield
+        finally:
+            for task in (refresh_task, getattr(app.state, "tool_refresh_task", None)):
+                if task:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+            if hasattr(app.state, "jobs"):
+                await app.state.jobs.close()
+            await session.close()
 
 
 async def run(
@@ -166,7 +700,28 @@ async def run(
     **kwargs,
 ):
     # Server API Key
-    api_dependency = get_verify_api_key(api_key) if api_key else None
+    api_keys = kwargs.get("api_keys")
+    jwt_verifier = JWTVerifier.from_options(
+        secret=kwargs.get("jwt_secret"),
+        public_key_file=kwargs.get("jwt_public_key"),
+        algorithm=kwargs.get("jwt_algorithm"),
+        audience=kwargs.get("jwt_audience"),
+        issuer=kwargs.get("jwt_issuer"),
+    )
+    rate_limiter = (
+        RateLimiter.from_file(api_keys, api_key=api_key) if api_keys else None
+    )
+    if api_keys or jwt_verifier:
+        api_dependency = get_verify_api_keys(
+            rate_limiter, jwt_verifier=jwt_verifier, api_key=api_key
+        )
+        # Scopes and limits apply to each call of a batch, not to the batch
+        batch_dependency = get_verify_api_keys(
+            rate_limiter, jwt_verifier=jwt_verifier, api_key=api_key, per_call=True
+        )
+    else:
+        api_dependency = get_verify_api_key(api_key) if api_key else None
+        batch_dependency = api_dependency
 
     # MCP Config
     config_path = kwargs.get("config")
@@ -179,6 +734,74 @@ async def run(
     ssl_certfile = kwargs.get("ssl_certfile")
     ssl_keyfile = kwargs.get("ssl_keyfile")
     path_prefix = kwargs.get("path_prefix") or "/"
+    pool_size = kwargs.get("pool_size") or 1
+    startup_timeout = kwargs.get("startup_timeout")
+    schema_cache_dir = kwargs.get("schema_cache")
+    lazy_spawn = kwargs.get("lazy_spawn") or False
+    schema_cache = SchemaCache(schema_cache_dir) if schema_cache_dir else None
+    single_flight = kwargs.get("single_flight") or False
+    max_jobs = kwargs.get("max_jobs") or 1000
+    batch_concurrency = kwargs.get("batch_concurrency") or 8
+    job_ttl = kwargs.get("job_ttl") or 600
+    max_calls_per_process = kwargs.get("max_calls_per_process")
+    max_rss_mb = kwargs.get("max_rss_mb")
+    compress_min_size = kwargs.get("compress_min_size", DEFAULT_MIN_SIZE)
+    blob_store_option = kwargs.get("blob_store")
+    job_dir = kwargs.get("job_dir")
+    default_limits = {
+        "maxConcurrent": kwargs.get("max_concurrency"),
+        "maxQueue": kwargs.get("max_queue") or 0,
+    }
+
+    logging.basicConfig(level=logging.INFO)
+
+    workers = kwargs.pop("workers", None) or 1
+    sockets = kwargs.pop("sockets", None)
+    ready = kwargs.pop("ready", None)
+    worker = kwargs.pop("worker", None)
+    if worker is not None:
+        # Each worker counts on its own; a scrape reaches any one of them
+        REGISTRY.const_labels["worker"] = str(worker)
+    if workers > 1:
+        if rate_limiter and isinstance(rate_limiter.store, MemoryStore):
+            logger.warning(
+                f"Rate limits and concurrency caps of --api-keys apply to each of "
+                f'the {workers} workers separately; set a shared "store" in '
+                f"{api_keys} to enforce them across workers"
+            )
+        supervisor = WorkerSupervisor(
+            dict(
+                kwargs,
+                host=host,
+                port=port,
+                api_key=api_key,
+                cors_allow_origins=cors_allow_origins,
+                schema_cache=schema_cache_dir,
+            ),
+            workers,
+            eager=kwargs.get("eager_workers") or False,
+        )
+        await supervisor.serve(
+            host, port, ssl_certfile=ssl_certfile, ssl_keyfile=ssl_keyfile
+        )
+        return
+
+    # Workers share the blob directory, so any of them can serve a blob URL
+    blob_store = (
+        BlobStore.from_option(
+            blob_store_option,
+            memory_mb=kwargs.get("blob_memory_mb"),
+            disk_mb=kwargs.get("blob_disk_mb"),
+            shared=sockets is not None,
+        )
+        if blob_store_option
+        else None
+    )
+
+    trace_exporter = kwargs.get("trace_exporter")
+    tracing = (kwargs.get("trace") or bool(trace_exporter)) and configure_tracing(
+        trace_exporter, kwargs.get("trace_file")
+    )
 
     main_app = FastAPI(
         title=name,
@@ -187,6 +810,7 @@ async def run(
         ssl_certfile=ssl_certfile,
         ssl_keyfile=ssl_keyfile,
         lifespan=lifespan,
+        default_response_class=FastJSONResponse,
     )
 
     main_app.add_middleware(
@@ -196,27 +820,178 @@ async def run(
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if not kwargs.get("no_compress"):
+        main_app.add_middleware(CompressionMiddleware, minimum_size=compress_min_size)
+    if tracing:
+        main_app.add_middleware(TracingMiddleware)
+    if rate_limiter:
+        main_app.add_middleware(ReleaseSlotsMiddleware, rate_limiter=rate_limiter)
+    install_openapi_routes(main_app, merged=True)
+
+    @main_app.get(
+        "/metrics",
+        include_in_schema=False,
+        dependencies=[Depends(api_dependency)] if api_dependency else [],
+    )
+    async def metrics():
+        return PlainTextResponse(
+            REGISTRY.render(), media_type="text/plain; version=0.0.4"
+        )
+
+    if blob_store:
+        # Blob ids are content hashes only ever handed out in tool results,
+        # so the URLs work without credentials, e.g. as an <img> source
+        @main_app.api_route(
+            f"{BLOB_PATH}/{{blob_id}}", methods=["GET", "HEAD"], include_in_schema=False
+        )
+        async def get_blob(blob_id: str, request: Request):
+            blob = blob_store.get(blob_id)
+            if blob is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Unknown or expired blob",
+                )
+            return blob_response(request, blob_id, blob)
+
+    @main_app.post(
+        "/batch",
+        summary="Batch Tool Calls",
+        description="Runs several tool calls concurrently and returns one result "
+        "(or error) per call, in request order.",
+        dependencies=[Depends(batch_dependency)] if batch_dependency else [],
+    )
+    async def batch(
+        calls: List[BatchCall],
+        request: Request,
+        concurrency: Optional[int] = Query(
+            None, ge=1, description="Max parallel calls"
+        ),
+    ):
+        limit = min(concurrency or batch_concurrency, batch_concurrency)
+        body = await run_batch(
+            calls,
+            lambda server: find_server_app(main_app, server),
+            limit,
+            authorize=call_authorizer(request, rate_limiter),
+        )
+        return RawJSONResponse(body)
+
+    @main_app.post(
+        "/admin/refresh",
+        summary="Refresh Tools",
+        description="Re-reads the tool list of one server (or all of them) and "
+        "rebuilds the routes of added, changed and removed tools.",
+        dependencies=[Depends(api_dependency)] if api_dependency else [],
+    )
+    async def admin_refresh(
+        server: Optional[str] = Query(None, description="Mounted server name"),
+    ):
+        results = await refresh_servers(server)
+        if sockets is not None:
+            # A signal can't say which server, so other workers refresh all
+            notify_workers(REFRESH_SIGNAL)
+        return results
+
+    async def refresh_servers(
+        server: Optional[str] = None, started_only: bool = False
+    ) -> Dict[str, Any]:
+        if server:
+            app = find_server_app(main_app, server)
+            if app is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Unknown server {server}",
+                )
+            apps = {server: app}
+        elif server_command:
+            apps = {main_app.title: main_app}
+        else:
+            apps = {
+                route.app.state.server_name: route.app
+                for route in main_app.routes
+                if isinstance(route, Mount) and isinstance(route.app, FastAPI)
+            }
+        apps = {
+            name: app
+            for name, app in apps.items()
+            if getattr(app.state, "session", None) is not None
+            and (not started_only or app.state.session.started.is_set())
+        }
+        results = await asyncio.gather(
+            *(refresh_tools(app, api_dependency) for app in apps.values()),
+            return_exceptions=True,
+        )
+        return {
+            name: (
+                {"error": str(result) or repr(result)}
+                if isinstance(result, Exception)
+                else result
+            )
+            for name, result in zip(apps, results)
+        }
+
+    @main_app.post(
+        "/admin/reload",
+        summary="Reload Config",
+        description="Re-reads the --config file: starts added servers, restarts "
+        "servers whose entry changed and drains removed ones.",
+        dependencies=[Depends(api_dependency)] if api_dependency else [],
+    )
+    async def admin_reload():
+        reloader = getattr(main_app.state, "reloader", None)
+        if reloader is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Reloading is only available with --config",
+            )
+        try:
+            changes = await reloader.reload()
+        except (OSError, ValueError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Could not load config: {e}",
+            )
+        if sockets is not None:
+            # The others reload on SIGHUP; this one then finds nothing to do
+            notify_workers(signal.SIGHUP)
+        return changes
 
     if server_command:
 
-        main_app.state.command = server_command[0]
-        main_app.state.args = server_command[1:]
-        main_app.state.env = os.environ.copy()
+        server_type = transport_type(kwargs.get("server_type"))
+        if server_type == "stdio":
+            main_app.state.command = server_command[0]
+            main_app.state.args = server_command[1:]
+            main_app.state.env = os.environ.copy()
+            main_app.state.server_env = kwargs.get("env") or {}
+        else:
+            main_app.state.transport = server_type
+            main_app.state.url = server_command[0]
+            main_app.state.headers = kwargs.get("headers") or {}
+        main_app.state.pool_size = pool_size
+        main_app.state.schema_cache = schema_cache
+        main_app.state.lazy_spawn = lazy_spawn
+        main_app.state.limits = default_limits
+        main_app.state.single_flight = single_flight
+        main_app.state.max_jobs = max_jobs
+        main_app.state.job_ttl = job_ttl
+        main_app.state.job_dir = job_dir
+        main_app.state.max_calls_per_process = max_calls_per_process
+        main_app.state.max_rss_mb = max_rss_mb
+        main_app.state.compress_min_size = compress_min_size
+        main_app.state.blob_store = blob_store
 
         main_app.state.api_dependency = api_dependency
     elif config_path:
-        with open(config_path, "r") as f:
-            config_data = json.load(f)
-        mcp_servers = config_data.get("mcpServers", {})
-        if not mcp_servers:
-            raise ValueError("No 'mcpServers' found in config file.")
-        main_app.description += "\n\n- **available tools**："
-        for server_name, server_cfg in mcp_servers.items():
+        mcp_servers = load_servers(config_path)
+
+        def create_server_app(server_name: str, server_cfg: Dict[str, Any]):
             sub_app = FastAPI(
                 title=f"{server_name}",
                 description=f"{server_name} MCP Server\n\n- [back to tool list](http://{host}:{port}/docs)",
                 version="1.0",
                 lifespan=lifespan,
+                default_response_class=FastJSONResponse,
             )
 
             sub_app.add_middleware(
@@ -227,15 +1002,67 @@ async def run(
                 allow_headers=["*"],
             )
 
-            sub_app.state.command = server_cfg["command"]
-            sub_app.state.args = server_cfg.get("args", [])
-            sub_app.state.env = {**os.environ, **server_cfg.get("env", {})}
+            install_openapi_routes(sub_app)
+
+            sub_app.state.server_config = server_cfg
+            server_type = transport_type(server_cfg.get("type"), server_cfg.get("url"))
+            if server_type == "stdio":
+                sub_app.state.command = server_cfg["command"]
+                sub_app.state.args = server_cfg.get("args", [])
+                sub_app.state.env = {**os.environ, **server_cfg.get("env", {})}
+                sub_app.state.server_env = server_cfg.get("env", {})
+            else:
+                sub_app.state.transport = server_type
+                sub_app.state.url = server_cfg["url"]
+                sub_app.state.headers = server_cfg.get("headers", {})
+            sub_app.state.pool_size = server_cfg.get("poolSize", pool_size)
+            sub_app.state.schema_cache = schema_cache
+            sub_app.state.lazy_spawn = server_cfg.get("lazySpawn", lazy_spawn)
+            sub_app.state.server_name = server_name
+            sub_app.state.limits = {**default_limits, **server_cfg.get("limits", {})}
+            sub_app.state.cache_config = server_cfg.get("cache", {})
+            sub_app.state.single_flight = server_cfg.get("singleFlight", single_flight)
+            sub_app.state.max_jobs = max_jobs
+            sub_app.state.job_ttl = job_ttl
+            sub_app.state.job_dir = job_dir
+            sub_app.state.max_calls_per_process = server_cfg.get(
+                "maxCallsPerProcess", max_calls_per_process
+            )
+            sub_app.state.max_rss_mb = server_cfg.get("maxRssMb", max_rss_mb)
+            sub_app.state.compression = server_cfg.get("compression")
+            sub_app.state.compress_min_size = compress_min_size
+            sub_app.state.blob_store = blob_store
+            sub_app.state.startup_timeout = server_cfg.get(
+                "startupTimeout", startup_timeout
+            )
 
             sub_app.state.api_dependency = api_dependency
-            main_app.mount(f"{path_prefix}{server_name}", sub_app)
-            main_app.description += (
-                f"\n    - [{server_name}](http://{host}:{port}/{server_name}/docs)"
+            return sub_app
+
+        base_description = main_app.description
+
+        def describe_servers(server_names: List[str]):
+            main_app.description = base_description + "\n\n- **available tools**："
+            for server_name in server_names:
+                main_app.description += (
+                    f"\n    - [{server_name}](http://{host}:{port}/{server_name}/docs)"
+                )
+
+        for server_name, server_cfg in mcp_servers.items():
+            main_app.mount(
+                f"{path_prefix}{server_name}",
+                create_server_app(server_name, server_cfg),
             )
+        describe_servers(list(mcp_servers))
+
+        main_app.state.reloader = ConfigReloader(
+            main_app,
+            config_path,
+            create_server_app,
+            path_prefix=path_prefix,
+            on_reload=describe_servers,
+            watch=kwargs.get("hot_reload") or False,
+        )
     else:
         raise ValueError("You must provide either server_command or config.")
 
@@ -249,4 +1076,29 @@ async def run(
     )
     server = uvicorn.Server(config)
 
-    await server.serve()
+    if sockets is not None and REFRESH_SIGNAL is not None:
+        refresh_tasks = set()
+
+        def on_refresh_signal():
+            # Lazily spawned servers read their tools once they start anyway
+            task = asyncio.create_task(refresh_servers(started_only=True))
+            refresh_tasks.add(task)
+            task.add_done_callback(refresh_tasks.discard)
+
+        asyncio.get_running_loop().add_signal_handler(REFRESH_SIGNAL, on_refresh_signal)
+
+    if ready is not None:
+        # Tell the worker supervisor once startup has completed
+        async def notify_ready():
+            while not server.started:
+                await asyncio.sleep(0.1)
+            ready.set()
+
+        notify_task = asyncio.create_task(notify_ready())
+    try:
+        await server.serve(sockets=sockets)
+    finally:
+        if ready is not None:
+            notify_task.cancel()
+        if tracing:
+            shutdown_tracing()
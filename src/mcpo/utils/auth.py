@@ -1,52 +1,325 @@
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from fastapi import Depends, Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 
 from passlib.context import CryptContext
 from datetime import UTC, datetime, timedelta
 
+import hmac
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
 import jwt
-from typing import Optional, Union, List, Dict
+from typing import Optional, Union, List, Dict, FrozenSet, NamedTuple, Tuple
+
+from mcpo.utils.ratelimit import RateLimiter, request_target, server_name
 
 
 ALGORITHM = "HS256"
 
+# Verified JWTs kept so their signature isn't checked again on every request
+JWT_CACHE_SIZE = 4096
+
 bearer_security = HTTPBearer(auto_error=False)
 
 
+def _missing_credentials():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Missing or invalid Authorization header",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 def get_verify_api_key(api_key: str):
+    expected = api_key.encode()
+
     async def verify_api_key(
         authorization: HTTPAuthorizationCredentials = Depends(bearer_security),
     ):
         if not authorization or not authorization.credentials:
+            raise _missing_credentials()
+        token = authorization.credentials
+        # Constant time, so response times reveal nothing about the key
+        if not hmac.compare_digest(token.encode(), expected):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid API key",
+            )
+
+    return verify_api_key
+
+
+class ScopeSet(NamedTuple):
+    """The servers and tools a token may use, as sets for O(1) checks."""
+
+    everything: bool
+    servers: FrozenSet[str]
+    tools: FrozenSet[Tuple[str, str]]
+    # Servers with at least one allowed tool
+    tool_servers: FrozenSet[str]
+
+    def allows(self, server: str, tool: Optional[str]) -> bool:
+        if self.everything or server in self.servers:
+            return True
+        if tool is None:
+            return server in self.tool_servers
+        return (server, tool) in self.tools
+
+
+@lru_cache(maxsize=1024)
+def compile_scopes(scopes: Tuple[str, ...]) -> ScopeSet:
+    """
+    Compiles scopes such as "*", "time" (every tool of a server) or
+    "filesystem/read_file" into a ScopeSet. Tokens with the same scopes
+    share one compiled set.
+    """
+    servers = set()
+    tools = set()
+    for scope in scopes:
+        server, _, tool = scope.partition("/")
+        if server == "*":
+            return ScopeSet(True, frozenset(), frozenset(), frozenset())
+        if not tool or tool == "*":
+            servers.add(server)
+        else:
+            tools.add((server, tool))
+    return ScopeSet(
+        False,
+        frozenset(servers),
+        frozenset(tools),
+        frozenset(server for server, _ in tools),
+    )
+
+
+def token_scopes(claims: dict) -> Tuple[str, ...]:
+    """Scopes from an OAuth-style "scope" string or a "scopes" list claim."""
+    scope = claims.get("scope")
+    if isinstance(scope, str):
+        return tuple(scope.split())
+    scopes = claims.get("scopes")
+    if isinstance(scopes, list):
+        return tuple(str(s) for s in scopes)
+    return ()
+
+
+class VerifiedToken(NamedTuple):
+    subject: Optional[str]
+    scopes: ScopeSet
+    expires: float
+
+
+class JWTVerifier:
+    """
+    Verifies signed JWTs, which must carry an "exp" claim. Verified tokens
+    are kept in a bounded LRU cache until they expire, so a client reusing
+    its token costs a dict lookup rather than a signature check.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        algorithms: List[str],
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        leeway: float = 0,
+        cache_size: int = JWT_CACHE_SIZE,
+    ):
+        self.key = key
+        self.algorithms = algorithms
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, VerifiedToken]" = OrderedDict()
+
+    @classmethod
+    def from_options(
+        cls,
+        secret: Optional[str] = None,
+        public_key_file: Optional[str] = None,
+        algorithm: Optional[str] = None,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+    ) -> Optional["JWTVerifier"]:
+        if public_key_file:
+            with open(public_key_file, "r") as f:
+                key = f.read()
+            default_algorithm = "RS256"
+        elif secret:
+            key = secret
+            default_algorithm = ALGORITHM
+        else:
+            return None
+        return cls(
+            key,
+            [algorithm or default_algorithm],
+            audience=audience,
+            issuer=issuer,
+        )
+
+    def verify(self, token: str) -> VerifiedToken:
+        cached = self._cache.get(token)
+        if cached is not None:
+            if time.time() < cached.expires:
+                self._cache.move_to_end(token)
+                return cached
+            del self._cache[token]
+
+        try:
+            claims = jwt.decode(
+                token,
+                self.key,
+                algorithms=self.algorithms,
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.leeway,
+                options={"require": ["exp"]},
+            )
+        except jwt.PyJWTError as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Missing or invalid Authorization header",
-                headers={"WWW-Authenticate": "Bearer"},
+                detail=f"Invalid token: {e}",
+                headers={"WWW-Authenticate": 'Bearer error="invalid_token"'},
             )
+
+        verified = VerifiedToken(
+            claims.get("sub"),
+            compile_scopes(token_scopes(claims)),
+            float(claims["exp"]) + self.leeway,
+        )
+        self._cache[token] = verified
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return verified
+
+
+def looks_like_jwt(token: str) -> bool:
+    return token.count(".") == 2
+
+
+def _check_scope(scopes: Optional[ScopeSet], server: str, tool: Optional[str]):
+    if scopes is not None and not scopes.allows(server, tool):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Token is not allowed to use {server}"
+            + (f"/{tool}" if tool else ""),
+        )
+
+
+def get_verify_api_keys(
+    rate_limiter: Optional[RateLimiter] = None,
+    jwt_verifier: Optional[JWTVerifier] = None,
+    api_key: Optional[str] = None,
+    per_call: bool = False,
+):
+    """
+    Accepts signed JWTs (with jwt_verifier), any of several API keys and
+    their rate limits and concurrency caps (with rate_limiter), or a single
+    static key. Concurrency slots are held until the response has been sent
+    with ReleaseSlotsMiddleware installed, else until the endpoint returns.
+
+    With ``per_call``, for routes making several tool calls such as /batch,
+    the scopes and limits are left to call_authorizer() to check per call.
+    """
+    expected = api_key.encode() if api_key else None
+
+    async def verify_api_keys(
+        request: Request,
+        authorization: HTTPAuthorizationCredentials = Depends(bearer_security),
+    ):
+        if not authorization or not authorization.credentials:
+            raise _missing_credentials()
         token = authorization.credentials
-        if token != api_key:
+
+        if jwt_verifier is not None and looks_like_jwt(token):
+            verified = jwt_verifier.verify(token)
+            request.state.api_key = verified.subject
+            if per_call:
+                request.state.token_scopes = verified.scopes
+            else:
+                _check_scope(verified.scopes, *request_target(request))
+            yield
+            return
+
+        key = rate_limiter.lookup(token) if rate_limiter is not None else None
+        if key is None:
+            if expected is not None and hmac.compare_digest(token.encode(), expected):
+                yield
+                return
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Invalid API key",
             )
+        request.state.api_key = key.name
 
-    return verify_api_key
+        scopes = compile_scopes(key.scopes) if key.scopes is not None else None
+        if per_call:
+            request.state.token_scopes = scopes
+            request.state.rate_limit_key = key
+            yield
+            return
+        server, tool = request_target(request)
+        _check_scope(scopes, server, tool)
+        slots = await rate_limiter.acquire(key, server, tool)
+        held = getattr(request.state, "rate_limit_slots", None)
+        if held is not None:
+            held.extend(slots)
+            yield
+            return
+        try:
+            yield
+        finally:
+            await rate_limiter.release(slots)
+
+    return verify_api_keys
+
+
+def call_authorizer(request: Request, rate_limiter: Optional[RateLimiter]):
+    """
+    For a request authenticated ``per_call``: returns authorize(app, tool),
+    an async context manager checking the caller's scopes and holding its
+    limits for one tool call, as if that call had been made on its own.
+    """
+    scopes = getattr(request.state, "token_scopes", None)
+    key = getattr(request.state, "rate_limit_key", None)
+
+    @asynccontextmanager
+    async def authorize(app, tool: str):
+        server = server_name(app)
+        _check_scope(scopes, server, tool)
+        if key is None or rate_limiter is None:
+            yield
+            return
+        slots = await rate_limiter.acquire(key, server, tool)
+        try:
+            yield
+        finally:
+            await rate_limiter.release(slots)
+
+    return authorize
 
 
-# def create_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
-#     payload = data.copy()
+def create_token(
+    data: dict,
+    secret: str,
+    expires_delta: Union[timedelta, None] = None,
+    algorithm: str = ALGORITHM,
+) -> str:
+    payload = data.copy()
 
-#     if expires_delta:
-#         expire = datetime.now(UTC) + expires_delta
-#         payload.update({"exp": expire})
+    if expires_delta:
+        expire = datetime.now(UTC) + expires_delta
+        payload.update({"exp": expire})
 
-#     encoded_jwt = jwt.encode(payload, SESSION_SECRET, algorithm=ALGORITHM)
-#     return encoded_jwt
+    encoded_jwt = jwt.encode(payload, secret, algorithm=algorithm)
+    return encoded_jwt
 
 
-# def decode_token(token: str) -> Optional[dict]:
-#     try:
-#         decoded = jwt.decode(token, SESSION_SECRET, algorithms=[ALGORITHM])
-#         return decoded
-#     except Exception:
-#         return None
+def decode_token(token: str, secret: str, algorithm: str = ALGORITHM) -> Optional[dict]:
+    try:
+        decoded = jwt.decode(token, secret, algorithms=[algorithm])
+        return decoded
+    except Exception:
+        return None
@@ -0,0 +1,78 @@
+import asyncio
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, status
+from pydantic import BaseModel, Field, ValidationError
+
+from mcpo.utils.fastjson import dumps
+
+
+class BatchCall(BaseModel):
+    server: Optional[str] = Field(
+        None, description="Mounted server name; omit when mcpo runs a single server"
+    )
+    tool: str = Field(..., description="Tool name")
+    arguments: Dict[str, Any] = Field(default_factory=dict)
+
+
+def _error(status_code: int, detail: Any) -> bytes:
+    return dumps({"ok": False, "status": status_code, "error": detail})
+
+
+async def run_batch_call(
+    call: BatchCall,
+    resolve: Callable[[Optional[str]], Optional[FastAPI]],
+    authorize: Optional[Callable] = None,
+) -> bytes:
+    app = resolve(call.server)
+    executors = getattr(app.state, "tool_executors", {}) if app else {}
+    if call.tool not in executors:
+        return _error(
+            status.HTTP_404_NOT_FOUND, f"Unknown tool {call.server or ''}/{call.tool}"
+        )
+
+    FormModel, execute = executors[call.tool]
+    try:
+        async with authorize(app, call.tool) if authorize else nullcontext():
+            try:
+                args = (
+                    FormModel(**call.arguments).model_dump(
+                        exclude_none=True, by_alias=True
+                    )
+                    if FormModel
+                    else {}
+                )
+            except ValidationError as e:
+                return _error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    e.errors(include_url=False, include_context=False),
+                )
+            body, _ = await execute(args)
+    except HTTPException as e:
+        return _error(e.status_code, e.detail)
+    except Exception as e:
+        return _error(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e) or repr(e))
+    return b'{"ok":true,"result":' + body + b"}"
+
+
+async def run_batch(
+    calls: List[BatchCall],
+    resolve: Callable[[Optional[str]], Optional[FastAPI]],
+    concurrency: int,
+    authorize: Optional[Callable] = None,
+) -> bytes:
+    """
+    Runs the calls concurrently, at most ``concurrency`` at a time, and returns
+    a JSON array with one {"ok", "result" | "status", "error"} item per call,
+    in request order. ``authorize(app, tool)``, an async context manager, is
+    entered around each call to apply the caller's per-call checks.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(call: BatchCall) -> bytes:
+        async with semaphore:
+            return await run_batch_call(call, resolve, authorize)
+
+    items = await asyncio.gather(*(run(call) for call in calls))
+    return b"[" + b",".join(items) + b"]"
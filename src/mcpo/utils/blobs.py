@@ -0,0 +1,309 @@
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple, Union
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from mcp import types
+
+from mcpo.utils.fastjson import dumps, is_base64
+
+logger = logging.getLogger(__name__)
+
+BLOB_PATH = "/blobs"
+
+# Smaller payloads stay inline, where a data URL costs less than a round trip
+DEFAULT_MIN_SIZE = 4096
+DEFAULT_MEMORY_MB = 64
+DEFAULT_DISK_MB = 1024
+
+# The mime type of a blob on disk is kept next to it, for other workers
+TYPE_SUFFIX = ".type"
+
+BLOB_ID = re.compile(r"^[0-9a-f]{64}$")
+
+# Blobs never change, and tool-supplied content must not run as our origin
+BLOB_HEADERS = {
+    "Accept-Ranges": "bytes",
+    "Cache-Control": "public, max-age=31536000, immutable",
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "sandbox",
+}
+
+
+class Blob(NamedTuple):
+    mime_type: str
+    size: int
+    # Held in memory, or else spilled to this file
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+
+def blob_url(blob_id: str) -> str:
+    return f"{BLOB_PATH}/{blob_id}"
+
+
+class BlobStore:
+    """
+    A bounded, content-addressed store for the binary content of tool results
+    (images, embedded resources), which are then returned as short URLs
+    instead of base64 data URLs. Blobs are identified by their SHA-256, kept
+    in memory up to ``max_memory`` bytes and, with a ``directory``, spilled
+    to disk as they fall out of memory, up to ``max_disk`` bytes. The least
+    recently used blobs are dropped first.
+
+    With ``shared`` every blob is also written to the directory right away,
+    so that other processes serving the same directory (--workers) can
+    serve it too.
+    """
+
+    def __init__(
+        self,
+        max_memory: int = DEFAULT_MEMORY_MB * 1024 * 1024,
+        directory: Optional[str] = None,
+        max_disk: int = DEFAULT_DISK_MB * 1024 * 1024,
+        min_size: int = DEFAULT_MIN_SIZE,
+        shared: bool = False,
+    ):
+        self.max_memory = max_memory
+        self.directory = directory
+        self.max_disk = max_disk
+        self.min_size = min_size
+        self.shared = shared and directory is not None
+        self._memory: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._disk_size = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    @classmethod
+    def from_option(
+        cls,
+        option: str,
+        memory_mb: Optional[int] = None,
+        disk_mb: Optional[int] = None,
+        shared: bool = False,
+    ) -> "BlobStore":
+        """A store for --blob-store, which is "memory" or a spill directory."""
+        return cls(
+            max_memory=(memory_mb or DEFAULT_MEMORY_MB) * 1024 * 1024,
+            directory=None if option == "memory" else option,
+            max_disk=(disk_mb or DEFAULT_DISK_MB) * 1024 * 1024,
+            shared=shared,
+        )
+
+    def _path(self, blob_id: str) -> str:
+        return os.path.join(self.directory, blob_id)
+
+    def _load_index(self):
+        # Blobs left by an earlier run count towards the disk budget, oldest first
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and BLOB_ID.match(entry.name):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, blob_id, size in sorted(entries):
+            self._disk[blob_id] = (self._read_type(blob_id), size)
+            self._disk_size += size
+        self._trim_disk()
+
+    def _read_type(self, blob_id: str) -> str:
+        try:
+            with open(self._path(blob_id) + TYPE_SUFFIX, "r") as f:
+                return f.read().strip() or "application/octet-stream"
+        except OSError:
+            return "application/octet-stream"
+
+    def _write(self, blob_id: str, data: bytes, mime_type: str) -> bool:
+        if blob_id in self._disk:
+            self._disk.move_to_end(blob_id)
+            return True
+        path = self._path(blob_id)
+        try:
+            if not os.path.exists(path):
+                # The type goes first and the data is renamed into place, so
+                # other workers never see a partial blob
+                with open(path + TYPE_SUFFIX, "w") as f:
+                    f.write(mime_type)
+                fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write blob {blob_id} to disk: {e}")
+            return False
+        self._disk[blob_id] = (mime_type, len(data))
+        self._disk_size += len(data)
+        self._trim_disk()
+        return True
+
+    def _trim_disk(self):
+        while self._disk_size > self.max_disk and self._disk:
+            blob_id, (_, size) = self._disk.popitem(last=False)
+            self._disk_size -= size
+            for path in (self._path(blob_id), self._path(blob_id) + TYPE_SUFFIX):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _trim_memory(self):
+        while self._memory_size > self.max_memory and self._memory:
+            blob_id, (mime_type, data) = self._memory.popitem(last=False)
+            self._memory_size -= len(data)
+            if self.directory and not self.shared:
+                self._write(blob_id, data, mime_type)
+
+    def put(self, data: bytes, mime_type: str) -> Optional[str]:
+        """Stores data and returns its id, or None if it doesn't fit."""
+        blob_id = hashlib.sha256(data).hexdigest()
+        if blob_id in self._memory:
+            self._memory.move_to_end(blob_id)
+            return blob_id
+        if len(data) > self.max_memory:
+            if self.directory and self._write(blob_id, data, mime_type):
+                return blob_id
+            return None
+        if self.shared and not self._write(blob_id, data, mime_type):
+            return None
+        self._memory[blob_id] = (mime_type, data)
+        self._memory_size += len(data)
+        self._trim_memory()
+        return blob_id
+
+    def get(self, blob_id: str) -> Optional[Blob]:
+        if not BLOB_ID.match(blob_id):
+            return None
+        cached = self._memory.get(blob_id)
+        if cached is not None:
+            self._memory.move_to_end(blob_id)
+            mime_type, data = cached
+            return Blob(mime_type, len(data), data=data)
+        if not self.directory:
+            return None
+        path = self._path(blob_id)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        indexed = self._disk.get(blob_id)
+        if indexed is not None:
+            self._disk.move_to_end(blob_id)
+            mime_type = indexed[0]
+        else:
+            # Written by another worker
+            mime_type = self._read_type(blob_id)
+        return Blob(mime_type, size, path=path)
+
+
+def store_base64(
+    blobs: Optional[BlobStore], data: str, mime_type: str
+) -> Optional[str]:
+    """The URL of base64 data moved to the store, or None to keep it inline."""
+    if blobs is None or len(data) * 3 // 4 < blobs.min_size:
+        return None
+    try:
+        # Lenient decoding would drop stray characters; such data stays inline
+        decoded = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    blob_id = blobs.put(decoded, mime_type)
+    return blob_url(blob_id) if blob_id else None
+
+
+def encode_binary(
+    data: str, mime_type: str, blobs: Optional[BlobStore] = None
+) -> bytes:
+    """A blob URL, or a data URL built without copying the base64 data twice."""
+    url = store_base64(blobs, data, mime_type)
+    if url is not None:
+        return dumps(url)
+    if not is_base64(data):
+        return dumps(f"data:{mime_type};base64,{data}")
+    return b"".join((dumps(f"data:{mime_type};base64,")[:-1], data.encode(), b'"'))
+
+
+def encode_resource(
+    resource: Union[types.TextResourceContents, types.BlobResourceContents],
+    blobs: Optional[BlobStore] = None,
+) -> bytes:
+    """Embedded text resources become strings, binary ones are like images."""
+    if isinstance(resource, types.TextResourceContents):
+        text = resource.text
+        if blobs is not None and len(text) >= blobs.min_size:
+            blob_id = blobs.put(
+                text.encode(), resource.mimeType or "text/plain; charset=utf-8"
+            )
+            if blob_id:
+                return dumps(blob_url(blob_id))
+        return dumps(text)
+    return encode_binary(
+        resource.blob, resource.mimeType or "application/octet-stream", blobs
+    )
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    The (start, end) byte positions, inclusive, of a single "bytes=" range,
+    or None to send the whole blob. Raises ValueError if it is unsatisfiable.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, sep, last = ranges.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end or start < 0:
+        raise ValueError(header)
+    return start, end
+
+
+def blob_response(request: Request, blob_id: str, blob: Blob) -> Response:
+    """The raw bytes of a blob, honouring If-None-Match and Range requests."""
+    etag = f'"{blob_id}"'
+    headers = {"ETag": etag, **BLOB_HEADERS}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+
+    if blob.path is not None:
+        # Streamed from the file; Starlette handles ranges of files itself
+        return FileResponse(blob.path, media_type=blob.mime_type, headers=headers)
+
+    http_range = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if http_range and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(http_range, blob.size)
+        except ValueError:
+            return Response(
+                status_code=416, headers={"Content-Range": f"bytes */{blob.size}"}
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{blob.size}"
+            return Response(
+                blob.data[start : end + 1],
+                status_code=206,
+                media_type=blob.mime_type,
+                headers=headers,
+            )
+    return Response(blob.data, media_type=blob.mime_type, headers=headers)
@@ -0,0 +1,202 @@
+import gzip
+from typing import Dict, Iterable, Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional encoding
+    zstandard = None
+
+# Preferred first when the client accepts several encodings equally
+PREFERENCE = ("zstd", "br", "gzip")
+
+# Levels for responses compressed per request, and for artifacts built once
+LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+BEST_LEVELS = {"zstd": 12, "br": 9, "gzip": 9}
+
+DEFAULT_MIN_SIZE = 1024
+# Bodies at least this large are compressed in a worker thread
+OFFLOAD_SIZE = 64 * 1024
+
+INCOMPRESSIBLE_TYPES = (
+    "image/",
+    "audio/",
+    "video/",
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+    "text/event-stream",
+)
+# Base64 image data in a tool result is already compressed and barely shrinks
+DATA_URL_MARKERS = (b'"data:image/', b'"data:audio/', b'"data:video/')
+
+
+def available_encodings() -> tuple:
+    return tuple(
+        encoding
+        for encoding in PREFERENCE
+        if (encoding != "br" or brotli is not None)
+        and (encoding != "zstd" or zstandard is not None)
+    )
+
+
+def compress(data: bytes, encoding: str, best: bool = False) -> bytes:
+    level = (BEST_LEVELS if best else LEVELS)[encoding]
+    if encoding == "gzip":
+        # mtime=0 keeps the output, and so any ETag derived from it, stable
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd" and zstandard is not None:
+        # Compressors are not thread-safe, so every call gets its own
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported content encoding {encoding!r}")
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Maps each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate(header: Optional[str], encodings: Iterable[str]) -> Optional[str]:
+    """
+    The best of ``encodings`` (in order of preference) that the client accepts,
+    or None to send the body as-is.
+    """
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compression_policy(config, tool: str, default: Optional[int]) -> Optional[int]:
+    """
+    The minimum body size at which a tool's responses are compressed, or None
+    when they never are, from a server's "compression" config entry:
+    ``false``, or ``{"minSize": n, "tools": {"name": false | {"minSize": n}}}``.
+    """
+    if config is False:
+        return None
+    config = config if isinstance(config, dict) else {}
+    if config.get("enabled") is False:
+        return None
+    min_size = config.get("minSize", default)
+    tool_config = config.get("tools", {}).get(tool, {})
+    if tool_config is False:
+        return None
+    if isinstance(tool_config, dict):
+        if tool_config.get("enabled") is False:
+            return None
+        min_size = tool_config.get("minSize", min_size)
+    return min_size
+
+
+class CompressionMiddleware:
+    """
+    Compresses complete response bodies with the best encoding the client
+    accepts (zstd, br or gzip, as installed). Streamed responses, responses
+    that are already encoded, media types and tool results carrying image
+    data are sent as-is. A handler can set ``request.state.compress_min_size``
+    to override the threshold for its response, or to None to opt out.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = DEFAULT_MIN_SIZE,
+        offload_size: int = OFFLOAD_SIZE,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding"), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def compressing_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            pending, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(
+                scope, pending, body
+            ):
+                await send(pending)
+                await send(message)
+                return
+
+            if len(body) >= self.offload_size:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            headers = MutableHeaders(raw=pending["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(pending)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
+
+    def _should_compress(self, scope, start, body: bytes) -> bool:
+        state = scope.get("state") or {}
+        minimum_size = state.get("compress_min_size", self.minimum_size)
+        if minimum_size is None or len(body) < minimum_size or not body:
+            return False
+        headers = Headers(raw=start["headers"])
+        # Parts of a range are sent as they are stored
+        if "content-encoding" in headers or start["status"] == 206:
+            return False
+        content_type = headers.get("content-type", "")
+        if content_type.startswith(INCOMPRESSIBLE_TYPES):
+            return False
+        if content_type.startswith("application/json") and any(
+            marker in body for marker in DATA_URL_MARKERS
+        ):
+            return False
+        return True
@@ -0,0 +1,83 @@
+import json
+import re
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Only strings of this alphabet can be spliced between JSON quotes unescaped
+BASE64 = re.compile(r"[A-Za-z0-9+/]*={0,2}")
+
+
+def _reject_constant(value: str):
+    raise ValueError(f"{value} is not valid JSON")
+
+
+def is_json(text: str) -> bool:
+    """True if text is a complete, strictly valid JSON document."""
+    if orjson is not None:
+        try:
+            orjson.loads(text)
+            return True
+        except orjson.JSONDecodeError:
+            return False
+    try:
+        json.loads(text, parse_constant=_reject_constant)
+        return True
+    except ValueError:
+        return False
+
+
+def is_base64(text: str) -> bool:
+    return BASE64.fullmatch(text) is not None
+
+
+def _dumps(content: Any, ensure_ascii: bool) -> bytes:
+    return json.dumps(
+        content, ensure_ascii=ensure_ascii, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except orjson.JSONEncodeError:
+            # Lone surrogates aren't valid UTF-8 and can only be \u-escaped;
+            # anything else unencodable still raises TypeError below
+            return _dumps(content, ensure_ascii=True)
+    try:
+        return _dumps(content, ensure_ascii=False)
+    except UnicodeEncodeError:
+        return _dumps(content, ensure_ascii=True)
+
+
+def encode_text(text: str) -> bytes:
+    """Text that is already valid JSON as-is, anything else as a JSON string."""
+    try:
+        encoded = text.encode()
+    except UnicodeEncodeError:
+        # Lone surrogates, which orjson won't parse either; decoded the slow way
+        try:
+            return dumps(json.loads(text, parse_constant=_reject_constant))
+        except ValueError:
+            return dumps(text)
+    return encoded if is_json(text) else dumps(text)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(JSONResponse):
+    """Sends an already encoded JSON body as-is."""
+
+    def render(self, content: bytes) -> bytes:
+        return content
@@ -0,0 +1,139 @@
+import time
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+from mcpo.utils import tracing
+from mcpo.utils.fastjson import dumps
+from mcpo.utils.metrics import REGISTRY
+
+LABELS = ("server", "tool")
+SIZE_BUCKETS = tuple(256 * 4**i for i in range(10))  # 256 B .. 64 MiB
+
+REQUESTS = REGISTRY.counter("mcpo_requests_total", "Tool calls received", LABELS)
+ERRORS = REGISTRY.counter(
+    "mcpo_errors_total",
+    "Tool calls that raised or returned an error result",
+    LABELS,
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "mcpo_requests_in_flight", "Tool calls currently being handled", LABELS
+)
+REQUEST_DURATION = REGISTRY.histogram(
+    "mcpo_request_duration_seconds",
+    "Time to handle a tool call, including queueing and encoding",
+    LABELS,
+)
+CALL_DURATION = REGISTRY.histogram(
+    "mcpo_call_tool_duration_seconds",
+    "Time spent waiting on the MCP server's call_tool response",
+    LABELS,
+)
+PROCESS_DURATION = REGISTRY.histogram(
+    "mcpo_process_duration_seconds",
+    "Time spent encoding tool results into the HTTP response",
+    LABELS,
+)
+RESPONSE_BYTES = REGISTRY.histogram(
+    "mcpo_response_bytes",
+    "Size of encoded tool responses",
+    LABELS,
+    buckets=SIZE_BUCKETS,
+)
+
+
+def _finish(labels: Dict[str, str], start_time: float):
+    IN_FLIGHT.dec(**labels)
+    REQUEST_DURATION.observe(time.perf_counter() - start_time, **labels)
+
+
+async def _timed_body(
+    body: AsyncIterator[Any], labels: Dict[str, str], start_time: float
+) -> AsyncIterator[Any]:
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        _finish(labels, start_time)
+
+
+def instrument_handler(
+    handle: Callable[..., Awaitable[Any]], labels: Dict[str, str]
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Counts a generated tool handler's requests and times them end to end,
+    which for streamed responses (SSE, NDJSON) is until the body was sent.
+    """
+
+    @wraps(handle)
+    async def instrumented(*args, **kwargs):
+        REQUESTS.inc(**labels)
+        IN_FLIGHT.inc(**labels)
+        start_time = time.perf_counter()
+        streamed = False
+        try:
+            response = await handle(*args, **kwargs)
+            body = getattr(response, "body_iterator", None)
+            if body is not None:
+                response.body_iterator = _timed_body(body, labels, start_time)
+                streamed = True
+            return response
+        finally:
+            if not streamed:
+                _finish(labels, start_time)
+
+    return instrumented
+
+
+def instrument_call(
+    call_tool: Callable[..., Awaitable[Any]], labels: Dict[str, str]
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Times the MCP call itself and counts failed and error results. When tracing
+    is on, the call gets a span whose context is sent along in the request _meta.
+    """
+
+    @wraps(call_tool)
+    async def instrumented(name: str, arguments=None, **kwargs):
+        attributes = None
+        if tracing.enabled():
+            attributes = {
+                "mcp.server": labels["server"],
+                "mcp.tool.name": name,
+                "mcp.tool.arguments_size": len(dumps(arguments or {})),
+            }
+        with tracing.span(f"call_tool {name}", attributes, kind="client") as span:
+            if span is not None:
+                kwargs["meta"] = tracing.inject_meta()
+            start_time = time.perf_counter()
+            try:
+                result = await call_tool(name, arguments=arguments, **kwargs)
+            except Exception:
+                ERRORS.inc(**labels)
+                raise
+            finally:
+                CALL_DURATION.observe(time.perf_counter() - start_time, **labels)
+            if result.isError:
+                ERRORS.inc(**labels)
+                if span is not None:
+                    span.set_attribute("mcp.tool.is_error", True)
+            return result
+
+    return instrumented
+
+
+def instrument_encode(
+    encode: Callable[[Any], bytes], labels: Dict[str, str]
+) -> Callable[[Any], bytes]:
+    """Times result encoding and records the response size."""
+
+    def instrumented(result) -> bytes:
+        with tracing.span("process_tool_response") as span:
+            start_time = time.perf_counter()
+            body = encode(result)
+            PROCESS_DURATION.observe(time.perf_counter() - start_time, **labels)
+            RESPONSE_BYTES.observe(len(body), **labels)
+            if span is not None:
+                span.set_attribute("mcpo.response.size", len(body))
+        return body
+
+    return instrumented
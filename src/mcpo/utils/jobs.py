@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# How often a worker looks for cancellations requested through another one
+CANCEL_POLL_INTERVAL = 0.5
+# How long cancelling another worker's job waits for it to stop
+CANCEL_TIMEOUT = 5.0
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Job:
+    def __init__(self, tool: str):
+        self.id = uuid.uuid4().hex
+        self.tool = tool
+        self.status = "pending"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.result: Optional[bytes] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        job = cls(data["tool"])
+        job.id = data["id"]
+        job.status = data["status"]
+        job.created_at = data["created_at"]
+        job.finished_at = data["finished_at"]
+        job.error = data["error"]
+        return job
+
+
+class JobStore:
+    """
+    Bounded in-memory store of tool calls running in the background. Finished
+    jobs are kept for ``ttl`` seconds; when the store is full the oldest
+    finished job is evicted, and new jobs are refused if none has finished.
+
+    With a ``directory`` shared by several processes (--workers), each job's
+    status and result are also written there, so that any process can report
+    them. Jobs still run in the process they were submitted to, which
+    cancels them when another process leaves a cancellation marker.
+    """
+
+    def __init__(
+        self, max_jobs: int = 1000, ttl: float = 600, directory: Optional[str] = None
+    ):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.directory = directory
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._watcher: Optional[asyncio.Task] = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, job_id + suffix)
+
+    def _write(self, job_id: str, suffix: str, data: bytes):
+        # Renamed into place so other processes never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(job_id, suffix))
+
+    def _save(self, job: Job):
+        if not self.directory:
+            return
+        try:
+            if job.result is not None:
+                # The result goes first, so a finished status always has one
+                self._write(job.id, ".result", job.result)
+            state = {"pid": os.getpid(), "job": job.to_dict()}
+            self._write(job.id, ".json", json.dumps(state).encode())
+        except OSError as e:
+            logger.warning(f"Could not save job {job.id}: {e}")
+
+    def _remove(self, job_id: str):
+        if not self.directory:
+            return
+        for suffix in (".json", ".result", ".cancel"):
+            try:
+                os.remove(self._path(job_id, suffix))
+            except OSError:
+                pass
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        """A job of another process sharing the directory."""
+        if not self.directory or not JOB_ID.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id, ".json"), "rb") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        job = Job.from_dict(state["job"])
+        if not job.done and not _alive(state["pid"]):
+            job.status = "failed"
+            job.error = "The worker running this job exited"
+        if job.done and job.finished_at and time.time() - job.finished_at > self.ttl:
+            return None
+        if job.status in ("completed", "failed"):
+            try:
+                with open(self._path(job_id, ".result"), "rb") as f:
+                    job.result = f.read()
+            except OSError:
+                pass
+        return job
+
+    def _purge(self):
+        now = time.time()
+        for job_id in [
+            job.id
+            for job in self._jobs.values()
+            if job.done and now - job.finished_at > self.ttl
+        ]:
+            del self._jobs[job_id]
+            self._remove(job_id)
+
+    def _make_room(self):
+        self._purge()
+        if len(self._jobs) < self.max_jobs:
+            return
+        for job in self._jobs.values():
+            if job.done:
+                del self._jobs[job.id]
+                self._remove(job.id)
+                return
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many jobs in progress, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+    def submit(self, tool: str, run: Callable[[], Awaitable[tuple]]) -> Job:
+        """``run`` returns (body, is_error) with body the encoded tool result."""
+        self._make_room()
+        job = Job(tool)
+        self._jobs[job.id] = job
+
+        async def run_job():
+            job.status = "running"
+            self._save(job)
+            try:
+                job.result, is_error = await run()
+                job.status = "failed" if is_error else "completed"
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+            except Exception as e:
+                job.status = "failed"
+                job.error = getattr(e, "detail", None) or str(e) or repr(e)
+            finally:
+                job.finished_at = time.time()
+                job.task = None
+                self._save(job)
+
+        job.task = asyncio.create_task(run_job())
+        self._save(job)
+        if self.directory and (self._watcher is None or self._watcher.done()):
+            self._watcher = asyncio.create_task(self._watch_cancellations())
+        return job
+
+    async def _watch_cancellations(self):
+        while any(job.task is not None for job in self._jobs.values()):
+            await asyncio.sleep(CANCEL_POLL_INTERVAL)
+            for job in list(self._jobs.values()):
+                if job.task is not None and os.path.exists(
+                    self._path(job.id, ".cancel")
+                ):
+                    await self.cancel(job.id)
+
+    def get(self, job_id: str) -> Job:
+        self._purge()
+        job = self._jobs.get(job_id) or self._load(job_id)
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found or expired",
+            )
+        return job
+
+    async def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job_id not in self._jobs:
+            return await self._cancel_elsewhere(job)
+        task = job.task
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            if not job.done:
+                # Cancelled before it started, so run_job never recorded it
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                job.task = None
+                self._save(job)
+        return job
+
+    async def _cancel_elsewhere(self, job: Job) -> Job:
+        """Asks the process running a job to cancel it and waits a little."""
+        if job.done:
+            return job
+        try:
+            with open(self._path(job.id, ".cancel"), "w"):
+                pass
+        except OSError as e:
+            logger.warning(f"Could not cancel job {job.id}: {e}")
+            return job
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CANCEL_TIMEOUT
+        while not job.done and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+            job = self._load(job.id) or job
+        return job
+
+    async def close(self):
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        if self._watcher is not None:
+            tasks.append(self._watcher)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
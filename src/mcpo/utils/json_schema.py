@@ -0,0 +1,272 @@
+import hashlib
+import json
+import keyword
+import re
+from typing import (
+    Annotated,
+    Any,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+# Compiled models by schema hash, shared by every tool and server
+_models: Dict[str, Type[BaseModel]] = {}
+
+SIMPLE_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "null": type(None),
+}
+
+NUMERIC_CONSTRAINTS = {
+    "minimum": "ge",
+    "maximum": "le",
+    "exclusiveMinimum": "gt",
+    "exclusiveMaximum": "lt",
+    "multipleOf": "multiple_of",
+}
+# type -> {JSON Schema keyword: pydantic Field constraint}
+CONSTRAINTS = {
+    "string": {
+        "minLength": "min_length",
+        "maxLength": "max_length",
+        "pattern": "pattern",
+    },
+    "integer": NUMERIC_CONSTRAINTS,
+    "number": NUMERIC_CONSTRAINTS,
+    "array": {"minItems": "min_length", "maxItems": "max_length"},
+}
+# Draft 4 exclusive bounds are booleans making minimum/maximum exclusive:
+# (keyword, bound, inclusive constraint, exclusive constraint)
+DRAFT4_EXCLUSIVE = (
+    ("exclusiveMinimum", "minimum", "ge", "gt"),
+    ("exclusiveMaximum", "maximum", "le", "lt"),
+)
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    return hashlib.sha256(
+        json.dumps(schema, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def _field_name(name: str, taken: Set[str]) -> str:
+    """A valid, non-shadowing attribute name; the JSON name is kept as alias."""
+    field_name = re.sub(r"\W", "_", name)
+    if (
+        not field_name
+        or field_name[0].isdigit()
+        or field_name.startswith("_")
+        or keyword.iskeyword(field_name)
+        or hasattr(BaseModel, field_name)
+    ):
+        field_name = f"field_{field_name.lstrip('_')}"
+    while field_name in taken:
+        field_name += "_"
+    taken.add(field_name)
+    return field_name
+
+
+class SchemaCompiler:
+    """
+    Translates a tool's JSON Schema into pydantic models: nested objects become
+    models, enums and consts Literals, anyOf/oneOf and type lists Unions, arrays
+    typed lists, and validation keywords Field constraints. Local $refs are
+    resolved; recursive references fall back to plain dicts.
+    """
+
+    def __init__(self, root: Dict[str, Any]):
+        self.definitions = {
+            **root.get("definitions", {}),
+            **root.get("$defs", {}),
+        }
+        self._resolving: Set[str] = set()
+
+    def _ref(self, ref: str, name: str):
+        key = ref.rsplit("/", 1)[-1]
+        if not ref.startswith("#/") or key not in self.definitions:
+            return Any
+        if key in self._resolving:
+            return Dict[str, Any]
+        self._resolving.add(key)
+        try:
+            return self.type_of(self.definitions[key], key)
+        finally:
+            self._resolving.discard(key)
+
+    def type_of(self, schema: Any, name: str):
+        if not isinstance(schema, dict):
+            # true / false / missing schemas
+            return Any
+
+        if "$ref" in schema:
+            return self._ref(schema["$ref"], name)
+        if "const" in schema:
+            return self._literal([schema["const"]])
+        if "enum" in schema:
+            return self._literal(schema["enum"])
+        for key in ("anyOf", "oneOf"):
+            if key in schema:
+                return self._union(
+                    [
+                        self.type_of({**_base(schema, key), **option}, f"{name}_{i}")
+                        for i, option in enumerate(schema[key])
+                    ]
+                )
+        if "allOf" in schema:
+            return self.type_of(_merge_all_of(schema), name)
+
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            return self._union(
+                [
+                    self.type_of({**schema, "type": single}, name)
+                    for single in schema_type
+                ]
+            )
+
+        if schema_type == "object" or "properties" in schema:
+            python_type = self._object(schema, name)
+        elif schema_type == "array":
+            items = schema.get("items")
+            python_type = List[self.type_of(items, f"{name}_item")] if items else list
+        elif schema_type in SIMPLE_TYPES:
+            python_type = SIMPLE_TYPES[schema_type]
+        else:
+            return Any
+
+        keywords = CONSTRAINTS.get(schema_type, {})
+        constraints = {
+            keywords[key]: value
+            for key, value in schema.items()
+            if key in keywords and not isinstance(value, bool)
+        }
+        if keywords is NUMERIC_CONSTRAINTS:
+            for exclusive, bound, inclusive, strict in DRAFT4_EXCLUSIVE:
+                if schema.get(exclusive) is True and inclusive in constraints:
+                    constraints[strict] = constraints.pop(inclusive)
+        if constraints:
+            return Annotated[python_type, Field(**constraints)]
+        return python_type
+
+    def _literal(self, values: list):
+        if not values or not all(
+            isinstance(v, (str, int, float, bool)) or v is None for v in values
+        ):
+            return Any
+        return Literal[tuple(values)]
+
+    def _union(self, types: list):
+        if Any in types:
+            return Any
+        unique = []
+        for python_type in types:
+            if python_type not in unique:
+                unique.append(python_type)
+        return unique[0] if len(unique) == 1 else Union[tuple(unique)]
+
+    def _object(self, schema: Dict[str, Any], name: str):
+        properties = schema.get("properties")
+        additional = schema.get("additionalProperties", True)
+        if not properties:
+            if isinstance(additional, dict):
+                return Dict[str, self.type_of(additional, f"{name}_value")]
+            return Dict[str, Any]
+        return self.model(schema, schema.get("title") or name)
+
+    def fields(self, schema: Dict[str, Any], name: str) -> Dict[str, Tuple]:
+        required = set(schema.get("required", []))
+        taken: Set[str] = set()
+        fields = {}
+        for prop, prop_schema in schema.get("properties", {}).items():
+            python_type = self.type_of(prop_schema, f"{name}_{prop}")
+            field_name = _field_name(prop, taken)
+            description = (
+                prop_schema.get("description", "")
+                if isinstance(prop_schema, dict)
+                else ""
+            )
+            if prop in required:
+                default = ...
+            else:
+                # Unset optional fields are dropped, so the server's own
+                # defaults apply; the schema default is shown in the docs.
+                python_type = Optional[python_type]
+                default = None
+            extra = {}
+            if isinstance(prop_schema, dict) and "default" in prop_schema:
+                extra["json_schema_extra"] = {"default": prop_schema["default"]}
+            fields[field_name] = (
+                python_type,
+                Field(default, alias=prop, description=description, **extra),
+            )
+        return fields
+
+    def model(self, schema: Dict[str, Any], name: str) -> Type[BaseModel]:
+        # $refs resolve against the root, so the definitions are part of the key
+        key = schema_hash({"schema": schema, "definitions": self.definitions})
+        cached = _models.get(key)
+        if cached is not None:
+            return cached
+        # Unknown fields are dropped, as they always were, unless the schema
+        # explicitly allows (and so forwards) or forbids them
+        additional = schema.get("additionalProperties")
+        if additional is False:
+            extra = "forbid"
+        elif additional is True or isinstance(additional, dict):
+            extra = "allow"
+        else:
+            extra = "ignore"
+        model = create_model(
+            re.sub(r"\W", "_", name),
+            __config__=ConfigDict(
+                populate_by_name=True,
+                extra=extra,
+                # JSON Schema patterns are ECMA regexes, closer to re than Rust
+                regex_engine="python-re",
+            ),
+            **self.fields(schema, name),
+        )
+        _models[key] = model
+        return model
+
+
+def _base(schema: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """Keywords that apply to every anyOf/oneOf option, such as a shared type."""
+    return {k: v for k, v in schema.items() if k not in (key, "description")}
+
+
+def _merge_all_of(schema: Dict[str, Any]) -> Dict[str, Any]:
+    merged = {k: v for k, v in schema.items() if k != "allOf"}
+    for part in schema["allOf"]:
+        if not isinstance(part, dict):
+            continue
+        for key, value in part.items():
+            if key == "properties":
+                merged["properties"] = {**merged.get("properties", {}), **value}
+            elif key == "required":
+                merged["required"] = [*merged.get("required", []), *value]
+            else:
+                merged.setdefault(key, value)
+    return merged
+
+
+def compile_tool_model(name: str, schema: Dict[str, Any]) -> Optional[Type[BaseModel]]:
+    """
+    The request model of a tool, or None when it takes no parameters. Models
+    are cached by schema hash, so tools with identical schemas, on any server,
+    and later refreshes of an unchanged tool reuse the same model.
+    """
+    if not schema.get("properties"):
+        return None
+    return SchemaCompiler(schema).model(schema, f"{name}_form_model")
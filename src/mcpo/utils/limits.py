@@ -0,0 +1,108 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from mcpo.utils.metrics import REGISTRY
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "mcpo_queue_depth",
+    "Tool calls waiting for a concurrency slot",
+    ("server", "tool"),
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "mcpo_queue_wait_seconds",
+    "Time tool calls spent waiting for a concurrency slot",
+    ("server", "tool"),
+)
+REJECTED = REGISTRY.counter(
+    "mcpo_rejected_total",
+    "Tool calls rejected because the wait queue was full or timed out",
+    ("server", "tool"),
+)
+
+
+class ConcurrencyLimiter:
+    """
+    A semaphore with a bounded wait queue. Calls beyond max_concurrent wait in
+    line; once max_queue calls are already waiting, new ones are rejected with
+    status_code and a Retry-After header instead of piling up.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int = 0,
+        queue_timeout: Optional[float] = None,
+        retry_after: int = 1,
+        status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE,
+        server: str = "",
+        tool: str = "",
+    ):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1.")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.status_code = status_code
+        self.labels = {"server": server, "tool": tool}
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    def _reject(self, detail: str):
+        REJECTED.inc(**self.labels)
+        raise HTTPException(
+            status_code=self.status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def __aenter__(self):
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self._reject("Too many pending tool calls, try again later")
+
+        self.waiting += 1
+        QUEUE_DEPTH.inc(**self.labels)
+        start_time = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject("Timed out waiting for a free tool slot")
+        finally:
+            self.waiting -= 1
+            QUEUE_DEPTH.dec(**self.labels)
+            QUEUE_WAIT.observe(time.perf_counter() - start_time, **self.labels)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+    @classmethod
+    def from_config(
+        cls, config: Dict[str, Any], server: str = "", tool: str = ""
+    ) -> Optional["ConcurrencyLimiter"]:
+        max_concurrent = config.get("maxConcurrent")
+        if not max_concurrent:
+            return None
+        return cls(
+            max_concurrent,
+            max_queue=config.get("maxQueue", 0),
+            queue_timeout=config.get("queueTimeout"),
+            retry_after=config.get("retryAfter", 1),
+            status_code=config.get("statusCode", status.HTTP_503_SERVICE_UNAVAILABLE),
+            server=server,
+            tool=tool,
+        )
+
+
+@asynccontextmanager
+async def acquire_all(*limiters: Optional[ConcurrencyLimiter]):
+    """Enter every configured limiter, most specific first."""
+    async with AsyncExitStack() as stack:
+        for limiter in limiters:
+            if limiter is not None:
+                await stack.enter_async_context(limiter)
+        yield
@@ -0,0 +1,231 @@
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from starlette.routing import Mount, Route
+
+from mcpo.utils.compression import available_encodings, compress, negotiate
+from mcpo.utils.fastjson import dumps
+
+MERGED_OPENAPI_URL = "/openapi-merged.json"
+
+SCHEMA_REF = "#/components/schemas/"
+
+
+class SpecArtifact:
+    """
+    An OpenAPI document encoded once, together with its compressed variants
+    and an ETag, so that fetching it costs no more than sending the bytes.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        body = dumps(spec)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants: Dict[Optional[str], Tuple[bytes, str]] = {
+            None: (body, f'"{digest}"')
+        }
+        for encoding in available_encodings():
+            self.variants[encoding] = (
+                compress(body, encoding, best=True),
+                f'"{digest}-{encoding}"',
+            )
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or any(etag in tags for _, etag in self.variants.values())
+
+    def response(self, request: Request) -> Response:
+        encoding = negotiate(
+            request.headers.get("accept-encoding"),
+            [encoding for encoding in self.variants if encoding],
+        )
+        body, etag = self.variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "no-cache",
+        }
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type="application/json", headers=headers)
+
+
+def openapi_artifact(app: FastAPI) -> SpecArtifact:
+    """
+    The app's own OpenAPI document. It is rebuilt whenever app.openapi_schema
+    has been reset, which is how route changes invalidate it.
+    """
+    artifact = getattr(app.state, "openapi_artifact", None)
+    if artifact is None or app.openapi_schema is None:
+        artifact = app.state.openapi_artifact = SpecArtifact(app.openapi())
+    return artifact
+
+
+def reset_openapi(app: FastAPI):
+    """Rebuilds the app's OpenAPI document after its routes changed."""
+    app.openapi_schema = None
+    openapi_artifact(app)
+
+
+def mounted_apps(app: FastAPI) -> List[Tuple[str, FastAPI]]:
+    return [
+        (route.path, route.app)
+        for route in app.router.routes
+        if isinstance(route, Mount) and isinstance(route.app, FastAPI)
+    ]
+
+
+def _schema_refs(node: Any, found: set) -> set:
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith(SCHEMA_REF):
+            found.add(ref[len(SCHEMA_REF) :])
+        for value in node.values():
+            _schema_refs(value, found)
+    elif isinstance(node, list):
+        for value in node:
+            _schema_refs(value, found)
+    return found
+
+
+def _rewrite_refs(node: Any, renamed: Dict[str, str]) -> Any:
+    """A copy of node with $refs to renamed component schemas updated."""
+    if isinstance(node, dict):
+        copy = {key: _rewrite_refs(value, renamed) for key, value in node.items()}
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith(SCHEMA_REF):
+            name = ref[len(SCHEMA_REF) :]
+            copy["$ref"] = SCHEMA_REF + renamed.get(name, name)
+        return copy
+    if isinstance(node, list):
+        return [_rewrite_refs(value, renamed) for value in node]
+    return node
+
+
+def merge_specs(
+    base: Dict[str, Any], mounted: List[Tuple[str, str, Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Combines the main app's document with those of its mounted servers, given
+    as (mount path, server name, spec). Paths get the mount path as prefix,
+    operations are tagged with the server name, and component schemas that
+    clash with a different schema of the same name are prefixed with it.
+    """
+    merged = _rewrite_refs(base, {})
+    paths = merged.setdefault("paths", {})
+    components = merged.setdefault("components", {})
+    schemas = components.setdefault("schemas", {})
+
+    for mount_path, server_name, spec in mounted:
+        own = spec.get("components", {}).get("schemas", {})
+        renamed = {
+            name: f"{server_name}__{name}"
+            for name, schema in own.items()
+            if name in schemas and schemas[name] != schema
+        }
+        # A schema identical to an existing one can only be shared while the
+        # schemas it refers to are shared as well
+        changed = True
+        while changed:
+            changed = False
+            for name, schema in own.items():
+                if name not in renamed and name in schemas:
+                    if _schema_refs(schema, set()) & renamed.keys():
+                        renamed[name] = f"{server_name}__{name}"
+                        changed = True
+
+        for name, schema in own.items():
+            schemas.setdefault(renamed.get(name, name), _rewrite_refs(schema, renamed))
+        for section, entries in spec.get("components", {}).items():
+            if section != "schemas":
+                for name, entry in entries.items():
+                    components.setdefault(section, {}).setdefault(name, entry)
+
+        for path, operations in spec.get("paths", {}).items():
+            operations = _rewrite_refs(operations, renamed)
+            for operation in operations.values():
+                if not isinstance(operation, dict):
+                    continue
+                operation.setdefault("tags", [server_name])
+                if "operationId" in operation:
+                    operation["operationId"] = (
+                        f"{server_name}__{operation['operationId']}"
+                    )
+            paths[f"{mount_path}{path}"] = operations
+
+    if not schemas:
+        del components["schemas"]
+    if not components:
+        del merged["components"]
+    return merged
+
+
+def merged_openapi_artifact(app: FastAPI) -> SpecArtifact:
+    """
+    One document covering the main app and every mounted server. It is
+    rebuilt when a server is mounted or unmounted or its own document changes.
+    """
+    mounted = [
+        (path, sub_app, openapi_artifact(sub_app))
+        for path, sub_app in mounted_apps(app)
+    ]
+    key = (openapi_artifact(app), *((path, a) for path, _, a in mounted))
+    cached = getattr(app.state, "merged_openapi", None)
+    if cached is None or cached[0] != key:
+        spec = merge_specs(
+            app.openapi(),
+            [
+                (path, getattr(sub_app.state, "server_name", sub_app.title), spec)
+                for path, sub_app, _ in mounted
+                for spec in (sub_app.openapi(),)
+            ],
+        )
+        cached = app.state.merged_openapi = (key, SpecArtifact(spec))
+    return cached[1]
+
+
+def _add_root_path_server(app: FastAPI, request: Request):
+    # What FastAPI's own handler does, so mounted apps' docs keep working
+    root_path = request.scope.get("root_path", "").rstrip("/")
+    if (
+        root_path
+        and app.root_path_in_servers
+        and all(server.get("url") != root_path for server in app.servers)
+    ):
+        app.servers.insert(0, {"url": root_path})
+        app.openapi_schema = None
+
+
+def install_openapi_routes(app: FastAPI, merged: bool = False):
+    """
+    Replaces FastAPI's openapi.json route with one that serves the precomputed
+    artifact and, with ``merged``, adds the combined document of all servers.
+    """
+    if not app.openapi_url:
+        return
+
+    async def openapi(request: Request) -> Response:
+        _add_root_path_server(app, request)
+        return openapi_artifact(app).response(request)
+
+    app.router.routes = [
+        (
+            Route(app.openapi_url, openapi, include_in_schema=False)
+            if isinstance(route, Route) and route.path == app.openapi_url
+            else route
+        )
+        for route in app.router.routes
+    ]
+
+    if merged:
+
+        async def merged_openapi(request: Request) -> Response:
+            _add_root_path_server(app, request)
+            return merged_openapi_artifact(app).response(request)
+
+        app.add_route(MERGED_OPENAPI_URL, merged_openapi, include_in_schema=False)
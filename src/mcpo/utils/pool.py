@@ -0,0 +1,530 @@
+import asyncio
+import itertools
+import logging
+import weakref
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Dict, List, Optional
+
+import anyio
+import httpx
+from fastapi import HTTPException, status
+from mcp import ClientSession, StdioServerParameters, types
+
+from mcpo.utils.metrics import REGISTRY
+from mcpo.utils.process import child_pids, tree_rss
+from mcpo.utils.transports import (
+    HttpServerParameters,
+    ServerParameters,
+    describe,
+    http_client,
+    open_transport,
+)
+
+logger = logging.getLogger(__name__)
+
+# Receives {"event": "progress" | "log", "data": {...}} for one in-flight call
+EventCallback = Callable[[Dict[str, Any]], None]
+
+RESTARTS = REGISTRY.counter(
+    "mcpo_restarts_total",
+    "MCP server subprocess restarts",
+    ("server", "reason"),
+)
+
+# Delay before respawning a crashed server, doubled on every crash in a row
+MIN_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+# A process that stayed up this long resets the backoff
+STABLE_AFTER = 60.0
+# How long a call waits for a restarting server before it is rejected
+RESTART_WAIT = 10.0
+# How long a freshly spawned server may take to answer initialize
+INIT_TIMEOUT = 30.0
+RSS_CHECK_INTERVAL = 10.0
+
+# Connection errors raised into calls that were in flight when a server died
+CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+_progress_tokens = itertools.count(1)
+
+# Serializes spawning so a new child process can be matched to its member; a
+# lock is bound to one event loop, so there is one per loop
+_spawn_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _spawn_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _spawn_locks.get(loop)
+    if lock is None:
+        lock = _spawn_locks[loop] = asyncio.Lock()
+    return lock
+
+
+async def _wait_any(*events: asyncio.Event):
+    waiters = [asyncio.ensure_future(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+class PooledSession:
+    """
+    A single MCP server subprocess (or connection to a remote server) and the
+    ClientSession talking to it.
+
+    Once started, the member supervises its process: when the server exits it
+    is respawned with exponential backoff and initialized again, and it can be
+    recycled after ``max_calls`` calls or on request (see SessionPool). A lost
+    connection to a remote server is handled the same way.
+    """
+
+    def __init__(
+        self,
+        server_params: ServerParameters,
+        index: int = 0,
+        name: str = "",
+        max_calls: Optional[int] = None,
+        on_ready: Optional[Callable[[], None]] = None,
+        on_tools_changed: Optional[Callable[[], None]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.server_params = server_params
+        self.index = index
+        self.name = name or describe(server_params)
+        self.client = client
+        self.max_calls = max_calls
+        self.session: Optional[ClientSession] = None
+        self.init_result: Optional[types.InitializeResult] = None
+        self.pid: Optional[int] = None
+        self.in_flight = 0
+        self.calls = 0
+        self.restarts = 0
+        self.draining = False
+        self.error: Optional[BaseException] = None
+        self._on_ready = on_ready
+        self._on_tools_changed = on_tools_changed
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._recycle = asyncio.Event()
+        self._recycle_reason = ""
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._progress_listeners: Dict[Any, EventCallback] = {}
+        self._log_listeners: Dict[Any, EventCallback] = {}
+
+    @property
+    def available(self) -> bool:
+        return self.session is not None and not self.draining
+
+    async def _on_message(self, message):
+        # Runs inside the session's receive loop, so listeners must not block
+        if not isinstance(message, types.ServerNotification):
+            return
+        notification = message.root
+        if isinstance(notification, types.ProgressNotification):
+            listener = self._progress_listeners.get(notification.params.progressToken)
+            if listener:
+                listener(
+                    {
+                        "event": "progress",
+                        "data": notification.params.model_dump(
+                            mode="json", exclude_none=True, by_alias=True
+                        ),
+                    }
+                )
+        elif isinstance(notification, types.LoggingMessageNotification):
+            # Log messages aren't tied to a request, so they are only
+            # forwarded while a single call is in flight on this session;
+            # with several there's no telling whose they are.
+            if self.in_flight != 1 or len(self._log_listeners) != 1:
+                return
+            listener = next(iter(self._log_listeners.values()))
+            listener(
+                {
+                    "event": "log",
+                    "data": notification.params.model_dump(
+                        mode="json", exclude_none=True, by_alias=True
+                    ),
+                }
+            )
+        elif isinstance(notification, types.ToolListChangedNotification):
+            if self._on_tools_changed:
+                self._on_tools_changed()
+
+    async def start(self):
+        # The stdio transport and the session are entered and exited inside one
+        # dedicated task, since their anyio cancel scopes are bound to a task.
+        self._task = asyncio.create_task(self._run())
+        try:
+            await self._ready.wait()
+        except asyncio.CancelledError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            raise
+        if self.error:
+            raise self.error
+
+    def recycle(self, reason: str):
+        """Replace the process once its in-flight calls have finished."""
+        if self.session is not None and not self._recycle.is_set():
+            self._recycle_reason = reason
+            self._recycle.set()
+
+    async def _serve(self) -> str:
+        """
+        Runs one server process until it exits, is recycled or the member is
+        stopped, and returns which of "crash", the recycle reason or "stop".
+        """
+        async with AsyncExitStack() as stack:
+            if isinstance(self.server_params, StdioServerParameters):
+                async with _spawn_lock():
+                    before = child_pids()
+                    reader, writer = await stack.enter_async_context(
+                        open_transport(self.server_params)
+                    )
+                    spawned = child_pids() - before
+                    self.pid = spawned.pop() if len(spawned) == 1 else None
+            else:
+                reader, writer = await stack.enter_async_context(
+                    open_transport(self.server_params, self.client)
+                )
+
+            # The session is fed through a relay so that the end of the
+            # server's stdout, i.e. the process exiting, can be noticed.
+            closed = asyncio.Event()
+            relay_writer, relay_reader = anyio.create_memory_object_stream(0)
+
+            async def relay():
+                try:
+                    async with relay_writer:
+                        async for message in reader:
+                            await relay_writer.send(message)
+                except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                    pass
+                finally:
+                    closed.set()
+
+            task_group = await stack.enter_async_context(anyio.create_task_group())
+            stack.callback(task_group.cancel_scope.cancel)
+            task_group.start_soon(relay)
+
+            session = await stack.enter_async_context(
+                ClientSession(relay_reader, writer, message_handler=self._on_message)
+            )
+            # Pending requests are never answered once the server is gone
+            initialize = asyncio.ensure_future(session.initialize())
+            exited = asyncio.ensure_future(closed.wait())
+            stopped = asyncio.ensure_future(self._stop.wait())
+            try:
+                await asyncio.wait(
+                    [initialize, exited, stopped],
+                    timeout=INIT_TIMEOUT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                exited.cancel()
+                stopped.cancel()
+                initialize.cancel()
+            if self._stop.is_set():
+                return "stop"
+            if not initialize.done():
+                if closed.is_set():
+                    raise ConnectionError("MCP server exited during initialization")
+                raise TimeoutError(
+                    f"MCP server did not initialize within {INIT_TIMEOUT:g}s"
+                )
+            self.init_result = initialize.result()
+
+            self.error = None
+            self.calls = 0
+            self.draining = False
+            self._recycle.clear()
+            self.session = session
+            self._ready.set()
+            if self._on_ready:
+                self._on_ready()
+
+            await _wait_any(self._stop, self._recycle, closed)
+            if self._stop.is_set():
+                return "stop"
+            if closed.is_set():
+                self.session = None
+                return "crash"
+
+            # Recycling: take no new calls and let the running ones finish
+            self.draining = True
+            await _wait_any(self._idle, self._stop, closed)
+            self.session = None
+            return self._recycle_reason
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        backoff = MIN_BACKOFF
+        while True:
+            started_at = loop.time()
+            try:
+                reason = await self._serve()
+            except Exception as e:
+                self.error = e
+                reason = "crash"
+            finally:
+                self.session = None
+                self.pid = None
+
+            if not self._ready.is_set():
+                # The first spawn failed; start() reports it instead
+                self._ready.set()
+                return
+            if self._stop.is_set():
+                return
+
+            if reason == "crash":
+                if loop.time() - started_at > STABLE_AFTER:
+                    backoff = MIN_BACKOFF
+                delay = backoff
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                logger.warning(
+                    f"MCP server {self.name!r} (#{self.index}) exited"
+                    f"{f': {self.error!r}' if self.error else ''}, "
+                    f"restarting in {delay:.1f}s"
+                )
+            else:
+                delay = 0
+                logger.info(
+                    f"Recycling MCP server {self.name!r} (#{self.index}): {reason}"
+                )
+            self.restarts += 1
+            RESTARTS.inc(server=self.name, reason=reason)
+
+            if delay:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), delay)
+                    return
+                except asyncio.TimeoutError:
+                    pass
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            await self._task
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        on_event: Optional[EventCallback] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ):
+        session = self.session
+        self.in_flight += 1
+        self._idle.clear()
+        self.calls += 1
+        if self.max_calls and self.calls >= self.max_calls:
+            self.recycle("max_calls")
+        try:
+            if on_event is None and not meta:
+                return await session.call_tool(name, arguments=arguments)
+
+            request_meta = dict(meta or {})
+            token = None
+            if on_event is not None:
+                token = next(_progress_tokens)
+                self._progress_listeners[token] = on_event
+                self._log_listeners[token] = on_event
+                request_meta["progressToken"] = token
+            try:
+                params = types.CallToolRequestParams.model_validate(
+                    {"name": name, "arguments": arguments, "_meta": request_meta}
+                )
+                return await session.send_request(
+                    types.ClientRequest(
+                        types.CallToolRequest(method="tools/call", params=params)
+                    ),
+                    types.CallToolResult,
+                )
+            finally:
+                if token is not None:
+                    del self._progress_listeners[token]
+                    del self._log_listeners[token]
+        except CONNECTION_ERRORS:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="MCP server exited while handling the call",
+            )
+        finally:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self._idle.set()
+
+
+class SessionPool:
+    """
+    N identical MCP server subprocesses behind the ClientSession interface used
+    by the generated endpoints. Calls go to the least-busy member; while every
+    member is restarting they wait up to ``restart_wait`` seconds for one.
+
+    For a remote server, each member is a session of its own and all of them
+    share one HTTP client, and with it a pool of keep-alive connections.
+    """
+
+    def __init__(
+        self,
+        server_params: ServerParameters,
+        size: int = 1,
+        name: str = "",
+        max_calls: Optional[int] = None,
+        max_rss: Optional[int] = None,
+        restart_wait: float = RESTART_WAIT,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.server_params = server_params
+        self.size = size
+        self._name = name or describe(server_params)
+        self.max_calls = max_calls
+        self.max_rss = max_rss
+        self.restart_wait = restart_wait
+        self.members: List[PooledSession] = []
+        self.client: Optional[httpx.AsyncClient] = None
+        self.started = asyncio.Event()
+        self._start_lock = asyncio.Lock()
+        self._member_ready = asyncio.Event()
+        self._monitor: Optional[asyncio.Task] = None
+        # Called when a member reports notifications/tools/list_changed
+        self.on_tools_changed: Optional[Callable[[], None]] = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        # The server name used in metrics may only be known after initialize
+        self._name = name
+        for member in self.members:
+            member.name = name
+
+    @property
+    def in_flight(self) -> int:
+        return sum(member.in_flight for member in self.members)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        if isinstance(self.server_params, HttpServerParameters):
+            self.client = http_client(self.server_params)
+        self.members = [
+            PooledSession(
+                self.server_params,
+                index=i,
+                name=self.name,
+                max_calls=self.max_calls,
+                on_ready=self._member_ready.set,
+                on_tools_changed=self._tools_changed,
+                client=self.client,
+            )
+            for i in range(self.size)
+        ]
+        results = await asyncio.gather(
+            *(member.start() for member in self.members), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await self.close()
+            raise errors[0]
+        if self.max_rss:
+            self._monitor = asyncio.create_task(self._watch_rss())
+        self.started.set()
+
+    async def ensure_started(self):
+        """Spawn the pool on first use when it was not started eagerly."""
+        if self.started.is_set():
+            return
+        async with self._start_lock:
+            if not self.started.is_set():
+                await self.start()
+
+    async def close(self):
+        if self._monitor:
+            self._monitor.cancel()
+        await asyncio.gather(*(member.stop() for member in self.members))
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def _tools_changed(self):
+        if self.on_tools_changed:
+            self.on_tools_changed()
+
+    async def _watch_rss(self):
+        while True:
+            await asyncio.sleep(RSS_CHECK_INTERVAL)
+            for member in self.members:
+                if member.pid is None or not member.available:
+                    continue
+                rss = tree_rss(member.pid)
+                if rss is None:
+                    logger.warning(
+                        "Memory usage can't be measured on this platform, "
+                        f"ignoring the RSS limit of {self.name!r}"
+                    )
+                    return
+                if rss > self.max_rss:
+                    member.recycle("rss")
+
+    async def acquire(self) -> PooledSession:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.restart_wait
+        while True:
+            live = [m for m in self.members if m.available]
+            if live:
+                return min(live, key=lambda m: m.in_flight)
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="MCP server is restarting, try again later",
+                    headers={"Retry-After": "1"},
+                )
+            self._member_ready.clear()
+            try:
+                await asyncio.wait_for(self._member_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def initialize(self) -> types.InitializeResult:
+        # Every member is initialized on start; they all run the same server.
+        await self.ensure_started()
+        return self.members[0].init_result
+
+    async def list_tools(self) -> types.ListToolsResult:
+        await self.ensure_started()
+        member = await self.acquire()
+        return await member.session.list_tools()
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        on_event: Optional[EventCallback] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> types.CallToolResult:
+        await self.ensure_started()
+        member = await self.acquire()
+        return await member.call_tool(
+            name, arguments=arguments, on_event=on_event, meta=meta
+        )
@@ -0,0 +1,74 @@
+import os
+from typing import List, Optional, Set
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional, /proc is used on Linux
+    psutil = None
+
+
+def _proc_children() -> dict:
+    """Maps pid -> [child pids] for every process visible in /proc."""
+    children: dict = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces and parens, so split after it
+        ppid = int(stat[stat.rindex(")") + 2 :].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def child_pids() -> Set[int]:
+    """Pids of the direct children of this process."""
+    if psutil is not None:
+        return {p.pid for p in psutil.Process().children()}
+    if os.path.isdir("/proc"):
+        return set(_proc_children().get(os.getpid(), []))
+    return set()
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss(pid: int) -> Optional[int]:
+    """
+    Resident memory in bytes of a process and all of its descendants, since
+    servers are often started through a launcher such as npx or uvx. Returns
+    None when it can't be measured on this platform.
+    """
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            total = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return 0
+    if not os.path.isdir("/proc"):
+        return None
+    children = _proc_children()
+    pids: List[int] = [pid]
+    total = 0
+    while pids:
+        current = pids.pop()
+        total += _proc_rss(current)
+        pids.extend(children.get(current, []))
+    return total
@@ -0,0 +1,378 @@
+import hashlib
+import json
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from mcpo.utils.metrics import REGISTRY
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - the shared store is optional
+    redis = None
+
+RATE_LIMITED = REGISTRY.counter(
+    "mcpo_rate_limited_total",
+    "Requests rejected by a per-key rate limit or concurrency cap",
+    ("key", "server", "tool"),
+)
+
+# Shared-store concurrency slots of a crashed process are freed after this
+SLOT_TTL = 3600
+
+
+class Limit(NamedTuple):
+    """The limits of one scope: a key overall, or for a server or tool."""
+
+    scope: str
+    # Store key of the scope's state, derived from the key itself since
+    # names, used for messages and metrics, need not be unique
+    bucket: str
+    rate: Optional[float]
+    burst: float
+    max_concurrent: Optional[int]
+
+
+class APIKey(NamedTuple):
+    name: str
+    # (server, tool) -> Limit, with None standing for "any"
+    limits: Dict[Tuple[Optional[str], Optional[str]], Limit]
+    # Servers and tools the key may call, or None for all of them
+    scopes: Optional[Tuple[str, ...]] = None
+
+
+def key_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def parse_limit(scope: str, bucket: str, config: Dict[str, Any]) -> Optional[Limit]:
+    rate = config.get("rate")
+    max_concurrent = config.get("maxConcurrent")
+    if not rate and not max_concurrent:
+        return None
+    return Limit(
+        scope,
+        bucket,
+        rate,
+        config.get("burst") or max(1.0, rate or 1.0),
+        max_concurrent,
+    )
+
+
+def parse_key(config: Dict[str, Any]) -> APIKey:
+    """
+    One "keys" entry: {"key", "name", "scopes", "rate", "burst",
+    "maxConcurrent", "servers": {name: {...same limits, "tools": {name:
+    {...}}}}}. Rates are requests per second, refilled continuously up to
+    "burst".
+    """
+    # Names label metrics and error messages, so the key itself is never used
+    key_id = hashlib.sha256(config["key"].encode()).hexdigest()
+    name = config.get("name") or f"key-{key_id[:8]}"
+    limits = {}
+    scopes = [((None, None), name, key_id, config)]
+    for server, server_config in config.get("servers", {}).items():
+        scopes.append(
+            ((server, None), f"{name}/{server}", f"{key_id}/{server}", server_config)
+        )
+        for tool, tool_config in server_config.get("tools", {}).items():
+            scopes.append(
+                (
+                    (server, tool),
+                    f"{name}/{server}/{tool}",
+                    f"{key_id}/{server}/{tool}",
+                    tool_config,
+                )
+            )
+    for target, scope, bucket, scope_config in scopes:
+        limit = parse_limit(scope, bucket, scope_config)
+        if limit:
+            limits[target] = limit
+    scopes = config.get("scopes")
+    return APIKey(name, limits, tuple(scopes) if scopes is not None else None)
+
+
+class MemoryStore:
+    """Token buckets and concurrency counters of this process."""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._active: Dict[str, int] = {}
+
+    async def take(self, bucket: str, rate: float, burst: float) -> Tuple[bool, float]:
+        """Takes a token; returns whether there was one and how many are left."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(bucket, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[bucket] = (tokens, now)
+        return allowed, tokens
+
+    async def refund(self, bucket: str, burst: float):
+        """Gives back a token taken for a request that was then rejected."""
+        tokens, updated = self._buckets[bucket]
+        self._buckets[bucket] = (min(burst, tokens + 1), updated)
+
+    async def acquire(self, slot: str, limit: int) -> bool:
+        active = self._active.get(slot, 0)
+        if active >= limit:
+            return False
+        self._active[slot] = active + 1
+        return True
+
+    async def release(self, slot: str):
+        self._active[slot] -= 1
+
+
+TAKE_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens, updated = tonumber(state[1]), tonumber(state[2])
+if tokens == nil then
+    tokens, updated = burst, now
+end
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens, allowed = tokens - 1, 1
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+REFUND_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 't'))
+if tokens ~= nil then
+    redis.call('HSET', KEYS[1], 't', tostring(math.min(tonumber(ARGV[1]), tokens + 1)))
+end
+return 1
+"""
+
+ACQUIRE_SCRIPT = """
+local active = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if active > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+return 1
+"""
+
+
+class RedisStore:
+    """
+    The same state in Redis, shared by every mcpo process (e.g. --workers or
+    several hosts) using it. Buckets are updated atomically by Lua scripts.
+    """
+
+    def __init__(self, url: str, prefix: str = "mcpo:ratelimit:"):
+        if redis is None:
+            raise RuntimeError("A Redis rate-limit store needs the redis package")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(TAKE_SCRIPT)
+        self._refund = self.client.register_script(REFUND_SCRIPT)
+        self._acquire = self.client.register_script(ACQUIRE_SCRIPT)
+
+    async def take(self, bucket: str, rate: float, burst: float) -> Tuple[bool, float]:
+        allowed, tokens = await self._take(
+            keys=[f"{self.prefix}bucket:{bucket}"], args=[rate, burst]
+        )
+        return bool(allowed), float(tokens)
+
+    async def refund(self, bucket: str, burst: float):
+        await self._refund(keys=[f"{self.prefix}bucket:{bucket}"], args=[burst])
+
+    async def acquire(self, slot: str, limit: int) -> bool:
+        return bool(
+            await self._acquire(
+                keys=[f"{self.prefix}active:{slot}"], args=[limit, SLOT_TTL]
+            )
+        )
+
+    async def release(self, slot: str):
+        await self.client.decr(f"{self.prefix}active:{slot}")
+
+
+class RateLimiter:
+    """
+    Per-API-key rate limits and concurrency caps. Every request is checked
+    against the limits of its key overall, for the server and for the tool,
+    most specific first, and rejected with 429 when any of them is exhausted.
+    """
+
+    def __init__(self, keys: Dict[str, APIKey], store=None):
+        # Keys are looked up by digest, so lookups take no longer for
+        # tokens that share a prefix with a real key
+        self.keys = {key_digest(token): key for token, key in keys.items()}
+        self.store = store or MemoryStore()
+        self._table: Dict[Tuple[int, Optional[str], Optional[str]], List[Limit]] = {}
+
+    @classmethod
+    def from_file(cls, path: str, api_key: Optional[str] = None) -> "RateLimiter":
+        """
+        Loads {"keys": [...], "store": "redis://..."}; the --api-key, if also
+        given, is added as a key without limits.
+        """
+        with open(path, "r") as f:
+            config = json.load(f)
+        keys = {entry["key"]: parse_key(entry) for entry in config.get("keys", [])}
+        if api_key:
+            keys.setdefault(api_key, APIKey("default", {}))
+        if not keys:
+            raise ValueError(f"No API keys found in {path}")
+        store_url = config.get("store")
+        return cls(keys, RedisStore(store_url) if store_url else None)
+
+    def lookup(self, token: str) -> Optional[APIKey]:
+        return self.keys.get(key_digest(token))
+
+    def limits_for(
+        self, key: APIKey, server: Optional[str], tool: Optional[str]
+    ) -> List[Limit]:
+        # Resolved once per key, server and tool, then looked up directly
+        table_key = (id(key), server, tool)
+        limits = self._table.get(table_key)
+        if limits is None:
+            targets = [(server, tool), (server, None), (None, None)]
+            limits = self._table[table_key] = [
+                key.limits[target]
+                for target in dict.fromkeys(targets)
+                if target in key.limits and (target[1] is None or tool is not None)
+            ]
+        return limits
+
+    def _reject(self, key: APIKey, server, tool, detail: str, headers):
+        RATE_LIMITED.inc(key=key.name, server=server or "", tool=tool or "")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers=headers,
+        )
+
+    async def acquire(
+        self, key: APIKey, server: Optional[str], tool: Optional[str]
+    ) -> List[str]:
+        """
+        Checks the request against every applicable limit and returns the
+        concurrency slots it took, to be given back with release(). A
+        rejected request takes nothing, not even from the limits it passed.
+        """
+        limits = self.limits_for(key, server, tool)
+        taken = []
+        for limit in limits:
+            if not limit.rate:
+                continue
+            allowed, tokens = await self.store.take(
+                limit.bucket, limit.rate, limit.burst
+            )
+            if allowed:
+                taken.append(limit)
+            else:
+                await self._refund(taken)
+                retry_after = max(1, math.ceil((1 - tokens) / limit.rate))
+                self._reject(
+                    key,
+                    server,
+                    tool,
+                    f"Rate limit of {limit.scope} exceeded",
+                    {
+                        "Retry-After": str(retry_after),
+                        "RateLimit-Limit": str(int(limit.burst)),
+                        "RateLimit-Remaining": "0",
+                        "RateLimit-Reset": str(retry_after),
+                    },
+                )
+
+        slots = []
+        for limit in limits:
+            if not limit.max_concurrent:
+                continue
+            if not await self.store.acquire(limit.bucket, limit.max_concurrent):
+                await self.release(slots)
+                await self._refund(taken)
+                self._reject(
+                    key,
+                    server,
+                    tool,
+                    f"Too many concurrent requests for {limit.scope}",
+                    {"Retry-After": "1"},
+                )
+            slots.append(limit.bucket)
+        return slots
+
+    async def _refund(self, limits: List[Limit]):
+        for limit in limits:
+            await self.store.refund(limit.bucket, limit.burst)
+
+    async def release(self, slots: List[str]):
+        for slot in slots:
+            await self.store.release(slot)
+
+
+class ReleaseSlotsMiddleware:
+    """
+    Releases the concurrency slots a request took once its response has been
+    sent. Endpoints return streamed responses (SSE, NDJSON) before the body
+    is sent, so releasing slots then would let clients exceed their caps.
+    """
+
+    def __init__(self, app, rate_limiter: RateLimiter):
+        self.app = app
+        self.rate_limiter = rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Shared with request.state, where the auth dependency adds its slots
+        slots: List[str] = []
+        state = scope.setdefault("state", {})
+        state["rate_limit_slots"] = slots
+        state["rate_limiter"] = self.rate_limiter
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.rate_limiter.release(slots)
+
+
+def detach_slots(request: Request) -> Callable[[], Awaitable[None]]:
+    """
+    Takes the request's concurrency slots away from ReleaseSlotsMiddleware,
+    for work that outlives the response such as a background job. Returns an
+    async function that releases them.
+    """
+    held = getattr(request.state, "rate_limit_slots", None) or []
+    rate_limiter = getattr(request.state, "rate_limiter", None)
+    slots = list(held)
+    held.clear()
+
+    async def release():
+        if rate_limiter is not None:
+            await rate_limiter.release(slots)
+
+    return release
+
+
+def server_name(app) -> str:
+    return getattr(app.state, "server_name", None) or app.title
+
+
+def request_target(request: Request) -> Tuple[Optional[str], Optional[str]]:
+    """The server and tool a request is for; the tool is None for other routes."""
+    app = request.app
+    server = server_name(app)
+    tool = None
+    route = request.scope.get("route")
+    if route is not None:
+        name = route.path.strip("/").split("/", 1)[0]
+        if name in getattr(app.state, "tool_executors", {}):
+            tool = name
+    return server, tool
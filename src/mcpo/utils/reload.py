@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI
+from starlette.routing import Mount
+
+from mcpo.utils.startup import SubAppLifespan, start_all
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the config file's modification time
+WATCH_INTERVAL = 2.0
+# How long a removed or replaced server may finish its in-flight calls
+DRAIN_TIMEOUT = 30.0
+
+
+def load_servers(config_path: str) -> Dict[str, Dict[str, Any]]:
+    with open(config_path, "r") as f:
+        config_data = json.load(f)
+    mcp_servers = config_data.get("mcpServers", {})
+    if not mcp_servers:
+        raise ValueError("No 'mcpServers' found in config file.")
+    return mcp_servers
+
+
+class ConfigReloader:
+    """
+    Applies edits of the --config file to the running main app. New servers
+    are started and mounted, servers whose entry changed are started again and
+    swapped in once the new instance is up, and removed or replaced servers are
+    unmounted and stopped after their in-flight calls have drained. Servers
+    whose entry didn't change keep running untouched.
+
+    A reload is triggered by reload(), by SIGHUP, or, with ``watch``, whenever
+    the file's modification time changes.
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        config_path: str,
+        create_app: Callable[[str, Dict[str, Any]], FastAPI],
+        path_prefix: str = "/",
+        on_reload: Optional[Callable[[List[str]], None]] = None,
+        watch: bool = False,
+        drain_timeout: float = DRAIN_TIMEOUT,
+    ):
+        self.app = app
+        self.config_path = config_path
+        self.create_app = create_app
+        self.path_prefix = path_prefix
+        self.on_reload = on_reload
+        self.watch = watch
+        self.drain_timeout = drain_timeout
+        self.runners: Dict[str, SubAppLifespan] = {}
+        self._mtime = self._stat()
+        self._lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _mounts(self) -> Dict[str, Mount]:
+        return {
+            route.app.state.server_name: route
+            for route in self.app.router.routes
+            if isinstance(route, Mount) and isinstance(route.app, FastAPI)
+        }
+
+    def _failed(self, name: str) -> bool:
+        runner = self.runners.get(name)
+        return runner is None or runner.error is not None
+
+    def start(self, runners: List[SubAppLifespan]):
+        self.runners = {runner.name: runner for runner in runners}
+        if hasattr(signal, "SIGHUP"):
+            try:
+                asyncio.get_running_loop().add_signal_handler(
+                    signal.SIGHUP, self._on_sighup
+                )
+            except (NotImplementedError, RuntimeError):
+                pass
+        if self.watch:
+            self._watcher = asyncio.create_task(self._watch())
+
+    def _on_sighup(self):
+        logger.info("Received SIGHUP, reloading config")
+        self._spawn(self._logged(self.reload()))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _logged(self, coro):
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"Could not reload {self.config_path}: {e!r}")
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            mtime = self._stat()
+            if mtime is not None and mtime != self._mtime:
+                logger.info(f"{self.config_path} changed, reloading")
+                await self._logged(self.reload())
+
+    async def reload(self) -> Dict[str, List[str]]:
+        async with self._lock:
+            return await self._reload()
+
+    async def _reload(self) -> Dict[str, List[str]]:
+        self._mtime = self._stat()
+        servers = load_servers(self.config_path)
+        mounts = self._mounts()
+
+        changes = {"added": [], "changed": [], "removed": [], "failed": []}
+        for name, server_cfg in servers.items():
+            if name not in mounts:
+                changes["added"].append(name)
+            elif mounts[name].app.state.server_config != server_cfg or self._failed(
+                name
+            ):
+                changes["changed"].append(name)
+        changes["removed"] = [name for name in mounts if name not in servers]
+        if not any(changes.values()):
+            return changes
+
+        runners = {
+            name: SubAppLifespan(
+                name,
+                sub_app,
+                timeout=getattr(sub_app.state, "startup_timeout", None),
+            )
+            for name in changes["added"] + changes["changed"]
+            for sub_app in (self.create_app(name, servers[name]),)
+        }
+        started = {runner.name for runner in await start_all(list(runners.values()))}
+        changes["failed"] = [name for name in runners if name not in started]
+        for name in changes["changed"]:
+            if name not in started and not self._failed(name):
+                # Keep the running instance rather than swap in a broken one
+                del runners[name]
+
+        retired = []
+        routes = []
+        for route in self.app.router.routes:
+            name = (
+                route.app.state.server_name
+                if isinstance(route, Mount) and isinstance(route.app, FastAPI)
+                else None
+            )
+            if name in changes["removed"] or name in runners:
+                if name in self.runners:
+                    retired.append(self.runners.pop(name))
+                if name in changes["removed"]:
+                    continue
+                route = Mount(f"{self.path_prefix}{name}", app=runners[name].app)
+            routes.append(route)
+        routes += [
+            Mount(f"{self.path_prefix}{name}", app=runners[name].app)
+            for name in changes["added"]
+        ]
+        self.app.router.routes = routes
+        self.runners.update(runners)
+        self.app.openapi_schema = None
+        if self.on_reload:
+            self.on_reload(list(servers))
+
+        for runner in retired:
+            self._spawn(self._retire(runner))
+        logger.info(
+            "Reloaded config: "
+            + ", ".join(f"{kind} {names}" for kind, names in changes.items() if names)
+        )
+        return changes
+
+    async def _retire(self, runner: SubAppLifespan):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.drain_timeout
+        session = getattr(runner.app.state, "session", None)
+        while session is not None and session.in_flight and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+        await runner.stop()
+        logger.info(f"MCP server '{runner.name}' stopped")
+
+    async def close(self):
+        if hasattr(signal, "SIGHUP"):
+            try:
+                asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            except (NotImplementedError, RuntimeError):
+                pass
+        if self._watcher:
+            self._watcher.cancel()
+        tasks = list(self._tasks)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*(runner.stop() for runner in self.runners.values()))
@@ -0,0 +1,90 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from mcpo.utils.singleflight import SingleFlight
+
+
+def canonical_key(args: Dict[str, Any]) -> str:
+    return json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ResultCache:
+    """
+    TTL + LRU cache for the processed responses of an idempotent tool, bounded
+    both by entry count and by an approximate byte budget.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 128,
+        max_bytes: Optional[int] = None,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # key -> (stored_at, size, value)
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._in_flight = SingleFlight()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, size, value = entry
+        age = time.monotonic() - stored_at
+        if age > self.ttl:
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return value, age
+
+    def put(self, key: str, value: Any, size: int):
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = (time.monotonic(), size, value)
+        self.total_bytes += size
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+
+    async def _fill(self, key: str, call) -> Any:
+        value, size, cacheable = await call()
+        if cacheable:
+            self.put(key, value, size)
+        return value
+
+    async def get_or_call(
+        self, key: str, call: Callable[[], Awaitable[Tuple[Any, int, bool]]]
+    ) -> Tuple[Any, str, float]:
+        """
+        Returns (value, status, age) with status HIT, MISS or SHARED.
+        ``call`` returns (value, size, cacheable); concurrent misses for the
+        same key share a single call.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached[0], "HIT", cached[1]
+
+        value, shared = await self._in_flight.do(key, lambda: self._fill(key, call))
+        return value, "SHARED" if shared else "MISS", 0.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["ResultCache"]:
+        if not config or not config.get("ttl"):
+            return None
+        return cls(
+            config["ttl"],
+            max_entries=config.get("maxEntries", 128),
+            max_bytes=config.get("maxBytes"),
+        )
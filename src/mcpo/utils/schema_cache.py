@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from mcp import types
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaCache:
+    """
+    On-disk cache of each MCP server's serverInfo and tool list, so routes can
+    be registered at startup without waiting for the server subprocess.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.expanduser(directory)
+
+    @staticmethod
+    def key(command: str, args: List[str], env: Dict[str, str]) -> str:
+        # Only the env configured for the server is hashed; the inherited
+        # process environment varies between shells and would never hit.
+        env_hash = hashlib.sha256(
+            json.dumps(env or {}, sort_keys=True).encode()
+        ).hexdigest()
+        payload = json.dumps({"command": command, "args": args, "env": env_hash})
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(
+        self, key: str
+    ) -> Optional[Tuple[Optional[types.Implementation], List[types.Tool]]]:
+        try:
+            with open(self._path(key), "r") as f:
+                data = json.load(f)
+            server_info = data.get("serverInfo")
+            return (
+                (
+                    types.Implementation.model_validate(server_info)
+                    if server_info
+                    else None
+                ),
+                [types.Tool.model_validate(tool) for tool in data.get("tools", [])],
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable schema cache entry {key}: {e!r}")
+            return None
+
+    def save(
+        self,
+        key: str,
+        server_info: Optional[types.Implementation],
+        tools: List[types.Tool],
+    ):
+        os.makedirs(self.directory, exist_ok=True)
+        data = {
+            "serverInfo": server_info.model_dump(mode="json") if server_info else None,
+            "tools": [tool.model_dump(mode="json") for tool in tools],
+        }
+        # Write then rename so a crash never leaves a truncated entry behind.
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._path(key))
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the
+    call, later callers wait on the same task and all receive its result.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here so lone failures aren't logged
+
+    async def do(
+        self, key: str, call: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Returns (value, shared). The underlying call keeps running even if the
+        request that started it goes away, as other callers may be waiting.
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task), shared
+
+    def __len__(self):
+        return len(self._calls)
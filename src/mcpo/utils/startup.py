@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+
+class SubAppLifespan:
+    """
+    Runs a mounted sub-app's lifespan in its own task so that several MCP
+    servers can start (and later stop) independently of each other.
+    """
+
+    def __init__(self, name: str, app: FastAPI, timeout: Optional[float] = None):
+        self.name = name
+        self.app = app
+        self.timeout = timeout
+        self.error: Optional[BaseException] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        try:
+            async with self.app.router.lifespan_context(self.app):  # noqa
+                self._ready.set()
+                await self._stop.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._ready.set()
+
+    async def start(self) -> bool:
+        timeout = self.timeout
+        start_time = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self.error = TimeoutError(f"startup exceeded {timeout}s")
+
+        elapsed = time.perf_counter() - start_time
+        if self.error:
+            logger.error(
+                f"MCP server '{self.name}' failed to start after {elapsed:.2f}s: "
+                f"{self.error!r}"
+            )
+            return False
+        logger.info(f"MCP server '{self.name}' started in {elapsed:.2f}s")
+        return True
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def start_all(runners: list) -> list:
+    """Start every runner concurrently; returns the ones that came up."""
+    start_time = time.perf_counter()
+    results = await asyncio.gather(*(runner.start() for runner in runners))
+    started = [runner for runner, ok in zip(runners, results) if ok]
+    logger.info(
+        f"Started {len(started)}/{len(runners)} MCP servers in "
+        f"{time.perf_counter() - start_time:.2f}s"
+    )
+    return started
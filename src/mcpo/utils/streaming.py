@@ -0,0 +1,135 @@
+import asyncio
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from mcp import types
+from mcp.types import CallToolResult
+from sse_starlette.sse import EventSourceResponse
+
+from mcpo.utils.blobs import BlobStore, encode_resource, store_base64
+from mcpo.utils.fastjson import dumps, encode_text, is_base64
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+
+# Base64 is sent in slices so a large image is never copied into one string
+CHUNK_SIZE = 64 * 1024
+
+
+def stream_mode(request: Request) -> Optional[str]:
+    """Returns "ndjson", "json" or None when the client didn't ask to stream."""
+    accept = request.headers.get("accept", "")
+    if any(media_type in accept for media_type in NDJSON_MEDIA_TYPES):
+        return "ndjson"
+    stream = request.query_params.get("stream", "").lower()
+    if stream == "ndjson":
+        return "ndjson"
+    if stream in ("1", "true", "json"):
+        return "json"
+    return None
+
+
+async def iter_content_item(
+    content, ndjson: bool, blobs: Optional[BlobStore] = None
+) -> AsyncIterator[bytes]:
+    if isinstance(content, types.TextContent):
+        encoded = encode_text(content.text)
+        if ndjson:
+            # Raw newlines can only be insignificant whitespace in valid JSON
+            encoded = encoded.replace(b"\r", b" ").replace(b"\n", b" ")
+        yield encoded
+    elif isinstance(content, types.ImageContent):
+        url = store_base64(blobs, content.data, content.mimeType)
+        if url is not None:
+            yield dumps(url)
+            return
+        data = content.data
+        if not is_base64(data):
+            yield dumps(f"data:{content.mimeType};base64,{data}")
+            return
+        yield dumps(f"data:{content.mimeType};base64,")[:-1]
+        for start in range(0, len(data), CHUNK_SIZE):
+            yield data[start : start + CHUNK_SIZE].encode()
+        yield b'"'
+    elif isinstance(content, types.EmbeddedResource):
+        yield encode_resource(content.resource, blobs)
+
+
+async def iter_tool_response(
+    result: CallToolResult, ndjson: bool, blobs: Optional[BlobStore] = None
+) -> AsyncIterator[bytes]:
+    """Streams the same items process_tool_response would return."""
+    if not ndjson:
+        yield b"["
+    first = True
+    for content in result.content:
+        if not isinstance(
+            content, (types.TextContent, types.ImageContent, types.EmbeddedResource)
+        ):
+            continue
+        if not ndjson and not first:
+            yield b","
+        first = False
+        async for chunk in iter_content_item(content, ndjson, blobs):
+            yield chunk
+        if ndjson:
+            yield b"\n"
+    if not ndjson:
+        yield b"]"
+
+
+def stream_tool_response(
+    result: CallToolResult, mode: str, blobs: Optional[BlobStore] = None
+) -> StreamingResponse:
+    ndjson = mode == "ndjson"
+    return StreamingResponse(
+        iter_tool_response(result, ndjson, blobs),
+        media_type=NDJSON_MEDIA_TYPES[0] if ndjson else "application/json",
+    )
+
+
+async def iter_tool_events(
+    call_tool, args: dict, encode: Callable[[CallToolResult], bytes]
+) -> AsyncIterator[dict]:
+    """
+    Runs a tool call and yields SSE events: progress and log notifications as
+    they arrive, then a final result (or error) event. If the client goes away
+    the call is cancelled.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    call = asyncio.ensure_future(call_tool(args, on_event=queue.put_nowait))
+    get = None
+    try:
+        while not call.done() or not queue.empty():
+            if queue.empty():
+                get = asyncio.ensure_future(queue.get())
+                await asyncio.wait({get, call}, return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    continue
+                event = get.result()
+            else:
+                event = queue.get_nowait()
+            yield {"event": event["event"], "data": dumps(event["data"]).decode()}
+
+        try:
+            result = call.result()
+        except HTTPException as e:
+            error = {"status": e.status_code, "detail": e.detail}
+            yield {"event": "error", "data": dumps(error).decode()}
+            return
+        except Exception as e:
+            error = {"status": 500, "detail": str(e)}
+            yield {"event": "error", "data": dumps(error).decode()}
+            return
+        yield {"event": "result", "data": encode(result).decode()}
+    finally:
+        for future in (get, call):
+            if future is not None and not future.done():
+                future.cancel()
+
+
+def sse_tool_response(
+    call_tool, args: dict, encode: Callable[[CallToolResult], bytes]
+) -> EventSourceResponse:
+    return EventSourceResponse(iter_tool_events(call_tool, args, encode))
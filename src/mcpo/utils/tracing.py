@@ -0,0 +1,163 @@
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # pragma: no cover - tracing is optional
+    propagate = trace = None
+
+logger = logging.getLogger(__name__)
+
+EXPORTERS = ("otlp", "console", "file", "memory")
+
+_tracer = None
+# The SDK provider set up by configure_tracing, shut down by shutdown_tracing
+_provider = None
+
+# Finished spans when tracing with the "memory" exporter, for offline tests
+memory_exporter = None
+
+
+def configure_tracing(
+    exporter: Optional[str] = None, file: Optional[str] = None
+) -> bool:
+    """
+    Turns tracing on. Without an exporter, spans go to whatever tracer provider
+    is already installed (e.g. by opentelemetry-instrument); otherwise an SDK
+    provider is set up that exports over OTLP, to the console, as JSON lines to
+    ``file`` or to ``memory_exporter``. Returns False if tracing is unavailable.
+    """
+    global _tracer, _provider, memory_exporter
+    if trace is None:
+        logger.warning("Tracing requested but opentelemetry-api is not installed")
+        return False
+
+    if exporter:
+        if exporter not in EXPORTERS:
+            raise ValueError(
+                f"Unknown trace exporter {exporter!r}, expected one of {EXPORTERS}"
+            )
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import (
+                BatchSpanProcessor,
+                ConsoleSpanExporter,
+                SimpleSpanProcessor,
+            )
+        except ImportError:
+            logger.warning(f"The {exporter!r} trace exporter needs opentelemetry-sdk")
+            return False
+
+        if exporter == "otlp":
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                    OTLPSpanExporter,
+                )
+            except ImportError:
+                logger.warning(
+                    "The 'otlp' trace exporter needs opentelemetry-exporter-otlp"
+                )
+                return False
+            processor = BatchSpanProcessor(OTLPSpanExporter())
+        elif exporter == "console":
+            processor = SimpleSpanProcessor(ConsoleSpanExporter())
+        elif exporter == "file":
+
+            class FileSpanExporter(ConsoleSpanExporter):
+                def shutdown(self):
+                    self.out.close()
+
+            out = open(file or "mcpo-traces.jsonl", "a", encoding="utf-8")
+            processor = SimpleSpanProcessor(
+                FileSpanExporter(
+                    out=out, formatter=lambda span: span.to_json(indent=None) + "\n"
+                )
+            )
+        else:
+            from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+                InMemorySpanExporter,
+            )
+
+            memory_exporter = InMemorySpanExporter()
+            processor = SimpleSpanProcessor(memory_exporter)
+
+        provider = TracerProvider(resource=Resource.create({"service.name": "mcpo"}))
+        provider.add_span_processor(processor)
+        trace.set_tracer_provider(provider)
+        _provider = provider
+
+    _tracer = trace.get_tracer("mcpo")
+    return True
+
+
+def shutdown_tracing():
+    """Flushes the exporter set up by configure_tracing and closes its file."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _tracer = _provider = None
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, kind="internal"):
+    """Starts a child span of the current one, or does nothing when disabled."""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(
+        name, kind=trace.SpanKind[kind.upper()], attributes=attributes
+    ) as current:
+        yield current
+
+
+def inject_meta() -> Dict[str, str]:
+    """W3C trace context (traceparent, tracestate) for an MCP request's _meta."""
+    carrier: Dict[str, str] = {}
+    if _tracer is not None:
+        propagate.inject(carrier)
+    return carrier
+
+
+class TracingMiddleware:
+    """
+    Opens a server span for every HTTP request, continuing the caller's trace
+    when it sent a traceparent header. Mounted server apps are covered too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=propagate.extract(headers),
+            kind=trace.SpanKind.SERVER,
+            attributes={
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+            },
+        ) as current:
+
+            async def traced_send(message):
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    current.set_attribute("http.response.status_code", status_code)
+                    if status_code >= 500:
+                        current.set_status(trace.StatusCode.ERROR)
+                await send(message)
+
+            await self.app(scope, receive, traced_send)
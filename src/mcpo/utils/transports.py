@@ -0,0 +1,284 @@
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Literal, Optional, Union
+from urllib.parse import urljoin, urlparse
+
+import anyio
+import httpx
+from httpx_sse import EventSource, aconnect_sse
+from mcp import StdioServerParameters, types
+from mcp.client.stdio import stdio_client
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# "type" values accepted in the config, by the transport they select
+TRANSPORT_ALIASES = {
+    "stdio": "stdio",
+    "sse": "sse",
+    "streamable-http": "streamable-http",
+    "streamable_http": "streamable-http",
+    "streamablehttp": "streamable-http",
+    "http": "streamable-http",
+}
+
+SESSION_HEADER = "mcp-session-id"
+
+# Idle keep-alive connections kept open per remote server
+KEEPALIVE_CONNECTIONS = 32
+
+
+class HttpServerParameters(BaseModel):
+    """A remote MCP server reached over SSE or streamable HTTP."""
+
+    transport: Literal["sse", "streamable-http"]
+    url: str
+    headers: Dict[str, str] = Field(default_factory=dict)
+    timeout: float = 30
+    """Seconds to connect and to send a message."""
+    sse_read_timeout: float = 300
+    """Seconds to wait for the next event of a response stream."""
+
+
+ServerParameters = Union[StdioServerParameters, HttpServerParameters]
+
+
+def transport_type(value: Optional[str], url: Optional[str] = None) -> str:
+    """The transport named by a config "type", defaulting by whether a URL is set."""
+    if not value:
+        return "streamable-http" if url else "stdio"
+    transport = TRANSPORT_ALIASES.get(value.lower())
+    if transport is None:
+        raise ValueError(
+            f"Unknown MCP server type {value!r}, expected stdio, sse or streamable-http"
+        )
+    return transport
+
+
+def describe(server_params: ServerParameters) -> str:
+    if isinstance(server_params, HttpServerParameters):
+        return server_params.url
+    return server_params.command
+
+
+def http_client(server_params: HttpServerParameters) -> httpx.AsyncClient:
+    """
+    A client whose keep-alive connections are shared by every session of a
+    pool, so messages don't pay for a new connection each time.
+    """
+    return httpx.AsyncClient(
+        headers=server_params.headers,
+        timeout=httpx.Timeout(server_params.timeout),
+        limits=httpx.Limits(
+            max_connections=None, max_keepalive_connections=KEEPALIVE_CONNECTIONS
+        ),
+    )
+
+
+def open_transport(
+    server_params: ServerParameters, client: Optional[httpx.AsyncClient] = None
+):
+    """The (read stream, write stream) context of a server's transport."""
+    if isinstance(server_params, StdioServerParameters):
+        return stdio_client(server_params)
+    if client is None:
+        raise ValueError("HTTP transports need a client")
+    if server_params.transport == "sse":
+        return sse_transport(client, server_params)
+    return streamable_http_transport(client, server_params)
+
+
+def _dump(message: types.JSONRPCMessage) -> dict:
+    return message.model_dump(by_alias=True, mode="json", exclude_none=True)
+
+
+@asynccontextmanager
+async def sse_transport(client: httpx.AsyncClient, server_params: HttpServerParameters):
+    """
+    The HTTP+SSE transport (MCP 2024-11-05) over a shared client: server
+    messages arrive on one event stream, client messages are POSTed to the
+    endpoint it announces.
+    """
+    url = server_params.url
+    read_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_reader = anyio.create_memory_object_stream(0)
+
+    async def read_events(event_source, task_status=anyio.TASK_STATUS_IGNORED):
+        try:
+            async for sse in event_source.aiter_sse():
+                if sse.event == "endpoint":
+                    endpoint = urljoin(url, sse.data)
+                    if urlparse(endpoint)[:2] != urlparse(url)[:2]:
+                        raise ValueError(
+                            f"Endpoint origin does not match connection origin: "
+                            f"{endpoint}"
+                        )
+                    task_status.started(endpoint)
+                elif sse.event == "message":
+                    try:
+                        message = types.JSONRPCMessage.model_validate_json(sse.data)
+                    except Exception as exc:
+                        await read_writer.send(exc)
+                        continue
+                    await read_writer.send(message)
+        finally:
+            await read_writer.aclose()
+
+    async def write_messages(endpoint: str):
+        try:
+            async with write_reader:
+                async for message in write_reader:
+                    response = await client.post(endpoint, json=_dump(message))
+                    response.raise_for_status()
+        except httpx.HTTPError as exc:
+            logger.warning(f"Could not send to MCP server at {url}: {exc!r}")
+            await read_writer.aclose()
+
+    async with anyio.create_task_group() as task_group:
+        try:
+            async with aconnect_sse(
+                client,
+                "GET",
+                url,
+                timeout=httpx.Timeout(
+                    server_params.timeout, read=server_params.sse_read_timeout
+                ),
+            ) as event_source:
+                event_source.response.raise_for_status()
+                endpoint = await task_group.start(read_events, event_source)
+                task_group.start_soon(write_messages, endpoint)
+                try:
+                    yield read_stream, write_stream
+                finally:
+                    task_group.cancel_scope.cancel()
+        finally:
+            await read_writer.aclose()
+            await write_stream.aclose()
+
+
+@asynccontextmanager
+async def streamable_http_transport(
+    client: httpx.AsyncClient, server_params: HttpServerParameters
+):
+    """
+    The streamable HTTP transport (MCP 2025-03-26) over a shared client. Every
+    client message is a POST, answered by JSON or by an event stream carrying
+    the response; the session id assigned on initialization is sent along. A
+    GET stream, if the server offers one, delivers its notifications.
+
+    A request the server rejects gets a JSON-RPC error as its response; an
+    unreachable server or an expired session closes the transport, so that
+    the pool reconnects.
+    """
+    url = server_params.url
+    read_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_reader = anyio.create_memory_object_stream(0)
+    stream_timeout = httpx.Timeout(
+        server_params.timeout, read=server_params.sse_read_timeout
+    )
+    session_id: Optional[str] = None
+
+    def request_headers(accept: str) -> Dict[str, str]:
+        headers = {"Accept": accept}
+        if session_id:
+            headers[SESSION_HEADER] = session_id
+        return headers
+
+    async def forward(response: httpx.Response):
+        content_type = response.headers.get("content-type", "")
+        if content_type.startswith("text/event-stream"):
+            async for sse in EventSource(response).aiter_sse():
+                if sse.event == "message" and sse.data:
+                    await read_writer.send(
+                        types.JSONRPCMessage.model_validate_json(sse.data)
+                    )
+        elif content_type.startswith("application/json"):
+            body = json.loads(await response.aread())
+            for item in body if isinstance(body, list) else [body]:
+                await read_writer.send(types.JSONRPCMessage.model_validate(item))
+
+    async def post(message: types.JSONRPCMessage):
+        nonlocal session_id
+        try:
+            async with client.stream(
+                "POST",
+                url,
+                json=_dump(message),
+                headers=request_headers("application/json, text/event-stream"),
+                timeout=stream_timeout,
+            ) as response:
+                if response.status_code == 404 and session_id:
+                    raise ConnectionError("MCP session expired")
+                response.raise_for_status()
+                session_id = response.headers.get(SESSION_HEADER, session_id)
+                await forward(response)
+        except httpx.HTTPStatusError as exc:
+            if isinstance(message.root, types.JSONRPCRequest):
+                await read_writer.send(
+                    types.JSONRPCMessage(
+                        types.JSONRPCError(
+                            jsonrpc="2.0",
+                            id=message.root.id,
+                            error=types.ErrorData(
+                                code=types.INTERNAL_ERROR, message=str(exc)
+                            ),
+                        )
+                    )
+                )
+            else:
+                logger.warning(f"MCP server at {url} rejected a message: {exc}")
+        except (httpx.TransportError, ConnectionError) as exc:
+            logger.warning(f"Lost connection to MCP server at {url}: {exc!r}")
+            await read_writer.aclose()
+        except ValueError as exc:
+            # A malformed message, reported like the other transports do
+            await read_writer.send(exc)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            pass
+        if (
+            isinstance(message.root, types.JSONRPCNotification)
+            and message.root.method == "notifications/initialized"
+        ):
+            task_group.start_soon(listen)
+
+    async def listen():
+        try:
+            async with client.stream(
+                "GET",
+                url,
+                headers=request_headers("text/event-stream"),
+                timeout=httpx.Timeout(server_params.timeout, read=None),
+            ) as response:
+                if response.status_code == 405:
+                    return  # The server sends no unsolicited messages
+                response.raise_for_status()
+                await forward(response)
+        except (httpx.HTTPError, anyio.ClosedResourceError) as exc:
+            logger.debug(f"Notification stream of {url} ended: {exc!r}")
+
+    async def write_messages():
+        async with write_reader:
+            async for message in write_reader:
+                # Responses can be long streams, so requests run side by side
+                task_group.start_soon(post, message)
+
+    try:
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(write_messages)
+            try:
+                yield read_stream, write_stream
+            finally:
+                task_group.cancel_scope.cancel()
+    finally:
+        await read_writer.aclose()
+        await write_stream.aclose()
+        if session_id:
+            # Let the server free the session; it expires it eventually anyway
+            with anyio.move_on_after(2, shield=True):
+                try:
+                    await client.delete(
+                        url, headers=request_headers("application/json")
+                    )
+                except httpx.HTTPError:
+                    pass
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# How long the first worker may take to start its MCP servers
+LEADER_TIMEOUT = 300.0
+# How long workers get to finish in-flight requests on shutdown
+SHUTDOWN_TIMEOUT = 30.0
+
+# Forwarded to every worker to refresh the tools of all servers
+REFRESH_SIGNAL = getattr(signal, "SIGUSR1", None)
+# Forwarded to every worker to reload the config file
+RELOAD_SIGNAL = getattr(signal, "SIGHUP", None)
+
+
+def _ignore_forwarded_signals():
+    # They would otherwise terminate the worker until run() handles them,
+    # and SIGHUP is never handled without a config file to reload
+    for signum in (RELOAD_SIGNAL, REFRESH_SIGNAL):
+        if signum is not None:
+            signal.signal(signum, signal.SIG_IGN)
+
+
+def _worker(run_args: Dict[str, Any], sockets: list, ready):
+    _ignore_forwarded_signals()
+    from mcpo.main import run
+
+    asyncio.run(run(**run_args, sockets=sockets, ready=ready))
+
+
+def notify_workers(signum: int):
+    """
+    Called in a worker to have the supervisor forward ``signum`` to every
+    worker, this one included, so that e.g. an admin request applies to all.
+    """
+    os.kill(os.getppid(), signum)
+
+
+class WorkerSupervisor:
+    """
+    Serves one listening socket from several shared-nothing mcpo processes,
+    each with its own MCP server pools.
+
+    The first worker starts alone and writes every server's tool schemas to
+    the schema cache (a temporary one unless --schema-cache is given). The
+    others then start from the cache with lazy spawning, so they register
+    their routes right away but only launch MCP servers (and e.g. run npx)
+    once they actually receive a call for them. With ``eager`` every worker
+    starts its servers up front. Workers that exit are started again, and
+    SIGHUP (reload, with --config) and SIGUSR1 (refresh tools) are forwarded
+    to all of them.
+
+    Background jobs are kept in a shared directory so that any worker can
+    report them, whichever one runs them. Metrics are not shared: /metrics
+    reports those of the worker that answers, labelled with its index.
+    """
+
+    def __init__(
+        self, run_args: Dict[str, Any], workers: int, eager: bool = False
+    ) -> None:
+        self.run_args = run_args
+        self.workers = workers
+        self.eager = eager
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.sockets: list = []
+        self._stop = asyncio.Event()
+        self._cache_dir: Optional[str] = None
+        self._blob_dir: Optional[str] = None
+        self._job_dir: Optional[str] = None
+
+    def _args(self, index: int) -> Dict[str, Any]:
+        args = dict(self.run_args, worker=index)
+        if index > 0 and not self.eager:
+            args["lazy_spawn"] = True
+        return args
+
+    def _start(self, index: int, ready=None) -> multiprocessing.Process:
+        process = self.context.Process(
+            target=_worker,
+            args=(self._args(index), self.sockets, ready),
+            name=f"mcpo-worker-{index}",
+        )
+        process.start()
+        self.processes[index] = process
+        logger.info(f"Started worker {index} (pid {process.pid})")
+        return process
+
+    async def _start_leader(self) -> bool:
+        ready = self.context.Event()
+        leader = self._start(0, ready)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + LEADER_TIMEOUT
+        while not ready.is_set():
+            if self._stop.is_set():
+                return False
+            if not leader.is_alive():
+                logger.error("First worker exited during startup")
+                return False
+            if loop.time() > deadline:
+                logger.error("First worker did not start in time")
+                return False
+            await asyncio.sleep(0.1)
+        return True
+
+    def _forwarded_signals(self) -> List[int]:
+        # Without a config file there is nothing to reload
+        signals = [REFRESH_SIGNAL]
+        if self.run_args.get("config"):
+            signals.append(RELOAD_SIGNAL)
+        return [signum for signum in signals if signum is not None]
+
+    def _signal_all(self, signum: int):
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                os.kill(process.pid, signum)
+
+    async def serve(self, host: str, port: int, **ssl):
+        if not self.run_args.get("schema_cache"):
+            self._cache_dir = tempfile.mkdtemp(prefix="mcpo-schema-cache-")
+            self.run_args["schema_cache"] = self._cache_dir
+        if self.run_args.get("blob_store") == "memory":
+            # Any worker may be asked for a blob, so they share a directory
+            self._blob_dir = tempfile.mkdtemp(prefix="mcpo-blobs-")
+            self.run_args["blob_store"] = self._blob_dir
+        self._job_dir = tempfile.mkdtemp(prefix="mcpo-jobs-")
+        self.run_args["job_dir"] = self._job_dir
+        config = uvicorn.Config(app=None, host=host, port=port, **ssl)
+        self.sockets = [config.bind_socket()]
+
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._stop.set)
+        for signum in self._forwarded_signals():
+            loop.add_signal_handler(signum, self._signal_all, signum)
+        if RELOAD_SIGNAL is not None and RELOAD_SIGNAL not in self._forwarded_signals():
+            loop.add_signal_handler(
+                RELOAD_SIGNAL, logger.info, "No config file to reload, ignoring SIGHUP"
+            )
+
+        try:
+            if await self._start_leader():
+                for index in range(1, self.workers):
+                    self._start(index)
+                while not self._stop.is_set():
+                    for index, process in enumerate(self.processes):
+                        if not process.is_alive():
+                            logger.warning(
+                                f"Worker {index} exited with code "
+                                f"{process.exitcode}, restarting it"
+                            )
+                            self._start(index)
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), 1.0)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            await self._shutdown()
+            for sock in self.sockets:
+                sock.close()
+            for directory in (self._cache_dir, self._blob_dir, self._job_dir):
+                if directory:
+                    shutil.rmtree(directory, ignore_errors=True)
+
+    async def _shutdown(self):
+        self._signal_all(signal.SIGTERM)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SHUTDOWN_TIMEOUT
+        for process in self.processes:
+            if process is None:
+                continue
+            while process.is_alive() and loop.time() < deadline:
+                await asyncio.sleep(0.1)
+            if process.is_alive():
+                process.kill()
+            process.join()
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from mcp import StdioServerParameters
+
+from mcpo.main import lifespan
+from mcpo.utils.fastjson import FastJSONResponse
+
+STUB_SERVER = os.path.join(os.path.dirname(__file__), "stub_server.py")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def stub_params():
+    return StdioServerParameters(
+        command=sys.executable,
+        args=[STUB_SERVER],
+    )
+
+
+@pytest.fixture
+def make_server_app():
+    """Builds a single-server app for the stub server, with the given state."""
+
+    def make(**state) -> FastAPI:
+        app = FastAPI(
+            title="stub",
+            lifespan=lifespan,
+            default_response_class=FastJSONResponse,
+        )
+        app.state.command = sys.executable
+        app.state.args = [STUB_SERVER]
+        app.state.env = os.environ.copy()
+        for name, value in state.items():
+            setattr(app.state, name, value)
+        return app
+
+    return make
@@ -0,0 +1,80 @@
+"""
+Stub MCP server for the tests, run over stdio.
+
+    python tests/stub_server.py
+
+or over HTTP+SSE, on the port in $FASTMCP_PORT:
+
+    python tests/stub_server.py sse
+
+While the file named by $STUB_HANG_FILE exists, the server starts without
+ever answering.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+from mcp.server.fastmcp import Context, FastMCP
+
+mcp = FastMCP("test-stub")
+
+
+@mcp.tool()
+async def echo(text: str, delay: float = 0.0) -> str:
+    """Return text after an optional delay."""
+    await asyncio.sleep(delay)
+    return text
+
+
+@mcp.tool()
+async def pid(delay: float = 0.0) -> str:
+    """Return the server's process id."""
+    await asyncio.sleep(delay)
+    return str(os.getpid())
+
+
+@mcp.tool()
+def data(count: int = 3) -> str:
+    """Return a JSON document as text."""
+    return json.dumps({"items": list(range(count))})
+
+
+@mcp.tool()
+async def steps(count: int, ctx: Context, delay: float = 0.02, tag: str = "") -> str:
+    """Report progress and log a message for each step."""
+    for i in range(count):
+        await ctx.report_progress(i, count)
+        await ctx.info(f"{tag}step {i}")
+        await asyncio.sleep(delay)
+    return "done"
+
+
+@mcp.tool()
+def meta(ctx: Context) -> str:
+    """Return the _meta of the request."""
+    request_meta = ctx.request_context.meta
+    return json.dumps(request_meta.model_dump() if request_meta else None)
+
+
+@mcp.tool()
+async def grow(ctx: Context) -> str:
+    """Add a tool and notify the client that the tool list changed."""
+    name = f"extra{len(mcp._tool_manager.list_tools())}"
+    mcp.add_tool(lambda x: str(x), name=name, description="Added at runtime")
+    await ctx.session.send_tool_list_changed()
+    return name
+
+
+@mcp.tool()
+def die() -> str:
+    """Exit the process without answering."""
+    os._exit(1)
+
+
+if __name__ == "__main__":
+    while os.path.exists(os.environ.get("STUB_HANG_FILE", "")):
+        time.sleep(0.1)
+    mcp.run(sys.argv[1] if len(sys.argv) > 1 else "stdio")
@@ -0,0 +1,68 @@
+import os
+import runpy
+
+import pytest
+import uvicorn
+from starlette.testclient import TestClient
+
+import app as chat_app
+
+JSON_ROUTES = [
+    "/api/chat",
+    "/api/files/list",
+    "/api/files/read",
+    "/api/files/write",
+    "/api/files/search",
+    "/api/files/info",
+]
+
+
+@pytest.fixture
+def client():
+    with TestClient(chat_app.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", JSON_ROUTES)
+@pytest.mark.parametrize("body", [b"{not json", b"[1, 2]", b'"text"', b"\xff"])
+def test_bad_json_is_rejected(client, path, body):
+    response = client.post(
+        path, content=body, headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_missing_fields(client):
+    assert client.post("/api/chat", json={"message": "  "}).status_code == 400
+    assert client.post("/api/files/read", json={}).status_code == 400
+    assert client.post("/api/files/info", json={}).status_code == 400
+
+
+def test_file_operations_run_off_the_event_loop(client, monkeypatch):
+    monkeypatch.setattr(chat_app, "fs_read_file", lambda path: {"content": path})
+    response = client.post("/api/files/read", json={"path": "notes.txt"})
+    assert response.json() == {"content": "notes.txt"}
+
+
+def test_history_is_kept_in_the_session(client):
+    client.get("/")
+    assert client.get("/api/history").json() == {"messages": []}
+    assert client.post("/api/clear").json() == {"status": "success"}
+
+
+@pytest.mark.parametrize(
+    "reload, expected", [(None, (chat_app.app.__class__, False)), ("1", (str, True))]
+)
+def test_main(monkeypatch, reload, expected):
+    calls = []
+    monkeypatch.setattr(
+        uvicorn, "run", lambda app, **kwargs: calls.append((app, kwargs))
+    )
+    if reload:
+        monkeypatch.setenv("APP_RELOAD", reload)
+    else:
+        monkeypatch.delenv("APP_RELOAD", raising=False)
+    runpy.run_path(os.path.join(chat_app.BASE_DIR, "app.py"), run_name="__main__")
+    [(app, kwargs)] = calls
+    assert (type(app), kwargs.get("reload", False)) == expected
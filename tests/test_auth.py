@@ -0,0 +1,176 @@
+import json
+import time
+from typing import List
+
+import jwt
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from mcpo.utils.auth import (
+    JWTVerifier,
+    call_authorizer,
+    compile_scopes,
+    get_verify_api_key,
+    get_verify_api_keys,
+    token_scopes,
+)
+from mcpo.utils.batch import BatchCall, run_batch
+from mcpo.utils.fastjson import dumps
+from mcpo.utils.ratelimit import RateLimiter, parse_key
+
+SECRET = "test-secret-of-at-least-32-bytes!"
+
+
+def make_token(expires_in: float = 60, **claims) -> str:
+    return jwt.encode({"exp": time.time() + expires_in, **claims}, SECRET)
+
+
+def make_server(name: str) -> FastAPI:
+    app = FastAPI(title=name)
+    app.state.server_name = name
+
+    async def execute(args):
+        return dumps(["ok"]), False
+
+    app.state.tool_executors = {"read": (None, execute), "write": (None, execute)}
+    return app
+
+
+def make_app(dependency, rate_limiter=None, batch_dependency=None) -> FastAPI:
+    """A main app with a mounted "files" server and a /batch route."""
+    files = make_server("files")
+
+    @files.post("/read", dependencies=[Depends(dependency)])
+    async def read():
+        return ["ok"]
+
+    app = FastAPI()
+
+    @app.post("/batch", dependencies=[Depends(batch_dependency or dependency)])
+    async def batch(calls: List[BatchCall], request: Request):
+        body = await run_batch(
+            calls,
+            lambda server: files if server == "files" else None,
+            8,
+            authorize=call_authorizer(request, rate_limiter),
+        )
+        return json.loads(body)
+
+    app.mount("/files", files)
+    return app
+
+
+def test_compile_scopes():
+    everything = compile_scopes(("*",))
+    assert everything.allows("any", "tool")
+
+    scopes = compile_scopes(("time", "files/read"))
+    assert scopes.allows("time", None)
+    assert scopes.allows("time", "now")
+    assert scopes.allows("files", "read")
+    assert not scopes.allows("files", "write")
+    # Other routes of a server with an allowed tool, e.g. its docs
+    assert scopes.allows("files", None)
+    assert not scopes.allows("other", None)
+    assert compile_scopes(("time", "files/read")) is scopes
+
+
+def test_token_scopes():
+    assert token_scopes({"scope": "a b/c"}) == ("a", "b/c")
+    assert token_scopes({"scopes": ["a"]}) == ("a",)
+    assert token_scopes({}) == ()
+
+
+def test_jwt_verifier_caches_until_expiry():
+    verifier = JWTVerifier(SECRET, ["HS256"])
+    token = make_token(sub="alice", scope="files")
+    verified = verifier.verify(token)
+    assert verified.subject == "alice"
+    assert verified.scopes.allows("files", "read")
+    assert verifier.verify(token) is verified
+
+    verifier._cache[token] = verified._replace(expires=time.time() - 1)
+    assert verifier.verify(token) is not verified
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        jwt.encode({"exp": time.time() + 60}, "another-secret-of-at-least-32-bytes"),
+        jwt.encode({"sub": "no-expiry"}, SECRET),
+        jwt.encode({"exp": time.time() - 60}, SECRET),
+    ],
+)
+def test_jwt_verifier_rejects(token):
+    with pytest.raises(HTTPException) as error:
+        JWTVerifier(SECRET, ["HS256"]).verify(token)
+    assert error.value.status_code == 401
+
+
+def test_jwt_cache_is_bounded():
+    verifier = JWTVerifier(SECRET, ["HS256"], cache_size=2)
+    for i in range(3):
+        verifier.verify(make_token(sub=str(i)))
+    assert len(verifier._cache) == 2
+
+
+def test_static_api_key():
+    client = TestClient(make_app(get_verify_api_key("key")))
+    assert client.post("/files/read").status_code == 401
+    wrong = client.post("/files/read", headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 403
+    right = client.post("/files/read", headers={"Authorization": "Bearer key"})
+    assert right.status_code == 200
+
+
+def test_route_scopes():
+    verifier = JWTVerifier(SECRET, ["HS256"])
+    client = TestClient(make_app(get_verify_api_keys(jwt_verifier=verifier)))
+    allowed = make_token(scope="files/read")
+    denied = make_token(scope="time")
+    for token, expected in ((allowed, 200), (denied, 403)):
+        response = client.post(
+            "/files/read", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == expected
+
+
+def batch_statuses(client: TestClient, token: str) -> list:
+    response = client.post(
+        "/batch",
+        json=[
+            {"server": "files", "tool": "read"},
+            {"server": "files", "tool": "write"},
+        ],
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    return [item.get("status", 200) for item in response.json()]
+
+
+def test_batch_checks_jwt_scopes_per_call():
+    verifier = JWTVerifier(SECRET, ["HS256"])
+    client = TestClient(
+        make_app(
+            get_verify_api_keys(jwt_verifier=verifier),
+            batch_dependency=get_verify_api_keys(jwt_verifier=verifier, per_call=True),
+        )
+    )
+    assert batch_statuses(client, make_token(scope="files/read")) == [200, 403]
+    assert batch_statuses(client, make_token(scope="files")) == [200, 200]
+    assert batch_statuses(client, make_token(scope="time")) == [403, 403]
+
+
+def test_batch_checks_key_scopes_per_call():
+    rate_limiter = RateLimiter(
+        {"scoped": parse_key({"key": "scoped", "scopes": ["files/read"]})}
+    )
+    client = TestClient(
+        make_app(
+            get_verify_api_keys(rate_limiter),
+            rate_limiter,
+            batch_dependency=get_verify_api_keys(rate_limiter, per_call=True),
+        )
+    )
+    assert batch_statuses(client, "scoped") == [200, 403]
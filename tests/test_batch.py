@@ -0,0 +1,152 @@
+import asyncio
+import json
+from typing import List, Optional
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from pydantic import create_model
+
+from mcpo.utils.auth import call_authorizer, get_verify_api_keys
+from mcpo.utils.batch import BatchCall, run_batch
+from mcpo.utils.fastjson import dumps
+from mcpo.utils.ratelimit import RateLimiter, parse_key
+
+EchoModel = create_model("echo_form_model", text=(str, ...))
+
+
+def make_server(name: str) -> FastAPI:
+    app = FastAPI(title=name)
+    app.state.server_name = name
+
+    async def echo(args):
+        await asyncio.sleep(0.01)
+        return dumps([args["text"]]), False
+
+    async def fail(args):
+        raise HTTPException(status_code=503, detail="busy")
+
+    async def crash(args):
+        raise RuntimeError("boom")
+
+    app.state.tool_executors = {
+        "echo": (EchoModel, echo),
+        "fail": (None, fail),
+        "crash": (None, crash),
+    }
+    return app
+
+
+SERVERS = {"a": make_server("a"), "b": make_server("b")}
+
+
+def resolve(server: Optional[str]) -> Optional[FastAPI]:
+    return SERVERS.get(server)
+
+
+def make_app(rate_limiter: RateLimiter) -> FastAPI:
+    # Like the /batch route of mcpo.main.run
+    app = FastAPI()
+    verify = get_verify_api_keys(rate_limiter, per_call=True)
+
+    @app.post("/batch", dependencies=[Depends(verify)])
+    async def batch(calls: List[BatchCall], request: Request):
+        body = await run_batch(
+            calls, resolve, 8, authorize=call_authorizer(request, rate_limiter)
+        )
+        return json.loads(body)
+
+    return app
+
+
+@pytest.mark.anyio
+async def test_results_in_request_order():
+    calls = [
+        BatchCall(server="b", tool="echo", arguments={"text": "first"}),
+        BatchCall(server="a", tool="echo", arguments={"text": "second"}),
+        BatchCall(server="a", tool="missing"),
+        BatchCall(server="a", tool="echo", arguments={}),
+        BatchCall(server="a", tool="fail"),
+        BatchCall(server="a", tool="crash"),
+    ]
+    items = json.loads(await run_batch(calls, resolve, 2))
+    assert items[0] == {"ok": True, "result": ["first"]}
+    assert items[1] == {"ok": True, "result": ["second"]}
+    assert [item.get("status") for item in items[2:]] == [404, 422, 503, 500]
+    assert items[5]["error"] == "boom"
+
+
+def test_batch_calls_count_against_tool_limits():
+    rate_limiter = RateLimiter(
+        {
+            "secret": parse_key(
+                {
+                    "key": "secret",
+                    "servers": {"a": {"tools": {"echo": {"rate": 0.001, "burst": 1}}}},
+                }
+            )
+        }
+    )
+    client = TestClient(make_app(rate_limiter))
+    calls = [
+        {"server": "a", "tool": "echo", "arguments": {"text": "x"}},
+        {"server": "a", "tool": "echo", "arguments": {"text": "y"}},
+        {"server": "b", "tool": "echo", "arguments": {"text": "z"}},
+    ]
+    response = client.post(
+        "/batch", json=calls, headers={"Authorization": "Bearer secret"}
+    )
+    assert response.status_code == 200
+    statuses = [item.get("status", 200) for item in response.json()]
+    assert sorted(statuses[:2]) == [200, 429]
+    assert statuses[2] == 200
+
+
+def test_batch_calls_count_against_concurrency_caps():
+    rate_limiter = RateLimiter(
+        {"secret": parse_key({"key": "secret", "servers": {"a": {"maxConcurrent": 1}}})}
+    )
+    client = TestClient(make_app(rate_limiter))
+    calls = [{"server": "a", "tool": "echo", "arguments": {"text": "x"}}] * 3
+    response = client.post(
+        "/batch", json=calls, headers={"Authorization": "Bearer secret"}
+    )
+    statuses = [item.get("status", 200) for item in response.json()]
+    assert statuses.count(200) == 1
+    assert statuses.count(429) == 2
+    assert not any(rate_limiter.store._active.values())
+
+
+@pytest.mark.anyio
+async def test_concurrency_is_bounded():
+    running, peak = 0, 0
+
+    async def track(args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return b"[]", {}
+
+    app = FastAPI()
+    app.state.tool_executors = {"track": (None, track)}
+    calls = [BatchCall(tool="track")] * 7
+    items = json.loads(await run_batch(calls, lambda server: app, 3))
+    assert items == [{"ok": True, "result": []}] * 7
+    assert peak == 3
+
+
+def test_batch_against_a_server(make_server_app):
+    app = make_server_app()
+    calls = [
+        BatchCall(tool="echo", arguments={"text": "hi"}),
+        BatchCall(tool="data", arguments={"count": 2}),
+        BatchCall(tool="echo"),
+    ]
+    with TestClient(app) as client:
+        body = client.portal.call(run_batch, calls, lambda server: app, 8)
+    items = json.loads(body)
+    assert items[0] == {"ok": True, "result": ["hi"]}
+    assert items[1] == {"ok": True, "result": [{"items": [0, 1]}]}
+    assert items[2]["status"] == 422
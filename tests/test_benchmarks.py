@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.load_test import percentile
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+
+
+def test_percentile():
+    values = sorted(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+def test_load_test_smoke_run(tmp_path):
+    output = tmp_path / "results.json"
+    subprocess.run(
+        [
+            sys.executable,
+            os.path.join(BENCHMARKS, "load_test.py"),
+            "--mode",
+            "both",
+            "--servers",
+            "2",
+            "--tool",
+            "image",
+            "--concurrency",
+            "1,2",
+            "--requests",
+            "4",
+            "--output",
+            str(output),
+        ],
+        check=True,
+        capture_output=True,
+        timeout=120,
+    )
+    results = json.loads(output.read_text())["results"]
+    assert [(r["mode"], r["concurrency"]) for r in results] == [
+        ("single", 1),
+        ("single", 2),
+        ("config", 1),
+        ("config", 2),
+    ]
+    assert all(r["errors"] == 0 and r["throughput"] > 0 for r in results)
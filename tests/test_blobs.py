@@ -0,0 +1,150 @@
+import base64
+import json
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from mcp import types
+
+from mcpo.utils.blobs import (
+    BLOB_PATH,
+    BlobStore,
+    blob_response,
+    encode_binary,
+    encode_resource,
+    parse_range,
+)
+
+DATA = bytes(range(256)) * 32  # 8 KiB, above the inline threshold
+
+
+def blob_id_of(url: bytes) -> str:
+    return json.loads(url).rsplit("/", 1)[1]
+
+
+def make_client(store: BlobStore) -> TestClient:
+    app = FastAPI()
+
+    @app.api_route(f"{BLOB_PATH}/{{blob_id}}", methods=["GET", "HEAD"])
+    async def get_blob(blob_id: str, request: Request):
+        blob = store.get(blob_id)
+        if blob is None:
+            raise HTTPException(status_code=404)
+        return blob_response(request, blob_id, blob)
+
+    return TestClient(app)
+
+
+def test_small_data_stays_inline():
+    store = BlobStore()
+    data = base64.b64encode(b"tiny").decode()
+    assert json.loads(encode_binary(data, "image/png", store)) == (
+        f"data:image/png;base64,{data}"
+    )
+
+
+def test_large_data_becomes_url():
+    store = BlobStore()
+    url = encode_binary(base64.b64encode(DATA).decode(), "image/png", store)
+    assert json.loads(url).startswith(f"{BLOB_PATH}/")
+    blob = store.get(blob_id_of(url))
+    assert blob.data == DATA
+    assert blob.mime_type == "image/png"
+
+
+def test_hostile_data_is_not_stored_or_injected():
+    store = BlobStore(min_size=1)
+    hostile = 'AAAA","injected":"' + "A" * 8192
+    encoded = encode_binary(hostile, "image/png", store)
+    assert json.loads(encoded) == f"data:image/png;base64,{hostile}"
+    assert not store._memory
+
+
+def test_text_resources():
+    store = BlobStore()
+    small = types.TextResourceContents(uri="file:///a", text="hello")
+    assert json.loads(encode_resource(small, store)) == "hello"
+    large = types.TextResourceContents(uri="file:///b", text="x" * 5000)
+    blob = store.get(blob_id_of(encode_resource(large, store)))
+    assert blob.data == b"x" * 5000
+    assert blob.mime_type.startswith("text/plain")
+
+
+def test_memory_is_bounded_and_spills_to_disk(tmp_path):
+    store = BlobStore(max_memory=10000, directory=str(tmp_path), min_size=1)
+    first = store.put(DATA, "a/b")
+    second = store.put(DATA[::-1], "a/b")
+    assert store._memory_size <= 10000
+    assert store.get(first).path == os.path.join(tmp_path, first)
+    assert store.get(second).data == DATA[::-1]
+
+
+def test_disk_is_bounded(tmp_path):
+    store = BlobStore(max_memory=0, directory=str(tmp_path), max_disk=10000)
+    first = store.put(DATA, "a/b")
+    store.put(DATA[::-1], "a/b")
+    assert store.get(first) is None
+    assert not os.path.exists(os.path.join(tmp_path, first))
+
+
+def test_without_directory_large_blobs_are_refused():
+    store = BlobStore(max_memory=100)
+    assert store.put(DATA, "a/b") is None
+
+
+def test_shared_store_is_visible_to_other_workers(tmp_path):
+    writer = BlobStore(directory=str(tmp_path), shared=True)
+    reader = BlobStore(directory=str(tmp_path), shared=True)
+    blob_id = writer.put(DATA, "image/png")
+    blob = reader.get(blob_id)
+    assert blob.mime_type == "image/png"
+    with open(blob.path, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_invalid_ids_are_rejected(tmp_path):
+    store = BlobStore(directory=str(tmp_path))
+    assert store.get("../../etc/passwd") is None
+    assert store.get("0" * 64) is None
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=0-999", 100) == (0, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+@pytest.mark.parametrize("directory", [False, True])
+def test_blob_responses(tmp_path, directory):
+    store = BlobStore(
+        max_memory=0 if directory else 1 << 20,
+        directory=str(tmp_path) if directory else None,
+    )
+    blob_id = store.put(DATA, "image/png")
+    client = make_client(store)
+    url = f"{BLOB_PATH}/{blob_id}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    etag = response.headers["etag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    partial = client.get(url, headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == DATA[10:20]
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(DATA)}"
+
+    unsatisfiable = client.get(url, headers={"Range": f"bytes={len(DATA)}-"})
+    assert unsatisfiable.status_code == 416
+
+    assert client.get(f"{BLOB_PATH}/{'0' * 64}").status_code == 404
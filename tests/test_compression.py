@@ -0,0 +1,129 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from mcpo.utils.compression import (
+    CompressionMiddleware,
+    compression_policy,
+    negotiate,
+    parse_accept_encoding,
+)
+
+BODY = b'{"text": "' + b"lorem ipsum " * 200 + b'"}'
+
+
+def make_app(**options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, **options)
+
+    @app.get("/json")
+    async def json_body():
+        return Response(BODY, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    @app.get("/data-url")
+    async def data_url():
+        body = b'["data:image/png;base64,' + b"A" * 4000 + b'"]'
+        return Response(body, media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield BODY
+            yield BODY
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.get("/opt-out")
+    async def opt_out(request: Request):
+        request.state.compress_min_size = None
+        return Response(BODY, media_type="application/json")
+
+    return app
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.5, zstd;q=x, ,") == {
+        "gzip": 1.0,
+        "br": 0.5,
+        "zstd": 0.0,
+    }
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("*", "zstd"),
+        ("gzip;q=0.5, br", "br"),
+        ("*;q=0.5, gzip;q=0", "zstd"),
+        ("zstd;q=0, br;q=0, gzip;q=0", None),
+    ],
+)
+def test_negotiate(header, expected):
+    assert negotiate(header, ("zstd", "br", "gzip")) == expected
+
+
+def test_compression_policy():
+    assert compression_policy(None, "t", 1024) == 1024
+    assert compression_policy(False, "t", 1024) is None
+    assert compression_policy({"enabled": False}, "t", 1024) is None
+    config = {"minSize": 10, "tools": {"off": False, "big": {"minSize": 99}}}
+    assert compression_policy(config, "t", 1024) == 10
+    assert compression_policy(config, "off", 1024) is None
+    assert compression_policy(config, "big", 1024) == 99
+
+
+def test_json_is_compressed():
+    client = TestClient(make_app())
+    response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < len(BODY)
+    assert response.content == BODY
+
+    # Large bodies are compressed off the event loop, with the same result
+    client = TestClient(make_app(offload_size=1))
+    response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == BODY
+
+
+@pytest.mark.parametrize(
+    "path", ["/small", "/image", "/data-url", "/stream", "/opt-out"]
+)
+def test_sent_as_is(path):
+    client = TestClient(make_app())
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_no_accept_encoding():
+    client = TestClient(make_app())
+    response = client.get("/json", headers={"Accept-Encoding": ""})
+    assert "Content-Encoding" not in response.headers
+    assert response.content == BODY
+
+
+def test_tool_responses_are_compressed(make_server_app):
+    app = make_server_app(compression={"tools": {"echo": {"minSize": 10}}})
+    app.add_middleware(CompressionMiddleware)
+    text = "x" * 100
+    with TestClient(app) as client:
+        response = client.post(
+            "/echo", json={"text": text}, headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.json() == [text]
+        response = client.post("/data", json={}, headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from mcp import types
+from mcp.types import CallToolResult
+
+from mcpo.main import encode_tool_response, process_tool_response
+from mcpo.utils import fastjson
+from mcpo.utils.blobs import encode_binary
+from mcpo.utils.fastjson import dumps, encode_text, is_base64, is_json
+
+
+def result(*content) -> CallToolResult:
+    return CallToolResult(content=list(content))
+
+
+def text(value: str) -> types.TextContent:
+    return types.TextContent(type="text", text=value)
+
+
+def image(data: str, mime_type: str = "image/png") -> types.ImageContent:
+    return types.ImageContent(type="image", data=data, mimeType=mime_type)
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(fastjson, "orjson", None)
+    elif fastjson.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_is_json_is_strict(backend):
+    assert is_json('{"a": [1, 2.5, null]}')
+    assert is_json('"text"')
+    assert not is_json("plain text")
+    assert not is_json("NaN")
+    assert not is_json('{"a": 1} trailing')
+
+
+def test_is_base64():
+    assert is_base64("")
+    assert is_base64("QUJD")
+    assert is_base64("QUI=")
+    assert is_base64("a+b/")
+    assert not is_base64('AAA","injected')
+    assert not is_base64("QU\nJD")
+    assert not is_base64("Q===")
+
+
+def test_encode_matches_process_tool_response(backend):
+    tool_result = result(
+        text('{"files": ["a", "b"], "count": 2}'),
+        text("not json"),
+        text("[1, 2, 3]"),
+        image("iVBORw0KGgo="),
+    )
+    encoded = encode_tool_response(tool_result)
+    assert json.loads(encoded) == process_tool_response(tool_result)
+
+
+def test_json_text_is_passed_through_verbatim(backend):
+    raw = '{"b": 1,   "a": [1,2]}'
+    assert encode_text(raw) == raw.encode()
+
+
+def test_hostile_image_data_is_escaped(backend):
+    hostile = 'AAA","injected'
+    encoded = encode_tool_response(result(image(hostile)))
+    assert json.loads(encoded) == [f"data:image/png;base64,{hostile}"]
+    assert json.loads(encode_binary(hostile, "image/png")) == (
+        f"data:image/png;base64,{hostile}"
+    )
+
+
+def test_hostile_mime_type_is_escaped(backend):
+    encoded = encode_tool_response(result(image("QUJD", 'image/png","x')))
+    assert json.loads(encoded) == ['data:image/png","x;base64,QUJD']
+
+
+def test_lone_surrogate_is_escaped(backend):
+    assert dumps("\ud800") == b'"\\ud800"'
+    encoded = encode_tool_response(result(text("bad \ud800 text")))
+    assert json.loads(encoded) == ["bad \ud800 text"]
+
+
+def test_lone_surrogate_inside_json_text(backend):
+    encoded = encode_text('{"a": "\ud800"}')
+    assert json.loads(encoded) == {"a": "\ud800"}
+
+
+def test_unserializable_content_still_raises(backend):
+    with pytest.raises(TypeError):
+        dumps(object())
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from fastapi.responses import StreamingResponse
+from mcp import types
+from mcp.types import CallToolResult
+
+from mcpo.utils.instrumentation import (
+    CALL_DURATION,
+    ERRORS,
+    IN_FLIGHT,
+    PROCESS_DURATION,
+    REQUEST_DURATION,
+    REQUESTS,
+    RESPONSE_BYTES,
+    instrument_call,
+    instrument_encode,
+    instrument_handler,
+)
+from mcpo.utils.metrics import REGISTRY, Registry
+
+
+def observed(histogram, labels) -> tuple:
+    """(count, sum) of a histogram's series."""
+    counts, total = histogram._series.get(histogram._key(labels), ([0], [0.0]))
+    return sum(counts), total[0]
+
+
+def value(metric, labels) -> float:
+    return metric._values.get(metric._key(labels), 0)
+
+
+@pytest.mark.anyio
+async def test_handler_is_counted_and_timed():
+    labels = {"server": "s", "tool": "plain"}
+
+    async def handle():
+        await asyncio.sleep(0.01)
+        return "response"
+
+    assert await instrument_handler(handle, labels)() == "response"
+    assert value(REQUESTS, labels) == 1
+    assert value(IN_FLIGHT, labels) == 0
+    count, total = observed(REQUEST_DURATION, labels)
+    assert count == 1 and total >= 0.01
+
+
+@pytest.mark.anyio
+async def test_streamed_responses_are_timed_until_the_body_is_sent():
+    labels = {"server": "s", "tool": "stream"}
+
+    async def body():
+        for chunk in (b"a", b"b"):
+            await asyncio.sleep(0.05)
+            yield chunk
+
+    async def handle():
+        return StreamingResponse(body())
+
+    response = await instrument_handler(handle, labels)()
+    assert value(IN_FLIGHT, labels) == 1
+    assert observed(REQUEST_DURATION, labels)[0] == 0
+
+    assert [chunk async for chunk in response.body_iterator] == [b"a", b"b"]
+    assert value(IN_FLIGHT, labels) == 0
+    count, total = observed(REQUEST_DURATION, labels)
+    assert count == 1 and total >= 0.1
+
+
+@pytest.mark.anyio
+async def test_failures_are_still_timed():
+    labels = {"server": "s", "tool": "fails"}
+
+    async def handle():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await instrument_handler(handle, labels)()
+    assert value(IN_FLIGHT, labels) == 0
+    assert observed(REQUEST_DURATION, labels)[0] == 1
+
+
+@pytest.mark.anyio
+async def test_call_errors_are_counted():
+    labels = {"server": "s", "tool": "call"}
+
+    async def call_tool(name, arguments=None, **kwargs):
+        return CallToolResult(content=[], isError=arguments["error"])
+
+    call = instrument_call(call_tool, labels)
+    await call("call", arguments={"error": False})
+    await call("call", arguments={"error": True})
+    assert value(ERRORS, labels) == 1
+    assert observed(CALL_DURATION, labels)[0] == 2
+
+
+def test_encode_records_size():
+    labels = {"server": "s", "tool": "encode"}
+    result = CallToolResult(content=[types.TextContent(type="text", text="x" * 100)])
+    body = instrument_encode(lambda r: b"x" * 100, labels)(result)
+    assert observed(RESPONSE_BYTES, labels) == (1, len(body))
+    assert observed(PROCESS_DURATION, labels)[0] == 1
+
+
+def test_render():
+    text = REGISTRY.render()
+    assert "# TYPE mcpo_requests_total counter" in text
+    assert (
+        'mcpo_request_duration_seconds_bucket{server="s",tool="plain",le="+Inf"} 1'
+        in text
+    )
+
+
+def test_const_labels_are_added_to_every_series():
+    registry = Registry()
+    registry.counter("calls_total", "Calls", ("tool",)).inc(tool="t")
+    registry.histogram("latency_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+    registry.const_labels["worker"] = "1"
+    text = registry.render()
+    assert 'calls_total{tool="t",worker="1"} 1' in text
+    assert 'latency_seconds_bucket{worker="1",le="1.0"} 1' in text
+    assert 'latency_seconds_count{worker="1"} 1' in text
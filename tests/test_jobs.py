@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from mcpo.utils import jobs as jobs_module
+from mcpo.utils.auth import get_verify_api_keys
+from mcpo.utils.jobs import JobStore
+from mcpo.utils.ratelimit import RateLimiter, ReleaseSlotsMiddleware, parse_key
+
+
+async def wait_done(store: JobStore, job_id: str):
+    for _ in range(100):
+        job = store.get(job_id)
+        if job.done:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def returning(body: bytes, delay: float = 0, is_error: bool = False):
+    async def run():
+        await asyncio.sleep(delay)
+        return body, is_error
+
+    return run
+
+
+@pytest.mark.anyio
+async def test_job_lifecycle():
+    store = JobStore()
+    job = store.submit("echo", returning(b'["hi"]', delay=0.05))
+    assert store.get(job.id).status in ("pending", "running")
+    job = await wait_done(store, job.id)
+    assert job.status == "completed"
+    assert job.result == b'["hi"]'
+    assert job.to_dict()["tool"] == "echo"
+
+
+@pytest.mark.anyio
+async def test_failed_and_error_results():
+    store = JobStore()
+
+    async def fail():
+        raise HTTPException(status_code=500, detail="boom")
+
+    failed = await wait_done(store, store.submit("t", fail).id)
+    assert failed.status == "failed"
+    assert failed.error == "boom"
+    errored = await wait_done(
+        store, store.submit("t", returning(b"[]", is_error=True)).id
+    )
+    assert errored.status == "failed"
+    assert errored.result == b"[]"
+
+
+@pytest.mark.anyio
+async def test_cancel():
+    store = JobStore()
+    job = store.submit("slow", returning(b"[]", delay=10))
+    await asyncio.sleep(0)
+    job = await store.cancel(job.id)
+    assert job.status == "cancelled"
+    assert job.finished_at is not None
+
+
+@pytest.mark.anyio
+async def test_unknown_and_expired_jobs(monkeypatch):
+    store = JobStore(ttl=60)
+    with pytest.raises(HTTPException) as error:
+        store.get("missing")
+    assert error.value.status_code == 404
+
+    job = await wait_done(store, store.submit("t", returning(b"[]")).id)
+    monkeypatch.setattr(jobs_module.time, "time", lambda: job.finished_at + 61)
+    with pytest.raises(HTTPException):
+        store.get(job.id)
+
+
+@pytest.mark.anyio
+async def test_full_store_evicts_finished_jobs_or_refuses():
+    store = JobStore(max_jobs=1)
+    first = await wait_done(store, store.submit("t", returning(b"[]")).id)
+    second = store.submit("t", returning(b"[]", delay=10))
+    with pytest.raises(HTTPException):
+        store.get(first.id)
+    with pytest.raises(HTTPException) as error:
+        store.submit("t", returning(b"[]"))
+    assert error.value.status_code == 503
+    await store.close()
+    assert second.task is None or second.task.cancelled()
+
+
+@pytest.mark.anyio
+async def test_shared_directory_reports_jobs_of_other_workers(tmp_path):
+    owner = JobStore(directory=str(tmp_path))
+    other = JobStore(directory=str(tmp_path))
+    job = owner.submit("echo", returning(b'["hi"]', delay=0.05))
+    assert other.get(job.id).status in ("pending", "running")
+    await wait_done(owner, job.id)
+    seen = other.get(job.id)
+    assert seen.status == "completed"
+    assert seen.result == b'["hi"]'
+
+
+@pytest.mark.anyio
+async def test_shared_directory_cancels_through_other_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs_module, "CANCEL_POLL_INTERVAL", 0.05)
+    owner = JobStore(directory=str(tmp_path))
+    other = JobStore(directory=str(tmp_path))
+    job = owner.submit("slow", returning(b"[]", delay=10))
+    await asyncio.sleep(0.01)
+    cancelled = await other.cancel(job.id)
+    assert cancelled.status == "cancelled"
+    assert owner.get(job.id).status == "cancelled"
+    await owner.close()
+
+
+@pytest.mark.anyio
+async def test_jobs_of_exited_workers_are_failed(tmp_path, monkeypatch):
+    store = JobStore(directory=str(tmp_path))
+    job_id = "0" * 32
+    state = {
+        "pid": 2**22 + 1,
+        "job": {
+            "id": job_id,
+            "tool": "t",
+            "status": "running",
+            "created_at": 0,
+            "finished_at": None,
+            "error": None,
+        },
+    }
+    with open(os.path.join(tmp_path, f"{job_id}.json"), "w") as f:
+        json.dump(state, f)
+    monkeypatch.setattr(jobs_module, "_alive", lambda pid: False)
+    assert store.get(job_id).status == "failed"
+
+
+def test_shared_directory_rejects_bad_ids(tmp_path):
+    store = JobStore(directory=str(tmp_path))
+    with pytest.raises(HTTPException):
+        store.get("../../etc/passwd")
+
+
+def poll_result(client: TestClient, job_id: str):
+    for _ in range(100):
+        response = client.get(f"/jobs/{job_id}/result")
+        if response.status_code != 202:
+            return response
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_job_endpoints(make_server_app):
+    with TestClient(make_server_app()) as client:
+        submitted = client.post("/echo/jobs", json={"text": "hi", "delay": 0.2})
+        assert submitted.status_code == 202
+        job = submitted.json()
+        assert submitted.headers["Location"].endswith(f"/jobs/{job['id']}")
+        assert client.get(f"/jobs/{job['id']}").json()["tool"] == "echo"
+        assert client.get(f"/jobs/{job['id']}/result").status_code == 202
+        assert poll_result(client, job["id"]).json() == ["hi"]
+        assert client.get(f"/jobs/{job['id']}").json()["status"] == "completed"
+
+        slow = client.post("/echo/jobs", json={"text": "x", "delay": 10}).json()
+        assert client.delete(f"/jobs/{slow['id']}").json()["status"] == "cancelled"
+        assert client.get(f"/jobs/{slow['id']}/result").status_code == 410
+        assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_jobs_hold_concurrency_slots_until_they_finish(make_server_app):
+    echo_limit = {"tools": {"echo": {"maxConcurrent": 1}}}
+    key = parse_key({"key": "secret", "servers": {"test-stub": echo_limit}})
+    rate_limiter = RateLimiter({"secret": key})
+    app = make_server_app(api_dependency=get_verify_api_keys(rate_limiter))
+    app.add_middleware(ReleaseSlotsMiddleware, rate_limiter=rate_limiter)
+    headers = {"Authorization": "Bearer secret"}
+    with TestClient(app, headers=headers) as client:
+        job = client.post("/echo/jobs", json={"text": "hi", "delay": 0.3}).json()
+        busy = client.post("/echo", json={"text": "x"})
+        assert busy.status_code == 429
+        assert poll_result(client, job["id"]).json() == ["hi"]
+        done = client.post("/echo", json={"text": "x"})
+        assert done.status_code == 200
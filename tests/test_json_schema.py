@@ -0,0 +1,186 @@
+import pytest
+from pydantic import ValidationError
+
+from mcpo.utils.json_schema import compile_tool_model
+
+
+def test_no_parameters():
+    assert compile_tool_model("empty", {"type": "object"}) is None
+    assert compile_tool_model("empty", {"type": "object", "properties": {}}) is None
+
+
+def test_required_optional_and_aliases():
+    model = compile_tool_model(
+        "aliases",
+        {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "default": "x"},
+                "max-results": {"type": "integer"},
+                "schema": {"type": "boolean"},
+            },
+            "required": ["max-results"],
+        },
+    )
+    form = model.model_validate({"max-results": 3, "schema": True})
+    assert form.model_dump(exclude_none=True, by_alias=True) == {
+        "max-results": 3,
+        "schema": True,
+    }
+    with pytest.raises(ValidationError):
+        model.model_validate({"query": "missing the required field"})
+
+
+def test_nested_objects_and_arrays():
+    model = compile_tool_model(
+        "nested",
+        {
+            "type": "object",
+            "properties": {
+                "filter": {
+                    "type": "object",
+                    "properties": {
+                        "tags": {"type": "array", "items": {"type": "string"}}
+                    },
+                    "required": ["tags"],
+                },
+                "labels": {
+                    "type": "object",
+                    "additionalProperties": {"type": "integer"},
+                },
+            },
+        },
+    )
+    form = model.model_validate({"filter": {"tags": ["a"]}, "labels": {"x": 1}})
+    assert form.model_dump(exclude_none=True, by_alias=True) == {
+        "filter": {"tags": ["a"]},
+        "labels": {"x": 1},
+    }
+    for bad in ({"filter": {"tags": [{}]}}, {"filter": {}}, {"labels": {"x": "y"}}):
+        with pytest.raises(ValidationError):
+            model.model_validate(bad)
+
+
+def test_enums_unions_and_refs():
+    model = compile_tool_model(
+        "refs",
+        {
+            "type": "object",
+            "properties": {
+                "unit": {"enum": ["c", "f"]},
+                "value": {"anyOf": [{"type": "integer"}, {"type": "string"}]},
+                "point": {"$ref": "#/$defs/Point"},
+                "tree": {"$ref": "#/$defs/Node"},
+            },
+            "$defs": {
+                "Point": {
+                    "type": "object",
+                    "properties": {"x": {"type": "number"}},
+                    "required": ["x"],
+                },
+                "Node": {
+                    "type": "object",
+                    "properties": {"child": {"$ref": "#/$defs/Node"}},
+                },
+            },
+        },
+    )
+    form = model.model_validate(
+        {"unit": "c", "value": "7", "point": {"x": 1.5}, "tree": {"child": {}}}
+    )
+    assert form.model_dump(exclude_none=True, by_alias=True) == {
+        "unit": "c",
+        "value": "7",
+        "point": {"x": 1.5},
+        "tree": {"child": {}},
+    }
+    for bad in ({"unit": "k"}, {"value": []}, {"point": {}}):
+        with pytest.raises(ValidationError):
+            model.model_validate(bad)
+
+
+def test_constraints():
+    model = compile_tool_model(
+        "constraints",
+        {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "minLength": 2, "pattern": "^[a-z]+$"},
+                "count": {"type": "integer", "minimum": 1, "exclusiveMaximum": 10},
+                "items": {"type": "array", "maxItems": 1},
+            },
+        },
+    )
+    model.model_validate({"name": "ab", "count": 1, "items": [1]})
+    for bad in (
+        {"name": "a"},
+        {"name": "AB"},
+        {"count": 0},
+        {"count": 10},
+        {"items": [1, 2]},
+    ):
+        with pytest.raises(ValidationError):
+            model.model_validate(bad)
+
+
+def test_draft4_exclusive_bounds():
+    model = compile_tool_model(
+        "draft4",
+        {
+            "type": "object",
+            "properties": {
+                "ratio": {
+                    "type": "number",
+                    "minimum": 0,
+                    "exclusiveMinimum": True,
+                    "maximum": 1,
+                    "exclusiveMaximum": True,
+                },
+                "inclusive": {
+                    "type": "integer",
+                    "minimum": 0,
+                    "exclusiveMinimum": False,
+                },
+            },
+        },
+    )
+    model.model_validate({"ratio": 0.5, "inclusive": 0})
+    for bad in ({"ratio": 0}, {"ratio": 1}, {"inclusive": -1}):
+        with pytest.raises(ValidationError):
+            model.model_validate(bad)
+
+
+@pytest.mark.parametrize(
+    "additional, expected",
+    [
+        (None, {"a": 1}),
+        (True, {"a": 1, "b": 2}),
+        ({"type": "integer"}, {"a": 1, "b": 2}),
+    ],
+)
+def test_unknown_fields(additional, expected):
+    schema = {"type": "object", "properties": {"a": {"type": "integer"}}}
+    if additional is not None:
+        schema["additionalProperties"] = additional
+    form = compile_tool_model("extra", schema).model_validate({"a": 1, "b": 2})
+    assert form.model_dump(exclude_none=True, by_alias=True) == expected
+
+
+def test_forbidden_fields():
+    model = compile_tool_model(
+        "forbid",
+        {
+            "type": "object",
+            "properties": {"a": {"type": "integer"}},
+            "additionalProperties": False,
+        },
+    )
+    with pytest.raises(ValidationError):
+        model.model_validate({"a": 1, "b": 2})
+
+
+def test_models_are_cached_by_schema():
+    schema = {"type": "object", "properties": {"a": {"type": "string"}}}
+    model = compile_tool_model("first", schema)
+    assert compile_tool_model("second", dict(schema)) is model
+    assert compile_tool_model("third", {**schema, "required": ["a"]}) is not model
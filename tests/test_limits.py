@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from mcpo.utils.limits import ConcurrencyLimiter, acquire_all
+from mcpo.utils.pool import SessionPool
+
+
+async def hold(limiter: ConcurrencyLimiter, seconds: float, running: list):
+    async with limiter:
+        running.append(1)
+        await asyncio.sleep(seconds)
+        running.pop()
+
+
+def test_from_config():
+    assert ConcurrencyLimiter.from_config({}) is None
+    limiter = ConcurrencyLimiter.from_config(
+        {"maxConcurrent": 2, "maxQueue": 5, "statusCode": 429}, server="s", tool="t"
+    )
+    assert (limiter.max_concurrent, limiter.max_queue) == (2, 5)
+    assert limiter.status_code == 429
+    assert limiter.labels == {"server": "s", "tool": "t"}
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(0)
+
+
+@pytest.mark.anyio
+async def test_calls_beyond_the_limit_wait_in_line():
+    limiter = ConcurrencyLimiter(2, max_queue=10)
+    running, peak = [], []
+
+    async def watch():
+        while True:
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+
+    watcher = asyncio.create_task(watch())
+    await asyncio.gather(*(hold(limiter, 0.05, running) for _ in range(6)))
+    watcher.cancel()
+    assert max(peak) == 2
+    assert limiter.waiting == 0
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_rejected():
+    limiter = ConcurrencyLimiter(1, max_queue=1, retry_after=3)
+    running = []
+    first = asyncio.create_task(hold(limiter, 0.2, running))
+    queued = asyncio.create_task(hold(limiter, 0, running))
+    await asyncio.sleep(0.05)
+    with pytest.raises(HTTPException) as error:
+        await hold(limiter, 0, running)
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "3"}
+    await asyncio.gather(first, queued)
+
+
+@pytest.mark.anyio
+async def test_queue_timeout():
+    limiter = ConcurrencyLimiter(1, max_queue=1, queue_timeout=0.05)
+    first = asyncio.create_task(hold(limiter, 0.3, []))
+    await asyncio.sleep(0.01)
+    with pytest.raises(HTTPException):
+        await hold(limiter, 0, [])
+    assert limiter.waiting == 0
+    await first
+
+
+@pytest.mark.anyio
+async def test_acquire_all_releases_every_limiter():
+    tool, server = ConcurrencyLimiter(1), ConcurrencyLimiter(1)
+    async with acquire_all(tool, None, server):
+        assert tool._semaphore.locked() and server._semaphore.locked()
+    assert not tool._semaphore.locked() and not server._semaphore.locked()
+
+
+@pytest.mark.anyio
+async def test_calls_are_multiplexed_over_one_session(stub_params):
+    async with SessionPool(stub_params) as pool:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(pool.call_tool("echo", {"text": str(i), "delay": 0.3}) for i in range(5))
+        )
+        assert time.perf_counter() - start < 1.0
+    assert [result.content[0].text for result in results] == list("01234")
@@ -0,0 +1,95 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from mcpo.utils.openapi import (
+    MERGED_OPENAPI_URL,
+    install_openapi_routes,
+    merge_specs,
+    reset_openapi,
+)
+
+
+def server_app(name: str, field: str) -> FastAPI:
+    app = FastAPI(title=name)
+    app.state.server_name = name
+    Form = type("Form", (BaseModel,), {"__annotations__": {field: str}})
+
+    @app.post("/tool")
+    async def tool(form: Form):
+        return form
+
+    install_openapi_routes(app)
+    return app
+
+
+def main_app() -> FastAPI:
+    app = FastAPI(title="main")
+    app.mount("/a", server_app("a", "text"))
+    app.mount("/b", server_app("b", "query"))
+    install_openapi_routes(app, merged=True)
+    return app
+
+
+def test_artifact_is_cached_compressed_and_revalidated():
+    app = server_app("a", "text")
+    client = TestClient(app)
+    plain = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert plain.json()["info"]["title"] == "a"
+    assert plain.headers["Vary"] == "Accept-Encoding"
+
+    compressed = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+    assert compressed.json() == plain.json()
+
+    for etag in (plain.headers["ETag"], compressed.headers["ETag"]):
+        cached = client.get("/openapi.json", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+
+
+def test_route_changes_rebuild_the_artifact():
+    app = server_app("a", "text")
+    client = TestClient(app)
+    etag = client.get("/openapi.json").headers["ETag"]
+
+    @app.post("/other")
+    async def other():
+        return {}
+
+    assert client.get("/openapi.json").headers["ETag"] == etag
+    reset_openapi(app)
+    response = client.get("/openapi.json")
+    assert response.headers["ETag"] != etag
+    assert "/other" in response.json()["paths"]
+
+
+def test_merged_document():
+    client = TestClient(main_app())
+    spec = client.get(MERGED_OPENAPI_URL).json()
+    assert {"/a/tool", "/b/tool"} <= set(spec["paths"])
+    operation = spec["paths"]["/b/tool"]["post"]
+    assert operation["tags"] == ["b"]
+    assert operation["operationId"].startswith("b__")
+    # Both servers define a different "Form" schema
+    ref = operation["requestBody"]["content"]["application/json"]["schema"]["$ref"]
+    assert ref == "#/components/schemas/b__Form"
+    assert "text" in spec["components"]["schemas"]["Form"]["properties"]
+    assert "query" in spec["components"]["schemas"]["b__Form"]["properties"]
+
+
+def test_mounted_docs_keep_their_root_path():
+    client = TestClient(main_app())
+    spec = client.get("/a/openapi.json").json()
+    assert spec["servers"] == [{"url": "/a"}]
+
+
+def test_identical_schemas_are_shared():
+    schema = {"type": "object", "properties": {"x": {"type": "string"}}}
+    spec = {
+        "paths": {"/t": {"post": {"operationId": "t"}}},
+        "components": {"schemas": {"Same": schema}},
+    }
+    merged = merge_specs({"paths": {}}, [("/a", "a", spec), ("/b", "b", spec)])
+    assert list(merged["components"]["schemas"]) == ["Same"]
+    assert merged["paths"]["/b/t"]["post"]["operationId"] == "b__t"
@@ -0,0 +1,152 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from mcpo.utils import pool as pool_module
+from mcpo.utils.pool import SessionPool
+
+
+def text_of(result) -> str:
+    return result.content[0].text
+
+
+async def call_with_events(pool: SessionPool, tag: str, count: int = 5) -> list:
+    events = []
+    result = await pool.call_tool(
+        "steps", {"count": count, "tag": tag}, on_event=events.append
+    )
+    assert text_of(result) == "done"
+    return events
+
+
+def logs(events: list) -> list:
+    return [event["data"]["data"] for event in events if event["event"] == "log"]
+
+
+@pytest.mark.anyio
+async def test_progress_and_logs_are_forwarded(stub_params):
+    async with SessionPool(stub_params) as pool:
+        events = await call_with_events(pool, "a:", count=3)
+    progress = [event["data"] for event in events if event["event"] == "progress"]
+    assert [p["progress"] for p in progress] == [0, 1, 2]
+    assert logs(events) == ["a:step 0", "a:step 1", "a:step 2"]
+
+
+@pytest.mark.anyio
+async def test_logs_are_not_leaked_to_other_calls(stub_params):
+    async with SessionPool(stub_params) as pool:
+        first, second = await asyncio.gather(
+            call_with_events(pool, "a:"), call_with_events(pool, "b:")
+        )
+    assert all(log.startswith("a:") for log in logs(first))
+    assert all(log.startswith("b:") for log in logs(second))
+    # Progress is tied to the request and always forwarded
+    assert len([e for e in first if e["event"] == "progress"]) == 5
+    assert len([e for e in second if e["event"] == "progress"]) == 5
+
+
+@pytest.mark.anyio
+async def test_calls_on_separate_members_get_their_logs(stub_params):
+    async with SessionPool(stub_params, size=2) as pool:
+        first, second = await asyncio.gather(
+            call_with_events(pool, "a:"), call_with_events(pool, "b:")
+        )
+    assert len(logs(first)) == 5
+    assert len(logs(second)) == 5
+
+
+def test_pools_on_separate_event_loops(stub_params):
+    async def start_pool():
+        async with SessionPool(stub_params, size=2) as pool:
+            return len({member.pid for member in pool.members})
+
+    # The spawn lock must not stay bound to the first loop
+    assert asyncio.run(start_pool()) == 2
+    assert asyncio.run(start_pool()) == 2
+
+
+def test_pool_size_must_be_positive(stub_params):
+    with pytest.raises(ValueError):
+        SessionPool(stub_params, size=0)
+
+
+@pytest.mark.anyio
+async def test_calls_go_to_the_least_busy_member(stub_params):
+    async with SessionPool(stub_params, size=3) as pool:
+        assert len({member.pid for member in pool.members}) == 3
+        results = await asyncio.gather(
+            *(pool.call_tool("pid", {"delay": 0.3}) for _ in range(3))
+        )
+        assert len({text_of(result) for result in results}) == 3
+        assert pool.in_flight == 0
+        assert [member.calls for member in pool.members] == [1, 1, 1]
+
+
+@pytest.mark.anyio
+async def test_pool_acts_as_a_session(stub_params):
+    async with SessionPool(stub_params, size=2, name="stub") as pool:
+        init = await pool.initialize()
+        assert init.serverInfo.name == "test-stub"
+        tools = await pool.list_tools()
+        assert {"echo", "pid", "steps"} <= {tool.name for tool in tools.tools}
+        assert text_of(await pool.call_tool("echo", {"text": "hi"})) == "hi"
+        assert [member.name for member in pool.members] == ["stub", "stub"]
+
+
+async def die(pool: SessionPool):
+    with pytest.raises(HTTPException) as error:
+        await pool.call_tool("die")
+    assert error.value.status_code == 502
+
+
+@pytest.mark.anyio
+async def test_crashed_server_is_respawned(stub_params):
+    async with SessionPool(stub_params) as pool:
+        first_pid = text_of(await pool.call_tool("pid"))
+        await die(pool)
+        # The next call waits for the new process
+        assert text_of(await pool.call_tool("pid")) != first_pid
+        assert pool.members[0].restarts == 1
+
+
+@pytest.mark.anyio
+async def test_calls_are_rejected_while_restarting(stub_params):
+    async with SessionPool(stub_params, restart_wait=0.1) as pool:
+        await die(pool)
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as error:
+            await pool.call_tool("pid")
+        assert error.value.status_code == 503
+        assert error.value.headers == {"Retry-After": "1"}
+
+
+@pytest.mark.anyio
+async def test_members_are_recycled_after_max_calls(stub_params):
+    async with SessionPool(stub_params, max_calls=2) as pool:
+        pids = [text_of(await pool.call_tool("pid")) for _ in range(4)]
+    assert pids[0] == pids[1] != pids[2] == pids[3]
+
+
+@pytest.mark.anyio
+async def test_respawn_that_never_initializes(stub_params, tmp_path, monkeypatch):
+    monkeypatch.setattr(pool_module, "MIN_BACKOFF", 0.05)
+    hang = tmp_path / "hang"
+    stub_params.env = {**os.environ, "STUB_HANG_FILE": str(hang)}
+    pool = SessionPool(stub_params)
+    await pool.start()
+    monkeypatch.setattr(pool_module, "INIT_TIMEOUT", 0.5)
+    hang.touch()
+    await die(pool)
+    member = pool.members[0]
+    # A timed out initialize counts as a crash, and the member keeps retrying
+    for _ in range(100):
+        if member.restarts >= 2:
+            break
+        await asyncio.sleep(0.05)
+    assert member.restarts >= 2
+    assert "did not initialize" in repr(member.error)
+
+    # Closing does not wait for a server stuck in initialize
+    await asyncio.wait_for(pool.close(), 2)
@@ -0,0 +1,143 @@
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from mcpo.utils.auth import get_verify_api_keys
+from mcpo.utils.ratelimit import RateLimiter, ReleaseSlotsMiddleware, parse_key
+
+
+def limiter(*entries) -> RateLimiter:
+    return RateLimiter({entry["key"]: parse_key(entry) for entry in entries})
+
+
+async def rejected(rate_limiter: RateLimiter, key, server=None, tool=None) -> int:
+    with pytest.raises(HTTPException) as error:
+        await rate_limiter.acquire(key, server, tool)
+    return error.value.status_code
+
+
+def test_parse_key():
+    key = parse_key(
+        {
+            "key": "secret",
+            "name": "ci",
+            "rate": 5,
+            "servers": {"time": {"maxConcurrent": 2, "tools": {"now": {"rate": 1}}}},
+            "scopes": ["time"],
+        }
+    )
+    assert key.name == "ci"
+    assert key.scopes == ("time",)
+    assert key.limits[(None, None)].burst == 5
+    assert key.limits[("time", None)].max_concurrent == 2
+    assert key.limits[("time", "now")].scope == "ci/time/now"
+    assert "secret" not in repr(key)
+    assert parse_key({"key": "secret"}).name.startswith("key-")
+
+
+def test_lookup_and_limits_for():
+    rate_limiter = limiter(
+        {
+            "key": "secret",
+            "rate": 5,
+            "servers": {"time": {"rate": 2, "tools": {"now": {"rate": 1}}}},
+        }
+    )
+    key = rate_limiter.lookup("secret")
+    assert rate_limiter.lookup("secre") is None
+    scopes = [limit.scope for limit in rate_limiter.limits_for(key, "time", "now")]
+    assert scopes == ["key-2bb80d53/time/now", "key-2bb80d53/time", "key-2bb80d53"]
+    # Other routes of a server only count against the server and the key
+    assert len(rate_limiter.limits_for(key, "time", None)) == 2
+    assert len(rate_limiter.limits_for(key, "other", None)) == 1
+
+
+@pytest.mark.anyio
+async def test_rate_limit():
+    rate_limiter = limiter({"key": "secret", "rate": 0.001, "burst": 2})
+    key = rate_limiter.lookup("secret")
+    await rate_limiter.acquire(key, "time", "now")
+    await rate_limiter.acquire(key, "time", "now")
+    assert await rejected(rate_limiter, key, "time", "now") == 429
+
+
+@pytest.mark.anyio
+async def test_concurrency_cap():
+    rate_limiter = limiter({"key": "secret", "maxConcurrent": 1})
+    key = rate_limiter.lookup("secret")
+    slots = await rate_limiter.acquire(key, "time", "now")
+    assert await rejected(rate_limiter, key, "time", "now") == 429
+    await rate_limiter.release(slots)
+    await rate_limiter.release(await rate_limiter.acquire(key, "time", "now"))
+
+
+@pytest.mark.anyio
+async def test_keys_with_the_same_name_are_limited_separately():
+    rate_limiter = limiter(
+        {"key": "first", "name": "team", "rate": 0.001, "burst": 1},
+        {"key": "second", "name": "team", "rate": 0.001, "burst": 1},
+    )
+    await rate_limiter.acquire(rate_limiter.lookup("first"), None, None)
+    await rate_limiter.acquire(rate_limiter.lookup("second"), None, None)
+
+
+@pytest.mark.anyio
+async def test_rejected_requests_take_no_tokens():
+    rate_limiter = limiter(
+        {
+            "key": "secret",
+            "rate": 0.001,
+            "burst": 1,
+            "servers": {"s": {"tools": {"a": {"rate": 0.001, "burst": 1}}}},
+        }
+    )
+    key = rate_limiter.lookup("secret")
+    await rate_limiter.acquire(key, "s", "b")
+    # The key's limit rejects this, so the tool's token is given back
+    assert await rejected(rate_limiter, key, "s", "a") == 429
+    tool_limit = key.limits[("s", "a")]
+    tokens, _ = rate_limiter.store._buckets[tool_limit.bucket]
+    assert tokens == pytest.approx(1, abs=0.01)
+
+
+@pytest.mark.anyio
+async def test_concurrency_rejection_refunds_tokens():
+    rate_limiter = limiter(
+        {"key": "secret", "rate": 0.001, "burst": 2, "maxConcurrent": 1}
+    )
+    key = rate_limiter.lookup("secret")
+    await rate_limiter.acquire(key, None, None)
+    assert await rejected(rate_limiter, key) == 429
+    tokens, _ = rate_limiter.store._buckets[key.limits[(None, None)].bucket]
+    assert tokens == pytest.approx(1, abs=0.01)
+
+
+def test_slots_are_held_until_streamed_responses_finish():
+    rate_limiter = limiter({"key": "secret", "maxConcurrent": 1})
+    bucket = rate_limiter.lookup("secret").limits[(None, None)].bucket
+    active = rate_limiter.store._active
+    seen = []
+
+    sub_app = FastAPI()
+
+    @sub_app.get("/stream", dependencies=[Depends(get_verify_api_keys(rate_limiter))])
+    async def stream():
+        async def body():
+            for chunk in (b"a", b"b"):
+                seen.append(active[bucket])
+                yield chunk
+
+        return StreamingResponse(body())
+
+    app = FastAPI()
+    app.add_middleware(ReleaseSlotsMiddleware, rate_limiter=rate_limiter)
+    app.mount("/server", sub_app)
+
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer secret"}
+    response = client.get("/server/stream", headers=headers)
+    assert response.content == b"ab"
+    assert seen == [1, 1]
+    assert active[bucket] == 0
+    assert client.get("/server/stream", headers=headers).status_code == 200
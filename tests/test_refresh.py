@@ -0,0 +1,57 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from mcpo.main import refresh_tools
+
+
+def wait_for_route(app, name: str, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while name not in app.state.tool_registry:
+        assert time.monotonic() < deadline, f"{name} was never registered"
+        time.sleep(0.05)
+
+
+def test_tool_list_changes_add_routes(make_server_app):
+    app = make_server_app()
+    with TestClient(app) as client:
+        name = client.post("/grow").json()[0]
+        wait_for_route(app, name)
+        assert client.post(f"/{name}", json={"x": "hi"}).json() == ["hi"]
+        assert f"/{name}" in client.get("/openapi.json").json()["paths"]
+
+
+def test_refresh_only_rebuilds_changed_tools(make_server_app):
+    app = make_server_app()
+    with TestClient(app) as client:
+        echo_routes = app.state.tool_registry["echo"][1]
+        route_count = len(app.routes)
+        changes = client.portal.call(refresh_tools, app)
+        assert changes == {"added": [], "changed": [], "removed": []}
+
+        # A tool whose schema differs from the registered one is rebuilt
+        _, routes, executor = app.state.tool_registry["echo"]
+        app.state.tool_registry["echo"] = ({}, routes, executor)
+        changes = client.portal.call(refresh_tools, app)
+        assert changes["changed"] == ["echo"]
+        assert app.state.tool_registry["echo"][1][0] is not echo_routes[0]
+        assert len(app.routes) == route_count
+        assert client.post("/echo", json={"text": "hi"}).json() == ["hi"]
+
+
+def test_refresh_drops_cached_results_of_changed_and_removed_tools(make_server_app):
+    app = make_server_app(cache_config={"pid": {"ttl": 60}})
+    with TestClient(app) as client:
+        client.post("/pid", json={})
+        assert client.post("/pid", json={}).headers["X-Cache"] == "HIT"
+
+        _, routes, executor = app.state.tool_registry["pid"]
+        app.state.tool_registry["pid"] = ({}, routes, executor)
+        app.state.tool_registry["gone"] = ({}, [], executor)
+        app.state.result_caches["gone"] = app.state.result_caches["pid"]
+        app.state.tool_limiters["gone"] = app.state.tool_limiters["pid"]
+        changes = client.portal.call(refresh_tools, app)
+        assert changes["changed"] == ["pid"] and changes["removed"] == ["gone"]
+        assert "gone" not in app.state.result_caches
+        assert "gone" not in app.state.tool_limiters
+        assert client.post("/pid", json={}).headers["X-Cache"] == "MISS"
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.routing import Mount
+
+from mcpo.utils import reload
+from mcpo.utils.reload import ConfigReloader, load_servers
+from mcpo.utils.startup import SubAppLifespan, start_all
+
+
+class Servers:
+    """Sub-apps standing in for MCP servers, which record their lifespans."""
+
+    def __init__(self):
+        self.events = []
+
+    def create_app(self, name: str, server_cfg: dict) -> FastAPI:
+        @asynccontextmanager
+        async def lifespan(app):
+            if server_cfg.get("broken"):
+                raise RuntimeError("failed to start")
+            self.events.append(("start", name, server_cfg["version"]))
+            yield
+            self.events.append(("stop", name, server_cfg["version"]))
+
+        app = FastAPI(lifespan=lifespan)
+        app.state.server_name = name
+        app.state.server_config = server_cfg
+
+        @app.get("/version")
+        async def version():
+            return server_cfg["version"]
+
+        return app
+
+
+def write_config(path, **servers):
+    path.write_text(json.dumps({"mcpServers": servers}))
+
+
+async def start_reloader(path, servers: Servers, watch=False) -> ConfigReloader:
+    main_app = FastAPI()
+    for name, server_cfg in load_servers(str(path)).items():
+        main_app.mount(f"/{name}", servers.create_app(name, server_cfg))
+    reloader = ConfigReloader(main_app, str(path), servers.create_app, watch=watch)
+    runners = [
+        SubAppLifespan(route.app.state.server_name, route.app)
+        for route in main_app.routes
+        if isinstance(route, Mount)
+    ]
+    reloader.start(await start_all(runners))
+    return reloader
+
+
+async def versions(app: FastAPI) -> dict:
+    names = [r.app.state.server_name for r in app.routes if isinstance(r, Mount)]
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://t") as c:
+        return {name: (await c.get(f"/{name}/version")).json() for name in names}
+
+
+def test_load_servers(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(path, a={"command": "a"})
+    assert load_servers(str(path)) == {"a": {"command": "a"}}
+    write_config(path)
+    with pytest.raises(ValueError):
+        load_servers(str(path))
+
+
+@pytest.mark.anyio
+async def test_reload_applies_config_changes(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(path, keep={"version": 1}, edit={"version": 1}, drop={"version": 1})
+    servers = Servers()
+    reloader = await start_reloader(path, servers)
+    servers.events.clear()
+
+    write_config(path, keep={"version": 1}, edit={"version": 2}, new={"version": 1})
+    changes = await reloader.reload()
+    assert changes == {
+        "added": ["new"],
+        "changed": ["edit"],
+        "removed": ["drop"],
+        "failed": [],
+    }
+    assert await versions(reloader.app) == {"keep": 1, "edit": 2, "new": 1}
+
+    await asyncio.sleep(0.05)  # Retired servers stop in the background
+    assert sorted(servers.events) == [
+        ("start", "edit", 2),
+        ("start", "new", 1),
+        ("stop", "drop", 1),
+        ("stop", "edit", 1),
+    ]
+    assert await reloader.reload() == {
+        "added": [],
+        "changed": [],
+        "removed": [],
+        "failed": [],
+    }
+    await reloader.close()
+
+
+@pytest.mark.anyio
+async def test_failed_restart_keeps_the_running_server(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(path, a={"version": 1})
+    servers = Servers()
+    reloader = await start_reloader(path, servers)
+
+    write_config(path, a={"version": 2, "broken": True})
+    changes = await reloader.reload()
+    assert changes["changed"] == ["a"] and changes["failed"] == ["a"]
+    assert await versions(reloader.app) == {"a": 1}
+    await reloader.close()
+    assert servers.events == [("start", "a", 1), ("stop", "a", 1)]
+
+
+@pytest.mark.anyio
+async def test_watch_reloads_on_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(reload, "WATCH_INTERVAL", 0.02)
+    path = tmp_path / "config.json"
+    write_config(path, a={"version": 1})
+    servers = Servers()
+    reloader = await start_reloader(path, servers, watch=True)
+
+    write_config(path, a={"version": 2})
+    os.utime(path, ns=(0, reloader._mtime + 1))
+    for _ in range(100):
+        if ("start", "a", 2) in servers.events:
+            break
+        await asyncio.sleep(0.02)
+    assert await versions(reloader.app) == {"a": 2}
+    await reloader.close()
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mcpo.utils import result_cache
+from mcpo.utils.result_cache import ResultCache, canonical_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache, "time", clock)
+    return clock
+
+
+def test_canonical_key_ignores_order():
+    assert canonical_key({"a": 1, "b": [2]}) == canonical_key({"b": [2], "a": 1})
+    assert canonical_key({"a": 1}) != canonical_key({"a": "1"})
+
+
+def test_from_config():
+    assert ResultCache.from_config({}) is None
+    assert ResultCache.from_config({"maxEntries": 3}) is None
+    cache = ResultCache.from_config({"ttl": 5, "maxEntries": 3, "maxBytes": 10})
+    assert (cache.ttl, cache.max_entries, cache.max_bytes) == (5, 3, 10)
+
+
+def test_entries_expire(clock):
+    cache = ResultCache(ttl=10)
+    cache.put("k", b"v", 1)
+    clock.now += 4
+    assert cache.get("k") == (b"v", 4)
+    clock.now += 7
+    assert cache.get("k") is None
+    assert cache.total_bytes == 0
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = ResultCache(ttl=60, max_entries=2)
+    cache.put("a", 1, 1)
+    cache.put("b", 2, 1)
+    cache.get("a")
+    cache.put("c", 3, 1)
+    assert [key for key in "abc" if cache.get(key)] == ["a", "c"]
+
+
+def test_byte_budget(clock):
+    cache = ResultCache(ttl=60, max_bytes=10)
+    cache.put("a", 1, 6)
+    cache.put("b", 2, 6)
+    assert cache.get("a") is None and cache.total_bytes == 6
+    cache.put("huge", 3, 11)
+    assert cache.get("huge") is None
+    cache.put("b", 4, 2)
+    assert cache.get("b")[0] == 4 and cache.total_bytes == 2
+
+
+@pytest.mark.anyio
+async def test_get_or_call():
+    cache = ResultCache(ttl=60)
+    calls = []
+
+    async def call(cacheable=True):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"value", 5, cacheable
+
+    first, second = await asyncio.gather(
+        cache.get_or_call("k", call), cache.get_or_call("k", call)
+    )
+    assert (first[1], second[1]) == ("MISS", "SHARED")
+    assert (await cache.get_or_call("k", call))[1] == "HIT"
+    assert len(calls) == 1
+
+    # Errors are not cached
+    await cache.get_or_call("error", lambda: call(cacheable=False))
+    assert (await cache.get_or_call("error", call))[1] == "MISS"
+
+
+def test_tool_endpoint_headers(make_server_app):
+    app = make_server_app(cache_config={"pid": {"ttl": 60}})
+    with TestClient(app) as client:
+        first = client.post("/pid", json={})
+        second = client.post("/pid", json={})
+        other = client.post("/pid", json={"delay": 0.01})
+        uncached = client.post("/echo", json={"text": "hi"})
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert other.headers["X-Cache"] == "MISS"
+    assert "X-Cache" not in uncached.headers
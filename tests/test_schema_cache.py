@@ -0,0 +1,75 @@
+import time
+
+from fastapi.testclient import TestClient
+from mcp import types
+
+from mcpo.utils.schema_cache import SchemaCache
+
+ECHO = types.Tool(
+    name="echo",
+    description="Return text after an optional delay.",
+    inputSchema={
+        "type": "object",
+        "properties": {"text": {"type": "string"}},
+        "required": ["text"],
+    },
+)
+
+
+def test_key_covers_command_args_and_env():
+    key = SchemaCache.key("uvx", ["server"], {"TOKEN": "a"})
+    assert key == SchemaCache.key("uvx", ["server"], {"TOKEN": "a"})
+    assert key != SchemaCache.key("uvx", ["server", "--flag"], {"TOKEN": "a"})
+    assert key != SchemaCache.key("uvx", ["server"], {"TOKEN": "b"})
+    assert len(key) == 64
+
+
+def test_save_and_load(tmp_path):
+    cache = SchemaCache(str(tmp_path / "cache"))
+    assert cache.load("missing") is None
+    cache.save("k", types.Implementation(name="stub", version="1"), [ECHO])
+    server_info, tools = cache.load("k")
+    assert server_info.name == "stub"
+    assert tools == [ECHO]
+    assert [path.name for path in (tmp_path / "cache").iterdir()] == ["k.json"]
+
+
+def test_unreadable_entries_are_ignored(tmp_path):
+    cache = SchemaCache(str(tmp_path))
+    (tmp_path / "k.json").write_text("{truncated")
+    assert cache.load("k") is None
+
+
+def cache_key(app) -> str:
+    return SchemaCache.key(app.state.command, app.state.args, {})
+
+
+def test_cold_start_fills_the_cache(tmp_path, make_server_app):
+    cache = SchemaCache(str(tmp_path))
+    app = make_server_app(schema_cache=cache)
+    with TestClient(app) as client:
+        assert client.post("/echo", json={"text": "hi"}).json() == ["hi"]
+    server_info, tools = cache.load(cache_key(app))
+    assert server_info.name == "test-stub"
+    assert "echo" in {tool.name for tool in tools}
+
+
+def test_lazy_spawn_serves_cached_routes(tmp_path, make_server_app):
+    cache = SchemaCache(str(tmp_path))
+    app = make_server_app(schema_cache=cache, lazy_spawn=True)
+    cache.save(cache_key(app), types.Implementation(name="cached", version="1"), [ECHO])
+    with TestClient(app) as client:
+        # Routes come from the cache, and nothing is spawned until a call
+        assert app.title == "cached"
+        assert not app.state.session.started.is_set()
+        assert list(app.state.tool_registry) == ["echo"]
+        assert client.post("/echo", json={"text": "hi"}).json() == ["hi"]
+        assert app.state.session.started.is_set()
+
+        # The live tool list then replaces the cached one
+        deadline = time.monotonic() + 5
+        while "pid" not in app.state.tool_registry and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert client.post("/pid", json={}).status_code == 200
+    _, tools = cache.load(cache_key(app))
+    assert "pid" in {tool.name for tool in tools}
@@ -0,0 +1,84 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mcpo.utils.singleflight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    results = await asyncio.gather(*(flight.do("k", call) for _ in range(5)))
+    assert [value for value, _ in results] == [1] * 5
+    assert [shared for _, shared in results] == [False] + [True] * 4
+    assert len(flight) == 0
+    # Once finished, the next call runs again
+    assert await flight.do("k", call) == (2, False)
+
+
+@pytest.mark.anyio
+async def test_keys_are_independent():
+    flight = SingleFlight()
+
+    async def call(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(
+        flight.do("a", lambda: call("a")), flight.do("b", lambda: call("b"))
+    )
+    assert results == [("a", False), ("b", False)]
+
+
+@pytest.mark.anyio
+async def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("k", call), flight.do("k", call), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+
+
+@pytest.mark.anyio
+async def test_call_survives_a_cancelled_caller():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", call))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flight.do("k", call))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == ("done", True)
+
+
+def test_tool_endpoint_coalesces_identical_calls(make_server_app):
+    app = make_server_app(single_flight=["pid"])
+    with TestClient(app) as client:
+        with ThreadPoolExecutor(3) as pool:
+            responses = list(
+                pool.map(
+                    lambda body: client.post("/pid", json=body),
+                    [{"delay": 0.3}, {"delay": 0.3}, {"delay": 0.2}],
+                )
+            )
+    assert [r.headers.get("X-Coalesced") for r in responses].count("true") == 1
+    assert responses[0].json() == responses[1].json()
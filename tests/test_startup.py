@@ -0,0 +1,49 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+
+from mcpo.utils.startup import SubAppLifespan, start_all
+
+
+def sub_app(delay: float = 0.0, error: Exception = None, events: list = None):
+    @asynccontextmanager
+    async def lifespan(app):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        events.append("up")
+        yield
+        events.append("down")
+
+    return FastAPI(lifespan=lifespan)
+
+
+@pytest.mark.anyio
+async def test_servers_start_concurrently():
+    events = []
+    runners = [
+        SubAppLifespan(f"s{i}", sub_app(delay=0.3, events=events)) for i in range(4)
+    ]
+    start = time.perf_counter()
+    started = await start_all(runners)
+    assert time.perf_counter() - start < 1.0
+    assert started == runners
+    assert events == ["up"] * 4
+    await asyncio.gather(*(runner.stop() for runner in runners))
+    assert events == ["up"] * 4 + ["down"] * 4
+
+
+@pytest.mark.anyio
+async def test_failing_and_slow_servers_are_skipped():
+    events = []
+    ok = SubAppLifespan("ok", sub_app(events=events))
+    broken = SubAppLifespan("broken", sub_app(error=RuntimeError("boom")))
+    slow = SubAppLifespan("slow", sub_app(delay=10, events=events), timeout=0.2)
+    assert await start_all([ok, broken, slow]) == [ok]
+    assert isinstance(broken.error, RuntimeError)
+    assert isinstance(slow.error, TimeoutError)
+    await asyncio.gather(ok.stop(), broken.stop(), slow.stop())
+    assert events == ["up", "down"]
@@ -0,0 +1,118 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from mcp import types
+from mcp.types import CallToolResult
+from starlette.requests import Request
+
+from mcpo.main import encode_tool_response
+from mcpo.utils.streaming import CHUNK_SIZE, iter_tool_response, stream_mode
+
+
+def make_request(query: str = "", accept: str = "") -> Request:
+    headers = [(b"accept", accept.encode())] if accept else []
+    return Request({"type": "http", "query_string": query.encode(), "headers": headers})
+
+
+async def collect(result: CallToolResult, ndjson: bool) -> list:
+    return [chunk async for chunk in iter_tool_response(result, ndjson)]
+
+
+RESULT = CallToolResult(
+    content=[
+        types.TextContent(type="text", text='{"rows":\n[1, 2]}'),
+        types.TextContent(type="text", text="line one\nline two"),
+        types.ImageContent(
+            type="image",
+            mimeType="image/png",
+            data=base64.b64encode(b"\0" * (CHUNK_SIZE * 2)).decode(),
+        ),
+    ]
+)
+
+
+def test_stream_mode():
+    assert stream_mode(make_request()) is None
+    assert stream_mode(make_request(accept="application/x-ndjson")) == "ndjson"
+    assert stream_mode(make_request("stream=ndjson")) == "ndjson"
+    assert stream_mode(make_request("stream=true")) == "json"
+    assert stream_mode(make_request("stream=0")) is None
+
+
+@pytest.mark.anyio
+async def test_json_stream_matches_buffered_response():
+    chunks = await collect(RESULT, ndjson=False)
+    assert b"".join(chunks) == encode_tool_response(RESULT)
+    # The image is sent in slices rather than as one string
+    assert len(chunks) > 8
+
+
+@pytest.mark.anyio
+async def test_ndjson_stream_has_one_item_per_line():
+    body = b"".join(await collect(RESULT, ndjson=True))
+    lines = body.split(b"\n")
+    assert lines[-1] == b""
+    assert [json.loads(line) for line in lines[:-1]] == json.loads(
+        encode_tool_response(RESULT)
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("ndjson", [False, True])
+async def test_hostile_image_data_is_escaped(ndjson):
+    hostile = 'AAA","injected'
+    result = CallToolResult(
+        content=[types.ImageContent(type="image", mimeType="image/png", data=hostile)]
+    )
+    body = b"".join(await collect(result, ndjson))
+    items = (
+        [json.loads(line) for line in body.splitlines()] if ndjson else json.loads(body)
+    )
+    assert items == [f"data:image/png;base64,{hostile}"]
+
+
+@pytest.mark.anyio
+async def test_lone_surrogate_text_is_escaped():
+    result = CallToolResult(content=[types.TextContent(type="text", text="\ud800")])
+    assert json.loads(b"".join(await collect(result, ndjson=False))) == ["\ud800"]
+
+
+def parse_events(text: str) -> list:
+    events = []
+    for block in text.replace("\r\n", "\n").split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_sse_endpoint_streams_progress_then_the_result(make_server_app):
+    with TestClient(make_server_app()) as client:
+        response = client.post("/steps/stream", json={"count": 3, "delay": 0})
+        failed = client.post("/die/stream")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    progress = [data["progress"] for event, data in events if event == "progress"]
+    assert progress == [0, 1, 2]
+    assert [data["data"] for event, data in events if event == "log"] == [
+        "step 0",
+        "step 1",
+        "step 2",
+    ]
+    assert events[-1] == ("result", ["done"])
+    assert parse_events(failed.text)[-1][0] == "error"
+
+
+def test_buffered_endpoint_streams_on_request(make_server_app):
+    with TestClient(make_server_app()) as client:
+        ndjson = client.post("/data?stream=ndjson", json={"count": 2})
+        buffered = client.post("/data", json={"count": 2})
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == [
+        {"items": [0, 1]}
+    ]
+    assert buffered.json() == [{"items": [0, 1]}]
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import StatusCode
+
+from mcpo.utils import tracing
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+def test_file_exporter_writes_spans_and_closes_its_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    assert tracing.configure_tracing("file", str(path))
+    provider = tracing._provider
+    exporter = provider._active_span_processor._span_processors[0].span_exporter
+    try:
+        with tracing.span("work", {"answer": 42}):
+            pass
+    finally:
+        tracing.shutdown_tracing()
+
+    assert exporter.out.closed
+    assert not tracing.enabled()
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["work"]
+    assert spans[0]["attributes"] == {"answer": 42}
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    # A provider of its own: the global one can only be set once per process
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "_tracer", provider.get_tracer("test"))
+    return exporter
+
+
+def test_disabled_tracing_is_a_no_op():
+    assert not tracing.enabled()
+    with tracing.span("work") as current:
+        assert current is None
+    assert tracing.inject_meta() == {}
+
+
+def test_inject_meta_carries_the_current_span(spans):
+    with tracing.span("call", kind="client") as current:
+        meta = tracing.inject_meta()
+    trace_id = format(current.get_span_context().trace_id, "032x")
+    assert meta["traceparent"].split("-")[1] == trace_id
+
+
+def test_middleware_continues_the_callers_trace(spans):
+    app = FastAPI()
+    app.add_middleware(tracing.TracingMiddleware)
+
+    @app.get("/fail")
+    async def fail():
+        raise HTTPException(status_code=502)
+
+    client = TestClient(app)
+    client.get("/fail", headers={"traceparent": TRACEPARENT})
+    [server] = spans.get_finished_spans()
+    assert server.name == "GET /fail"
+    assert format(server.context.trace_id, "032x") == TRACEPARENT.split("-")[1]
+    assert server.attributes["http.response.status_code"] == 502
+    assert server.status.status_code == StatusCode.ERROR
+
+
+def test_trace_context_reaches_the_mcp_server(spans, make_server_app):
+    app = make_server_app()
+    app.add_middleware(tracing.TracingMiddleware)
+    with TestClient(app) as client:
+        body = client.post("/meta", headers={"traceparent": TRACEPARENT}).json()
+    meta = body[0]
+    assert meta["traceparent"].split("-")[1] == TRACEPARENT.split("-")[1]
+    names = {span.name for span in spans.get_finished_spans()}
+    assert {"POST /meta", "call_tool meta", "process_tool_response"} <= names
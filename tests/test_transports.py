@@ -0,0 +1,136 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+from mcp import ClientSession, McpError, StdioServerParameters, types
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from mcpo.utils.pool import SessionPool
+from mcpo.utils.transports import (
+    SESSION_HEADER,
+    HttpServerParameters,
+    describe,
+    open_transport,
+    streamable_http_transport,
+    transport_type,
+)
+
+
+def test_transport_type():
+    assert transport_type(None) == "stdio"
+    assert transport_type(None, "http://server/mcp") == "streamable-http"
+    assert transport_type("SSE") == "sse"
+    assert transport_type("streamable_http") == "streamable-http"
+    with pytest.raises(ValueError):
+        transport_type("websocket")
+
+
+def test_describe_and_open_transport():
+    remote = HttpServerParameters(transport="sse", url="http://server/sse")
+    assert describe(remote) == "http://server/sse"
+    assert describe(StdioServerParameters(command="uvx")) == "uvx"
+    with pytest.raises(ValueError):
+        open_transport(remote)
+
+
+@pytest.fixture
+def sse_server():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    stub = os.path.join(os.path.dirname(__file__), "stub_server.py")
+    process = subprocess.Popen(
+        [sys.executable, stub, "sse"],
+        env={**os.environ, "FASTMCP_HOST": "127.0.0.1", "FASTMCP_PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 20
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            assert time.monotonic() < deadline, "SSE stub server did not start"
+            time.sleep(0.1)
+    yield f"http://127.0.0.1:{port}/sse"
+    process.kill()
+    process.wait()
+
+
+@pytest.mark.anyio
+async def test_sse_pool(sse_server):
+    params = HttpServerParameters(transport="sse", url=sse_server)
+    async with SessionPool(params, size=2) as pool:
+        assert (await pool.initialize()).serverInfo.name == "test-stub"
+        result = await pool.call_tool("echo", {"text": "hi"})
+        assert result.content[0].text == "hi"
+        # Both members share the pool's client and its connections
+        assert {member.client for member in pool.members} == {pool.client}
+
+
+class StreamableServer:
+    """
+    Just enough of the streamable HTTP transport: JSON and event-stream
+    responses, a session id, no GET stream.
+    """
+
+    def __init__(self):
+        self.deleted = []
+        self.app = Starlette(
+            routes=[Route("/mcp", self.handle, methods=["GET", "POST", "DELETE"])]
+        )
+
+    async def handle(self, request: Request) -> Response:
+        if request.method == "GET":
+            return Response(status_code=405)
+        session_id = request.headers.get(SESSION_HEADER)
+        if request.method == "DELETE":
+            self.deleted.append(session_id)
+            return Response()
+        message = await request.json()
+        if "id" not in message:
+            return Response(status_code=202)
+        if message["method"] == "initialize":
+            result = {
+                "protocolVersion": types.LATEST_PROTOCOL_VERSION,
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "streamable", "version": "1"},
+            }
+            response = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+            return JSONResponse(response, headers={SESSION_HEADER: "s1"})
+        if session_id != "s1":
+            return Response(status_code=400)
+        text = message["params"]["arguments"]["text"]
+        if text == "fail":
+            return Response(status_code=500)
+        result = {"content": [{"type": "text", "text": text}], "isError": False}
+        data = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result})
+        return Response(
+            f"event: message\ndata: {data}\n\n", media_type="text/event-stream"
+        )
+
+
+@pytest.mark.anyio
+async def test_streamable_http_transport():
+    server = StreamableServer()
+    params = HttpServerParameters(transport="streamable-http", url="http://server/mcp")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(server.app))
+    async with client, streamable_http_transport(client, params) as streams:
+        async with ClientSession(*streams) as session:
+            init = await session.initialize()
+            assert init.serverInfo.name == "streamable"
+            result = await session.call_tool("echo", {"text": "hi"})
+            assert result.content[0].text == "hi"
+            # A rejected request is answered with an error, not left hanging
+            with pytest.raises(McpError):
+                await session.call_tool("echo", {"text": "fail"})
+    assert server.deleted == ["s1"]
@@ -0,0 +1,55 @@
+import json
+import os
+import signal
+
+import pytest
+
+from mcpo import main
+from mcpo.utils import workers
+from mcpo.utils.workers import RELOAD_SIGNAL, REFRESH_SIGNAL, WorkerSupervisor
+
+pytestmark = pytest.mark.skipif(
+    RELOAD_SIGNAL is None or REFRESH_SIGNAL is None, reason="POSIX signals only"
+)
+
+
+def test_forwarded_signals_do_not_kill_a_starting_worker():
+    previous = {
+        signum: signal.getsignal(signum) for signum in (RELOAD_SIGNAL, REFRESH_SIGNAL)
+    }
+    try:
+        workers._ignore_forwarded_signals()
+        # A worker without a reloader, or before it installs its handler
+        os.kill(os.getpid(), RELOAD_SIGNAL)
+        os.kill(os.getpid(), REFRESH_SIGNAL)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+def test_reload_is_only_forwarded_with_a_config_file():
+    single = WorkerSupervisor({"server_command": ["uvx", "server"]}, 2)
+    assert single._forwarded_signals() == [REFRESH_SIGNAL]
+    config = WorkerSupervisor({"config": "config.json"}, 2)
+    assert config._forwarded_signals() == [REFRESH_SIGNAL, RELOAD_SIGNAL]
+
+
+def test_workers_are_told_their_index():
+    supervisor = WorkerSupervisor({"server_command": ["uvx", "server"]}, 2)
+    assert [supervisor._args(index)["worker"] for index in range(2)] == [0, 1]
+
+
+@pytest.mark.anyio
+async def test_warns_about_per_worker_rate_limits(tmp_path, monkeypatch, caplog):
+    class Supervisor:
+        def __init__(self, run_args, workers, eager=False):
+            pass
+
+        async def serve(self, host, port, **ssl):
+            pass
+
+    monkeypatch.setattr(main, "WorkerSupervisor", Supervisor)
+    keys = tmp_path / "keys.json"
+    keys.write_text(json.dumps({"keys": [{"key": "secret", "maxConcurrent": 1}]}))
+    await main.run(server_command=["uvx", "server"], api_keys=str(keys), workers=2)
+    assert "apply to each of the 2 workers" in caplog.text